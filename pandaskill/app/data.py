@@ -1,7 +1,10 @@
+import numpy as np
 import pandas as pd
 import streamlit as st
 import os
+from pandaskill.app.misc import compute_rating_lower_bound
 from pandaskill.experiments.general.utils import load_data
+from pandaskill.libs.skill_rating.rating_history import RatingHistory
 
 @st.cache_data
 def get_data_from_path(path, index_col):
@@ -22,3 +25,111 @@ def get_all_data():
     data = data.sort_index()
     
     return data
+
+@st.cache_resource
+def get_rating_history():
+    return RatingHistory(get_all_data())
+
+@st.cache_resource
+def get_game_catalog():
+    return create_game_catalog(get_all_data())
+
+def create_game_catalog(data):
+    """
+    Hierarchy league -> series -> tournament -> {game label: game_id} of the games of `data`, sorted by
+    (game_id, player_id), in order of first appearance, with the row offsets of every game.
+    """
+    if not data.index.is_monotonic_increasing:
+        raise ValueError("The game catalog requires data sorted by (game_id, player_id)")
+    game_ids = data.index.get_level_values("game_id").to_numpy()
+    is_first_row = np.r_[True, game_ids[1:] != game_ids[:-1]]
+    offsets = np.r_[np.flatnonzero(is_first_row), len(game_ids)]
+
+    keys = ["league_name", "series_name", "tournament_name", "match_id"]
+    rows = data[keys + ["team_name"]].dropna(subset=keys).reset_index("player_id", drop=True).reset_index()
+    match_teams, match_game_ids = {}, {}
+    for key_and_team in rows.dropna().drop_duplicates(keys + ["team_name"])[keys + ["team_name"]].itertuples(index=False, name=None):
+        match_teams.setdefault(key_and_team[:-1], []).append(key_and_team[-1])
+    for key_and_game_id in rows.drop_duplicates(keys + ["game_id"])[keys + ["game_id"]].itertuples(index=False, name=None):
+        match_game_ids.setdefault(key_and_game_id[:-1], []).append(key_and_game_id[-1])
+
+    catalog = {}
+    for (league, series, tournament, match_id), match_games in match_game_ids.items():
+        teams_vs = " vs ".join(str(team_name) for team_name in match_teams.get((league, series, tournament, match_id), [])[:2])
+        game_options = catalog.setdefault(league, {}).setdefault(series, {}).setdefault(tournament, {})
+        for idx, game_id in enumerate(match_games, start=1):
+            game_options[f"{game_id} - {teams_vs} - Game {idx}"] = game_id
+
+    return {"games": catalog, "game_ids": game_ids[is_first_row], "offsets": offsets}
+
+def get_game_rows(data, game_catalog, game_id):
+    """
+    Rows of `game_id`, indexed by player_id, fetched by position from the offsets of the catalog. `data`
+    must be the (game_id, player_id)-sorted frame the catalog was built from.
+    """
+    slot = np.searchsorted(game_catalog["game_ids"], game_id)
+    if slot == len(game_catalog["game_ids"]) or game_catalog["game_ids"][slot] != game_id:
+        return data.iloc[:0].droplevel("game_id")
+    game_rows = data.iloc[game_catalog["offsets"][slot]:game_catalog["offsets"][slot + 1]]
+    if len(game_rows) == 0 or (game_rows.index.get_level_values("game_id") != game_id).any():
+        raise ValueError("The data is not the frame the game catalog was built from")
+    return game_rows.droplevel("game_id")
+
+@st.cache_resource
+def get_entity_trajectory_cache():
+    return EntityTrajectoryCache(get_all_data())
+
+TRAJECTORY_COLUMNS = [
+    "entity_name", "game_id", "date", "series_name", "tournament_name",
+    "pscore", "skill_rating_mu", "skill_rating_sigma", "skill_rating",
+]
+
+class EntityTrajectoryCache():
+    """
+    Date-sorted rating trajectories of the players (by player_id) and teams (by team_id) of `data`, a team
+    rating being the aggregate of its players' ratings in a game. Each entity type is stored as one table
+    sorted by entity and date with the row offsets of every entity, a trajectory being an offset slice.
+    """
+    def __init__(self, data: pd.DataFrame) -> None:
+        data = data.reset_index().rename(columns={
+            "skill_rating_after_mu": "skill_rating_mu",
+            "skill_rating_after_sigma": "skill_rating_sigma",
+            "skill_rating_after": "skill_rating",
+            "performance_score": "pscore",
+        })
+        self.tables, self.name_to_id = {}, {}
+        for entity_type, entity_ratings in [("player", data), ("team", _aggregate_team_ratings(data))]:
+            id_column, name_column = f"{entity_type}_id", f"{entity_type}_name"
+            names_and_ids = data[[id_column, name_column]].drop_duplicates()
+            self.name_to_id[entity_type] = dict(zip(names_and_ids[name_column], names_and_ids[id_column]))
+
+            entity_ids = entity_ratings[id_column].to_numpy()
+            order = np.lexsort((entity_ratings["date"].to_numpy(), entity_ids))
+            unique_entity_ids, nb_games = np.unique(entity_ids[order], return_counts=True)
+            table = entity_ratings.iloc[order].assign(entity_name=entity_ratings[name_column].iloc[order])
+            self.tables[entity_type] = (
+                table[TRAJECTORY_COLUMNS].reset_index(drop=True), pd.Index(unique_entity_ids), np.r_[0, np.cumsum(nb_games)]
+            )
+
+    def get(self, entity_type: str, entity_id: int) -> pd.DataFrame:
+        """Trajectory of a "player" or "team", empty for an unknown entity."""
+        table, entity_index, offsets = self.tables[entity_type]
+        slot = entity_index.get_indexer([entity_id])[0]
+        return table.iloc[offsets[slot]:offsets[slot + 1]] if slot >= 0 else table.iloc[:0]
+
+    def get_many(self, entity_type: str, entity_ids: list[int]) -> pd.DataFrame:
+        """Trajectories of several entities, concatenated in a new frame."""
+        return pd.concat([self.get(entity_type, entity_id) for entity_id in entity_ids], ignore_index=True)
+
+def _aggregate_team_ratings(data):
+    data = data.assign(skill_rating_sigma_squared=np.square(data["skill_rating_sigma"]))
+    team_ratings = data.groupby(["team_id", "team_name", "game_id", "date"], observed=True, sort=False).agg(
+        series_name=("series_name", "first"),
+        tournament_name=("tournament_name", "first"),
+        pscore=("pscore", "mean"),
+        skill_rating_mu=("skill_rating_mu", "mean"),
+        skill_rating_sigma_squared=("skill_rating_sigma_squared", "mean"),
+    ).reset_index()
+    team_ratings["skill_rating_sigma"] = np.sqrt(team_ratings.pop("skill_rating_sigma_squared"))
+    team_ratings["skill_rating"] = compute_rating_lower_bound(team_ratings["skill_rating_mu"], team_ratings["skill_rating_sigma"])
+    return team_ratings
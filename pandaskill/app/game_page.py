@@ -1,5 +1,6 @@
 import streamlit as st
 import pandas as pd
+from pandaskill.app.data import get_game_catalog, get_game_rows
 
 def display_game_page(data):
     """
@@ -8,71 +9,45 @@ def display_game_page(data):
 
     st.header("Game Analysis")
 
-    game_id = _select_game_id(data)
+    game_catalog = get_game_catalog()
+    game_id = _select_game_id(game_catalog)
 
     if game_id:
-        _display_game_stats(data, game_id)
+        _display_game_stats(data, game_catalog, game_id)
     else:
         st.warning("Please select a game to display.")
 
-def _select_game_id(data):
-    leagues = data['league_name'].dropna().unique().tolist()
+def _select_game_id(game_catalog):
+    games = game_catalog["games"]
+    leagues = list(games)
     default_league_index = leagues.index("LCK")
     selected_league = st.selectbox("Select League:", leagues, index=default_league_index)
-    data_league = data[data['league_name'] == selected_league]
 
-    series = data_league['series_name'].dropna().unique().tolist()
+    series = list(games[selected_league])
     default_series_index = series.index("LCK Summer 2024") if selected_league == "LCK" else 0
     selected_series = st.selectbox("Select Series:", series, index=default_series_index)
-    data_series = data_league[data_league['series_name'] == selected_series]
 
-    tournaments = data_series["tournament_name"].dropna().unique().tolist()
+    tournaments = list(games[selected_league][selected_series])
     default_tournament_index = tournaments.index("Playoffs") if selected_series == "LCK Summer 2024" else 0
     selected_tournament = st.selectbox("Select Tournament:", tournaments, index=default_tournament_index)
-    data_tournament = data_series[data_series['tournament_name'] == selected_tournament]
 
-    game_options = _construct_game_options(data_tournament)
+    game_options = games[selected_league][selected_series][selected_tournament]
 
-    game_labels = [option['label'] for option in game_options]
+    game_labels = list(game_options)
     default_game_name = "36348 - T1 vs Hanwha Life Esports - Game 2"
     default_game_index = game_labels.index(default_game_name) if (selected_series == "LCK Summer 2024" and selected_tournament == "Playoffs") else 0
     selected_game_label = st.selectbox("Select Game:", game_labels, default_game_index)
 
-    selected_game_option = next((option for option in game_options if option['label'] == selected_game_label), None)
-    if selected_game_option:
-        game_id = selected_game_option['game_id']
-    else:
+    game_id = game_options.get(selected_game_label)
+    if game_id is None:
         st.warning("Please select a game.")
         return
 
     return game_id
 
-def _construct_game_options(data_tournament):
-    matches_in_tournament = data_tournament['match_id'].dropna().unique().tolist()
-    game_options = []
-    for match_id in matches_in_tournament:
-        match_data = data_tournament[data_tournament['match_id'] == match_id]
-        game_ids = match_data.index.get_level_values(0).dropna().unique().tolist()
-        team_names = match_data['team_name'].unique()
-        if len(team_names) >= 2:
-            teams_vs = f"{team_names[0]} vs {team_names[1]}"
-        else:
-            teams_vs = " vs ".join(team_names)
-
-        sorted_game_ids = sorted(game_ids)
-        for idx, gid in enumerate(sorted_game_ids, start=1):
-            label = f"{gid} - {teams_vs} - Game {idx}"
-            game_options.append({'label': label, 'game_id': gid})
-
-    if not game_options:
-        st.warning("No games found in the selected series.")
-        return
-    
-    return game_options
-
-def _display_game_stats(data, game_id):
+def _display_game_stats(data, game_catalog, game_id):
     game_id = int(game_id)
-    game_data = data.loc[(game_id,)].copy()
+    game_data = get_game_rows(data, game_catalog, game_id).copy()
     if game_data.empty:
         st.warning("No data found for the selected game.")
         return
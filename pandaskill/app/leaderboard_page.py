@@ -6,6 +6,7 @@ from pandaskill.experiments.general.utils import ALL_REGIONS
 import matplotlib.pyplot as plt
 import seaborn as sns
 from pandaskill.app.misc import compute_rating_lower_bound
+from pandaskill.app.data import get_rating_history
 
 def display_leaderboard_page(data):
     """
@@ -20,7 +21,7 @@ def display_leaderboard_page(data):
 
     st.info(f"Leaderboard at date {date}, with at least {min_nb_games} games since {since}")
 
-    ranking = create_global_player_ranking(data, parameters)
+    ranking = create_global_player_ranking(data, parameters, get_rating_history())
 
     average_pscore = data.groupby("player_id")["performance_score"].mean()
     ranking["pscore"] = ranking["player_id"].map(average_pscore)
@@ -89,7 +90,7 @@ def _get_leaderboard_parameters(data):
 
 def _create_team_ranking_from_player_ranking(ranking):    
     ranking = ranking.sort_values("skill_rating", ascending=False) # so that we select the top 5 players per team
-    ranking = ranking.groupby("team_name").agg(
+    ranking = ranking.groupby("team_name", observed=True).agg(
         region=("region", "first"),
         nb_games=("nb_games", "mean"),
         last_game_date=("last_game_date", "max"),
@@ -111,6 +112,7 @@ def _display_distributions(ranking):
 
     color_palette = sns.color_palette()
     df = ranking.copy()
+    df[x_column] = df[x_column].astype(object) # plotting order is set below, not by the categories
     if x_column == "region":
         region_order_dict = {
             region: i
@@ -2,8 +2,8 @@ import streamlit as st
 import datetime as dt
 import pandas as pd
 import altair as alt
-import numpy as np
 from pandaskill.app.misc import compute_rating_lower_bound, compute_rating_upper_bound
+from pandaskill.app.data import get_entity_trajectory_cache
 
 def display_player_team_page(data):
     """
@@ -12,17 +12,7 @@ def display_player_team_page(data):
 
     st.header("Player / Team Evolution")
 
-    data = data.reset_index()
-
-    data.rename(
-        columns={
-            "skill_rating_after_mu": "skill_rating_mu", 
-            "skill_rating_after_sigma": "skill_rating_sigma", 
-            "skill_rating_after": "skill_rating",
-            "performance_score": "pscore"
-        }, 
-        inplace=True
-    )
+    trajectory_cache = get_entity_trajectory_cache()
 
     settings_columns = st.columns([1, 9])
     with settings_columns[0]:
@@ -30,9 +20,9 @@ def display_player_team_page(data):
 
     with settings_columns[1]:
         if selection_type == "Player":
-            ratings = _get_player_ratings(data)
+            ratings = _get_player_ratings(trajectory_cache)
         elif selection_type == "Team":
-            ratings = _get_team_ratings(data)
+            ratings = _get_team_ratings(trajectory_cache)
         else:
             st.warning("Invalid selection type.")
 
@@ -40,9 +30,8 @@ def display_player_team_page(data):
 
     _display_player_evolution(ratings)
 
-def _get_player_ratings(data):
-    all_players = data[["player_id", "player_name"]].drop_duplicates()
-    player_name_to_id = all_players.set_index("player_name").to_dict()["player_id"]
+def _get_player_ratings(trajectory_cache):
+    player_name_to_id = trajectory_cache.name_to_id["player"]
     player_names = list(player_name_to_id.keys())
     selected_player_names = st.multiselect(
         "Select up to two players to compare:",
@@ -54,14 +43,12 @@ def _get_player_ratings(data):
         st.warning("Please select at least one player.")
         return
     selected_player_ids = [player_name_to_id[name] for name in selected_player_names]
-    ratings = data.loc[data["player_id"].isin(selected_player_ids)].copy()
-    ratings['entity_name'] = ratings['player_name']
+    ratings = trajectory_cache.get_many("player", selected_player_ids)
     
     return ratings
 
-def _get_team_ratings(data):
-    all_teams = data[["team_id", "team_name"]].drop_duplicates()
-    team_name_to_id = all_teams.set_index("team_name").to_dict()["team_id"]
+def _get_team_ratings(trajectory_cache):
+    team_name_to_id = trajectory_cache.name_to_id["team"]
     team_names = list(team_name_to_id.keys())
     selected_team_names = st.multiselect(
         "Select up to two teams to compare:",
@@ -73,17 +60,7 @@ def _get_team_ratings(data):
         st.warning("Please select at least one team.")
         return
     selected_team_ids = [team_name_to_id[name] for name in selected_team_names]
-    team_data = data.loc[data["team_id"].isin(selected_team_ids)].copy()
-    team_data["entity_name"] = team_data["team_name"]
-    ratings = team_data.groupby(["entity_name", "game_id", "date"]).agg(
-        series_name=("series_name", "first"),
-        tournament_name=("tournament_name", "first"),
-        pscore=("pscore", "mean"),
-        skill_rating_mu=("skill_rating_mu", "mean"),
-        skill_rating_sigma=("skill_rating_sigma", lambda x: np.sqrt(np.mean(np.square(x)))),
-    ).reset_index()
-
-    ratings["skill_rating"] = compute_rating_lower_bound(ratings["skill_rating_mu"], ratings["skill_rating_sigma"])
+    ratings = trajectory_cache.get_many("team", selected_team_ids)
     
     return ratings
 
@@ -120,7 +97,7 @@ def _display_player_evolution(skill_ratings):
     skill_ratings["skill_rating_003%"] = compute_rating_upper_bound(skill_ratings["skill_rating_mu"], skill_ratings["skill_rating_sigma"])
     secondary_y_axis = "pscore"
 
-    skill_ratings["pscore_mean"] = skill_ratings.groupby("series_name")["pscore"].transform("mean")
+    skill_ratings["pscore_mean"] = skill_ratings.groupby("series_name", observed=True)["pscore"].transform("mean")
     
     comparing_entities = skill_ratings['entity_name'].nunique() > 1
     show_settings_columns = st.columns([2, 8])
@@ -23,7 +23,7 @@ def display_region_page(data):
             by=['series_name', 'region', 'skill_rating_after'], 
             ascending=[True, True, False]
         )
-        ratings_in_region_after_series = ratings_in_region_after_series.groupby(['series_name', 'region'], observed=False).head(10).reset_index()
+        ratings_in_region_after_series = ratings_in_region_after_series.groupby(['series_name', 'region'], observed=True).head(10).reset_index()
     
     chart = _create_meta_rating_evolution_chart(
         ratings_in_region_after_series,
@@ -43,7 +43,7 @@ def _create_meta_rating_evolution_chart(
     desired_series_order: list,
     title: str = None
 ) -> alt.Chart:
-    mean_data = ratings_in_region_after_series.groupby(['region', 'series_name'])['skill_rating_after'].mean().reset_index()
+    mean_data = ratings_in_region_after_series.groupby(['region', 'series_name'], observed=True)['skill_rating_after'].mean().reset_index()
 
     nb_games_in_series_df = nb_games_in_series.reset_index()
     nb_games_in_series_df.columns = ['series_name', 'nb_games']
@@ -1,7 +1,26 @@
 import logging
+import numpy as np
 import pandas as pd
 from typing import Tuple
 
+def _has_nan_cells(stat_df: pd.DataFrame, ignored_columns: list[str]) -> np.ndarray:
+    checked_columns = ~stat_df.columns.isin(ignored_columns)
+    return stat_df.isna().to_numpy()[:, checked_columns].any(axis=1)
+
+def _has_value(column: str, value: int) -> callable:
+    return lambda stat_df: stat_df[column].to_numpy() == value
+
+NB_ROWS_PER_GAME = 10
+
+# (summary key, description, function returning the mask of the rows violating the rule)
+ROW_VALIDATION_RULES = [
+    ("nan_dropped_games", "NaN cells", lambda stat_df: _has_nan_cells(stat_df, ignored_columns=["series_name"])),
+    ("wrong_game_length_dropped_games", "0 game_length", _has_value("game_length", 0)),
+    ("wrong_gold_earned_dropped_games", "0 gold_earned", _has_value("gold_earned", 0)),
+    ("wrong_total_damage_dealt_to_champions_dropped_games", "0 total_damage_dealt_to_champions", _has_value("total_damage_dealt_to_champions", 0)),
+    ("wrong_total_damage_taken_dropped_games", "0 total_damage_taken", _has_value("total_damage_taken", 0)),
+]
+
 def drop_unwanted_games(
     stat_df: pd.DataFrame, event_df: pd.DataFrame
 ) -> Tuple[pd.DataFrame, pd.DataFrame, dict]:
@@ -29,44 +48,31 @@ def _drop_specific_games(stat_df: pd.DataFrame) -> Tuple[pd.DataFrame, list]:
     return stat_df, game_ids_to_drop
 
 def _drop_incomplete_games(stat_df: pd.DataFrame) -> Tuple[pd.DataFrame, dict]:
-    stat_df, nan_dropped_games = _drop_games_with_nans(stat_df)
-    stat_df, wrong_game_length_dropped_games = _drop_rows_with_wrong_value(stat_df, "game_length", 0)
-    stat_df, wrong_gold_earned_dropped_games = _drop_rows_with_wrong_value(stat_df, "gold_earned", 0)
-    stat_df, wrong_total_damage_dealt_to_champions_dropped_games = _drop_rows_with_wrong_value(stat_df, "total_damage_dealt_to_champions", 0)
-    stat_df, wrong_total_damage_taken_dropped_games = _drop_rows_with_wrong_value(stat_df, "total_damage_taken", 0)
-    stat_df, missing_rows_dropped_games = _drop_games_with_missing_rows(stat_df)
-    dropped_games_summary = {
-        "nan_dropped_games": nan_dropped_games,
-        "wrong_game_length_dropped_games": wrong_game_length_dropped_games,
-        "wrong_gold_earned_dropped_games": wrong_gold_earned_dropped_games,
-        "wrong_total_damage_dealt_to_champions_dropped_games": wrong_total_damage_dealt_to_champions_dropped_games,
-        "wrong_total_damage_taken_dropped_games": wrong_total_damage_taken_dropped_games,
-        "missing_rows_dropped_games": missing_rows_dropped_games
-    }
-    return stat_df, dropped_games_summary
+    """
+    Evaluates all the `ROW_VALIDATION_RULES` at once: every invalid row is attributed to the first rule
+    it violates, then the games left without exactly `NB_ROWS_PER_GAME` valid rows are dropped as well.
+    """
+    rule_matrix = np.column_stack([is_invalid(stat_df) for _, _, is_invalid in ROW_VALIDATION_RULES])
+    row_is_invalid = rule_matrix.any(axis=1)
+    first_violated_rules = np.where(row_is_invalid, rule_matrix.argmax(axis=1), -1)
+
+    game_ids = stat_df.index.get_level_values("game_id").to_numpy()
+    game_codes, unique_game_ids = pd.factorize(game_ids)
+    nb_valid_rows_per_game = np.bincount(game_codes[~row_is_invalid], minlength=len(unique_game_ids))
+    game_is_incomplete = nb_valid_rows_per_game[game_codes] != NB_ROWS_PER_GAME
+
+    dropped_games_summary = {}
+    for rule_index, (summary_key, description, _) in enumerate(ROW_VALIDATION_RULES):
+        dropped_games_summary[summary_key] = _log_dropped_game_ids(
+            game_ids[first_violated_rules == rule_index], description
+        )
+    dropped_games_summary["missing_rows_dropped_games"] = _log_dropped_game_ids(
+        game_ids[~row_is_invalid & game_is_incomplete], "missing rows"
+    )
 
-def _drop_rows_with_wrong_value(
-    stat_df: pd.DataFrame, feature_name: str, wrong_value: int
-) -> Tuple[pd.DataFrame, list]:
-    feature_wrong_value_mask = stat_df.loc[:, feature_name] == wrong_value
-    feature_wrong_value_dropped_game_ids = stat_df[feature_wrong_value_mask].index.get_level_values("game_id").unique().values.astype(int).tolist()
-    logging.info(f"Dropping {len(feature_wrong_value_dropped_game_ids)} games due to \
-        {wrong_value} {feature_name}: {feature_wrong_value_dropped_game_ids}")
-    return stat_df[~feature_wrong_value_mask], feature_wrong_value_dropped_game_ids
+    return stat_df[~row_is_invalid & ~game_is_incomplete], dropped_games_summary
 
-def _drop_games_with_nans(stat_df: pd.DataFrame) -> Tuple[pd.DataFrame, list]:
-    non_na_mask = ~stat_df.drop("series_name", axis=1).isna().any(axis=1)
-    nan_cells_dropped_game_ids = stat_df[~non_na_mask].index.get_level_values("game_id").unique().values.astype(int).tolist()
-    logging.info(f"Dropping {len(nan_cells_dropped_game_ids)} games due to NaN cells: \
-        {nan_cells_dropped_game_ids}")
-    return stat_df[non_na_mask], nan_cells_dropped_game_ids
-    
-def _drop_games_with_missing_rows(stat_df: pd.DataFrame) -> Tuple[pd.DataFrame, list]:
-    mask_with_10_rows_per_game = stat_df.reset_index("game_id").groupby("game_id").count() == 10
-    mask_with_10_rows_per_game = mask_with_10_rows_per_game[mask_with_10_rows_per_game["date"]]
-    complete_game_ids = mask_with_10_rows_per_game.index
-    rows_to_keep_mask = stat_df.index.get_level_values("game_id").isin(complete_game_ids)
-    missing_rows_dropped_game_ids = stat_df[~rows_to_keep_mask].index.get_level_values("game_id").unique().values.astype(int).tolist()
-    logging.info(f"Dropping {len(missing_rows_dropped_game_ids)} games due to missing rows: \
-        {missing_rows_dropped_game_ids}")
-    return stat_df[rows_to_keep_mask], missing_rows_dropped_game_ids
+def _log_dropped_game_ids(game_ids: np.ndarray, description: str) -> list:
+    dropped_game_ids = pd.unique(game_ids).astype(int).tolist()
+    logging.info(f"Dropping {len(dropped_game_ids)} games due to {description}: {dropped_game_ids}")
+    return dropped_game_ids
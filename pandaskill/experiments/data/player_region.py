@@ -1,6 +1,10 @@
 from datetime import datetime, timedelta
 import logging
+import numpy as np
+from os.path import join
 import pandas as pd
+from pandaskill.experiments.general.utils import ARTIFACTS_DIR
+import yaml
 
 MAIN_LEAGUE_SERIES_TOURNAMENT_WHITELIST = {
     "Korea": {
@@ -98,6 +102,8 @@ SERIES_NAME_TO_REGION_MAPPING = {
     for series_name in series_dict.keys()
 }
 
+REGION_CORRECTION_RULES_PATH = join(ARTIFACTS_DIR, "data", "preprocessing", "region_correction_rules.yaml")
+
 def attribute_player_in_game_to_region(df: pd.DataFrame) -> pd.DataFrame:
     regular_season_tournaments = []
     for league, series in MAIN_LEAGUE_SERIES_TOURNAMENT_WHITELIST.items():
@@ -110,7 +116,7 @@ def attribute_player_in_game_to_region(df: pd.DataFrame) -> pd.DataFrame:
     ).set_index(["game_id", "player_id"])
     
     main_regions_series_participants_df = regular_season_df.groupby(
-        "series_name"
+        "series_name", observed=True
     ).agg({
         "league_name": lambda x: x.iloc[0], 
         "date": lambda x: x.iloc[0], 
@@ -124,11 +130,8 @@ def attribute_player_in_game_to_region(df: pd.DataFrame) -> pd.DataFrame:
         df, main_regions_series_participants_df, absolute_start_date, absolute_end_date
     )
 
-    df['region'] = df.apply(
-        lambda row: _get_current_region_from_team_name(
-            row["team_id"], row["date"], main_regions_participants_lookup
-        ),
-        axis=1
+    df['region'] = _get_current_regions_from_team_ids(
+        df["team_id"], df["date"], main_regions_participants_lookup
     )
 
     return df
@@ -136,31 +139,23 @@ def attribute_player_in_game_to_region(df: pd.DataFrame) -> pd.DataFrame:
 def _create_main_regions_participants_lookup(
     df: pd.DataFrame, region_rosters_df: pd.DataFrame, absolute_start_date: str, absolute_end_date: str
 ) -> dict:
+    # a split ends when the next split of the same league starts
+    next_split_start_dates = {}
+    for league_name, league_dates in region_rosters_df.groupby("league_name", observed=True)["date"]:
+        league_dates = sorted(league_dates.unique())
+        next_split_start_dates[league_name] = dict(zip(league_dates, [*league_dates[1:], absolute_end_date]))
+
     lookup = {}
-    for _, row in region_rosters_df.iterrows():
+    for series_name, row in region_rosters_df.iterrows():
+        start_date = row['date']
+        league_name = row['league_name']
+        end_date = next_split_start_dates[league_name][start_date]
         for team_id in row['team_id']:
-            team_id = int(team_id)
-            if team_id not in lookup:
-                lookup[team_id] = []
-
-            start_date = row['date']
-            league_name = row['league_name']
-
-            next_split = region_rosters_df[
-                (region_rosters_df.league_name == league_name) &
-                (region_rosters_df.date > start_date)
-            ]
-
-            if next_split.empty:
-                end_date = absolute_end_date
-            else:
-                end_date = next_split.iloc[0]['date']
-
-            lookup[int(team_id)].append({
+            lookup.setdefault(int(team_id), []).append({
                 "start_date": start_date,
                 "end_date": end_date,
                 "league_name": league_name,
-                "region": SERIES_NAME_TO_REGION_MAPPING[row.name]
+                "region": SERIES_NAME_TO_REGION_MAPPING[series_name]
             })
     
     for team_id in lookup:
@@ -168,6 +163,7 @@ def _create_main_regions_participants_lookup(
 
     # add lookup for teams that played in the regular season before the start of the dataset
     team_name_to_id_map = df.loc[:,["team_id", "team_name"]].set_index("team_name").drop_duplicates().to_dict()["team_id"]
+    team_last_game_dates = df.groupby("team_id")["date"].max()
     for region, team_names in regular_season_team_names_before_data.items():
         for team_name in team_names:
             if team_name not in team_name_to_id_map:
@@ -175,7 +171,7 @@ def _create_main_regions_participants_lookup(
             else:
                 team_id = team_name_to_id_map[team_name]
                 if team_id not in lookup:
-                    last_game_date = df[df.team_id == team_id].date.max()
+                    last_game_date = team_last_game_dates[team_id]
                     last_game_date = datetime.strptime(last_game_date, "%Y-%m-%d %H:%M:%S.%f") + timedelta(days=1)
                     last_game_date = last_game_date.strftime("%Y-%m-%d")
 
@@ -198,141 +194,111 @@ def _create_main_regions_participants_lookup(
 
     return lookup
 
-def _get_current_region_from_team_name(
-    team_id: int, date: str, region_rosters_lookup: dict
-):
-    if team_id not in region_rosters_lookup:
-        return "Other"
-    
-    team_data = region_rosters_lookup[team_id]
+def _get_current_regions_from_team_ids(
+    team_ids: pd.Series, dates: pd.Series, region_rosters_lookup: dict
+) -> np.ndarray:
+    """
+    Region of every (team_id, date), i.e. the one of the first entry of the team lookup such that
+    start_date <= date < end_date, "Other" if there is none.
+    The entries are compiled into a (team, date segment) table, the segments being delimited by
+    all the entry dates, so that every row is resolved with a single `searchsorted`.
+    """
+    boundaries = np.unique([
+        date
+        for team_data in region_rosters_lookup.values()
+        for entry in team_data
+        for date in (entry["start_date"], entry["end_date"])
+    ]).astype(str)
+    regions = np.array(["Other", *{entry["region"] for team_data in region_rosters_lookup.values() for entry in team_data}], dtype=object)
+    region_codes = {region: code for code, region in enumerate(regions)}
 
-    for entry in team_data:
-        if entry["start_date"] <= date and entry["end_date"] > date:
-            return entry["region"]
-        
-    return "Other"
-    
-def manually_correct_team_region(df: pd.DataFrame) -> pd.DataFrame:
-    df = _fix_kespa_cup_regions(df)
-    df = _fix_demacia_cup_regions(df)
-    df = _attribute_region_to_all_star_2020(df)
-    df = _attribute_region_to_showmatches_2023(df)
+    # one extra team row and segment column that are always "Other", for unknown teams and dates before the first boundary
+    region_table = np.zeros((len(region_rosters_lookup) + 1, len(boundaries) + 1), dtype=np.int64)
+    for team_code, team_data in enumerate(region_rosters_lookup.values()):
+        for entry in reversed(team_data): # the first matching entry wins
+            start_segment, end_segment = np.searchsorted(boundaries, [entry["start_date"], entry["end_date"]]) + 1
+            region_table[team_code, start_segment:end_segment] = region_codes[entry["region"]]
 
-    df.loc[
-        (df.series_name == "Prime League 1st Division Spring 2022")
-        & (df.team_name == "FC Schalke 04 Esports")
-    , "region"] = "Other" # they don't participate in the LEC Spring split that starts few days later
+    team_codes = pd.Index(list(region_rosters_lookup)).get_indexer(team_ids)
+    segments = np.searchsorted(boundaries, dates.to_numpy(dtype=str), side="right")
+    return regions[region_table[team_codes, segments]]
+    
+def load_region_correction_rules(path: str = REGION_CORRECTION_RULES_PATH) -> pd.DataFrame:
+    """
+    Loads the (series_name, team_name, region) region correction rules, a missing team_name meaning that
+    the rule applies to all the teams of the series. Raises a ValueError if a (series_name, team_name)
+    key has several rules.
+    """
+    with open(path, "r") as file:
+        rules_df = pd.DataFrame(yaml.safe_load(file), columns=["series_name", "team_name", "region"])
 
-    df.loc[
-        (df.series_name == "LMF Opening 2023")
-        & (df.team_name == "Globant Emerald")
-    , "region"] = "Other" # they did not qualify to the LLA Opening 2023
+    duplicated_keys = rules_df.duplicated(["series_name", "team_name"], keep=False)
+    if duplicated_keys.any():
+        raise ValueError(
+            f"Several region correction rules for the same key: "
+            f"{rules_df.loc[duplicated_keys, ['series_name', 'team_name']].drop_duplicates().values.tolist()}"
+        )
 
-    return df
+    return rules_df
 
-def _fix_kespa_cup_regions(df: pd.DataFrame) -> pd.DataFrame:    
-    df.loc[
-        (df.series_name == "KeSPA Cup 2019")
-        & (df.team_name == "T1")
-    , "region"] = "Korea" # SK telecom T1 renamed to T1
-    df.loc[
-        (df.series_name == "KeSPA Cup 2019")
-        & (df.team_name == "DRX")
-    , "region"] = "Korea" # Kingzone DragonX renamed to DRX
-    
-    df.loc[
-        (df.series_name == "KeSPA Cup 2020")
-        & (df.team_name == "Nongshim Red Force")
-    , "region"] = "Korea" # Team Dynamics renamed to Nongshim Red Force
-    df.loc[
-        (df.series_name == "KeSPA Cup 2020")
-        & (df.team_name == "BRION")
-    , "region"] = "Korea" # Brion Blade renamed to BRION
-    
-    return df
+def manually_correct_team_region(df: pd.DataFrame, rules_df: pd.DataFrame = None) -> pd.DataFrame:
+    """
+    Applies the region correction rules (`load_region_correction_rules()` by default) with a lookup of
+    the (series_name, team_name) and (series_name,) keys of every row, the rules for a team taking
+    precedence over the ones for a whole series. A categorical region column stays categorical.
+    """
+    if rules_df is None:
+        rules_df = load_region_correction_rules()
+    series_rules_df = rules_df[rules_df["team_name"].isna()]
+    team_rules_df = rules_df[rules_df["team_name"].notna()]
 
-def _fix_demacia_cup_regions(df: pd.DataFrame) -> pd.DataFrame:
-    df.loc[
-        (df.series_name == "Demacia Cup 2019")
-        & (df.team_name == "FunPlux Phoenix")
-    , "region"] = "Other" # FunPlus Phoenix plays with academy roster
-    df.loc[
-        (df.series_name == "Demacia Cup 2019")
-        & (df.team_name == "Invictus Gaming")
-    , "region"] = "Other" # Invictus Gaming plays with academy roster + new players
+    series_rule_indices = pd.Index(series_rules_df["series_name"]).get_indexer(df["series_name"])
+    team_rule_indices = pd.MultiIndex.from_frame(team_rules_df[["series_name", "team_name"]]).get_indexer(
+        pd.MultiIndex.from_arrays([df["series_name"], df["team_name"]])
+    )
 
-    df.loc[
-        (df.series_name == "Demacia Cup 2020")
-        & (df.team_name == "ThunderTalk Gaming")
-    , "region"] = "China" # Dominus Esports renamed to ThunderTalk Gaming
+    region = df["region"].to_numpy(dtype=object, copy=True)
+    for rule_indices, rules_regions in [
+        (series_rule_indices, series_rules_df["region"].to_numpy()), 
+        (team_rule_indices, team_rules_df["region"].to_numpy())
+    ]:
+        has_rule = rule_indices >= 0
+        region[has_rule] = rules_regions[rule_indices[has_rule]]
 
-    df.loc[
-        (df.series_name == "Demacia Cup 2021")
-        & (df.team_name == "Anyone's Legend")
-    , "region"] = "China" # Rogue Warrors renamed to Anyone's Legend
-    df.loc[
-        (df.series_name == "Demacia Cup 2021")
-        & (df.team_name == "Weibo Gaming")
-    , "region"] = "China" # Suning renamed to Weibo Gaming
+    if isinstance(df["region"].dtype, pd.CategoricalDtype):
+        categories = df["region"].cat.categories
+        new_categories = sorted(set(rules_df["region"]).difference(categories))
+        region = pd.Categorical(region, categories=categories.append(pd.Index(new_categories)))
+    df["region"] = region
 
     return df
 
-def _attribute_region_to_all_star_2020(df: pd.DataFrame) -> pd.DataFrame:
-    team_name_region_map = {
-        'All-Stars LJL': 'Other', 
-        'CBLoL Allstars': 'Brazil', 
-        'LCK  Queue Kings': 'Korea', 
-        'LCK Allstars': 'Korea', 
-        'LCK Legends': 'Korea', 
-        'LCL Allstars': 'Other', 
-        'LCS Allstars': 'North America', 
-        'LCS Legends': 'North America', 
-        'LCS Queue Kings': 'North America', 
-        'LEC Allstars': 'Europe', 
-        'LEC Legends': 'Europe', 
-        'LEC Queue Kings': 'Europe', 
-        'LLA Allstars': 'Latin America', 
-        'LPL Allstars': 'China', 
-        'LPL Legends': 'China', 
-        'LPL Queue Kings': 'China', 
-        'OPL Allstars': 'Other', 
-        'PCS Allstars': 'Asia-Pacific', 
-        'TCL Allstars': 'Other', 
-        'VCS Allstars': 'Vietnam'
-    }
-    for team_name, region in team_name_region_map.items():
-        df.loc[
-            (df.series_name == "All-Star 2020")
-            & (df.team_name == team_name)
-        , "region"] = region
+def attribute_player_region_change(df: pd.DataFrame, last_player_regions: pd.Series = None) -> pd.DataFrame:
+    """
+    Flags the rows whose region differs from the one of the previous game of the player by date. For the
+    first game of a player, the previous region is taken from `last_player_regions` (indexed by player_id)
+    if given, e.g. to attribute newly appended games, and is the game region otherwise. The rows are
+    returned sorted by date.
+    """
+    player_ids = df.index.get_level_values("player_id").to_numpy()
+    regions = df["region"].to_numpy(dtype=object)
+    dates = df["date"].to_numpy()
 
-    return df
+    order = np.lexsort((dates.astype(str), player_ids)) # by player_id then date
+    sorted_player_ids = player_ids[order]
+    sorted_regions = regions[order]
 
-def _attribute_region_to_showmatches_2023(df: pd.DataFrame) -> pd.DataFrame:
-    series_name_to_region_map = {
-        "Season Kickoff Latin America 2023": "Latin America",
-        "Season Kickoff EMEA 2023": "Europe",
-        "Season Kickoff Pacific 2023": "Asia-Pacific",
-        "Season Kickoff Japan 2023": "Other",
-        "Season Kickoff North America 2023": "North America",
-        "Season Kickoff Brazil 2023": "Brazil",
-        "Season Kickoff Vietnam 2023": "Vietnam",
-        "Season Kickoff Korea 2023": "Korea",
-    }
+    is_first_game = np.r_[True, sorted_player_ids[1:] != sorted_player_ids[:-1]]
+    previous_regions = np.r_[None, sorted_regions[:-1]]
+    if last_player_regions is not None:
+        previous_regions[is_first_game] = last_player_regions.reindex(sorted_player_ids[is_first_game]).to_numpy(dtype=object)
+    else:
+        previous_regions[is_first_game] = sorted_regions[is_first_game]
+    previous_regions = np.where(pd.isna(previous_regions), sorted_regions, previous_regions)
+    region_change = sorted_regions != previous_regions
 
-    for series_name, region in series_name_to_region_map.items():
-        df.loc[
-            (df.series_name == series_name)
-        , "region"] = region
-    
+    # same tie order as a `sort_values("date")` of the rows sorted by player_id then date
+    date_order = np.argsort(dates[order], kind="quicksort")
+    df = df.take(order[date_order])
+    df["region_change"] = region_change[date_order]
     return df
-
-def attribute_player_region_change(df: pd.DataFrame) -> pd.DataFrame:
-    df = df.reset_index()
-    df = df.sort_values(["player_id", "date"])
-    previous_region = df.groupby("player_id")["region"].shift(1)    
-    previous_region = previous_region.fillna(df["region"])
-    df["region_change"] = df["region"] != previous_region
-    df = df.set_index(["game_id", "player_id"])
-    df = df.sort_values("date")
-    return df
\ No newline at end of file
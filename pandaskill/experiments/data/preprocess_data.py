@@ -14,7 +14,7 @@ def load_raw_data(raw_data_dir: str) -> pd.DataFrame:
     
     return stat_df, game_events_df
 
-def compute_features(stat_df: pd.DataFrame, event_df: pd.DataFrame) -> pd.DataFrame:
+def compute_features(stat_df: pd.DataFrame, event_df: pd.DataFrame, nb_processes: int = None) -> pd.DataFrame:
     stat_df["game_length_in_min"] = stat_df["game_length"] / 60
     stat_df["total_kills"] = stat_df["team_kills"] + compute_other_team_stat_from_team_stat(stat_df, "team_kills")
 
@@ -34,7 +34,7 @@ def compute_features(stat_df: pd.DataFrame, event_df: pd.DataFrame) -> pd.DataFr
     logging.info("Computing event features...")
     (
         worthless_death_ratio, free_kill_ratio, worthless_death_total_kills_ratio, free_kill_total_kills_ratio
-    ) = compute_kill_death_value_features(stat_df, event_df, window=30)
+    ) = compute_kill_death_value_features(stat_df, event_df, window=30, nb_processes=nb_processes)
     stat_df["worthless_death_ratio"] = worthless_death_ratio
     stat_df["free_kill_ratio"] = free_kill_ratio
     stat_df["worthless_death_total_kills_ratio"] = worthless_death_total_kills_ratio
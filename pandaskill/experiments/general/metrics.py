@@ -1,71 +1,132 @@
+from joblib import Parallel, delayed
 import numpy as np
 import pandas as pd
 
-def compute_ece(y_true: np.ndarray, y_prob: np.ndarray, nbins: int = 10, binning_method="equal-width") -> float:
+def compute_ece(y_true: np.ndarray, y_prob: np.ndarray, nbins: int = 10, binning_method="equal-width") -> float | np.ndarray:
+    return compute_calibration(y_true, y_prob, nbins, binning_method)["ece"]
+
+def compute_calibration(
+    y_true: np.ndarray, y_prob: np.ndarray, nbins: int = 10, binning_method: str = "equal-width"
+) -> dict:
+    """
+    ECE, MCE and bin statistics of a prediction vector, or of every row of an (n_vectors, n) array.
+    The bins are the ones of `pd.cut` (equal-width, right-closed between the min and the max) or
+    `pd.qcut` (equal-size, duplicated edges dropped). The bin statistics `count`, `y_prob`, `y_true`
+    (means) and `error` (standard error of y_prob - y_true) have one column per bin, empty bins
+    having a count of 0 and NaN statistics.
+    """
+    y_prob = np.asarray(y_prob, dtype=np.float64)
+    is_vector = y_prob.ndim == 1
+    y_prob = np.atleast_2d(y_prob)
+    y_true = np.asarray(y_true, dtype=np.float64).reshape(y_prob.shape)
+
     if binning_method == "equal-width":
-        binned_df = bin_predictions_equal_width(y_true,  y_prob, nbins)
+        bins, edges = _bin_predictions_equal_width(y_prob, nbins)
     elif binning_method == "equal-size":
-        binned_df = bin_predictions_equal_size(y_true,  y_prob, nbins)
-    ece = compute_ece_from_binned_df(binned_df)
-    return ece
+        bins, edges = _bin_predictions_equal_size(y_prob, nbins)
+    else:
+        raise ValueError(f"Unknown binning method `{binning_method}`")
 
-def bin_predictions_equal_size(
-    y_true: np.ndarray, y_prob: np.ndarray, nbins: int = 10
-) -> pd.DataFrame:
-    df = pd.DataFrame({"y_true": y_true, "y_prob": y_prob})
-    df.loc[:, "bin"] = pd.qcut(df["y_prob"], q=nbins, duplicates="drop")
-    df.loc[:, "count"] = 1
-    df.loc[:, "error"] = df["y_prob"] - df["y_true"]
+    nb_vectors, nb_samples = y_prob.shape
+    nb_bins = edges.shape[1] - 1
+    flat_bins = (bins + nb_bins * np.arange(nb_vectors)[:, None]).ravel()
+    sum_per_bin = lambda values: np.bincount(
+        flat_bins, weights=values.ravel(), minlength=nb_vectors * nb_bins
+    ).reshape(nb_vectors, nb_bins)
 
-    binned_df = df.groupby("bin", observed=True)[
-        [
-            "y_prob",
-            "y_true",
-            "count",
-            "error",
-        ]
-    ].agg(
-        {
-            "y_prob": "mean",
-            "y_true": "mean",
-            "count": "sum",
-            "error": "sem",
+    errors = y_prob - y_true
+    counts = np.bincount(flat_bins, minlength=nb_vectors * nb_bins).reshape(nb_vectors, nb_bins)
+    y_prob_sums, y_true_sums = sum_per_bin(y_prob), sum_per_bin(y_true)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        error_means = (y_prob_sums - y_true_sums) / counts
+        error_deviations = errors - np.take_along_axis(error_means, bins, axis=1)
+        error_variances = sum_per_bin(np.square(error_deviations)) / (counts - 1)
+        calibration = {
+            "ece": np.abs(y_prob_sums - y_true_sums).sum(axis=1) / nb_samples,
+            "mce": np.nanmax(np.where(counts > 0, np.abs(y_prob_sums - y_true_sums) / counts, np.nan), axis=1),
+            "edges": edges,
+            "count": counts,
+            "y_prob": y_prob_sums / counts,
+            "y_true": y_true_sums / counts,
+            "error": np.sqrt(error_variances / counts),
         }
-    )
 
+    if is_vector:
+        calibration = {key: values[0] for key, values in calibration.items()}
+    return calibration
+
+def get_calibration_binned_df(calibration: dict) -> pd.DataFrame:
+    """Non-empty bins of the calibration of a single prediction vector, indexed by bin interval."""
+    non_empty = calibration["count"] > 0
+    edges = np.round(calibration["edges"], 3)
+    binned_df = pd.DataFrame(
+        {key: calibration[key][non_empty] for key in ["y_prob", "y_true", "count", "error"]},
+        index=pd.IntervalIndex.from_arrays(edges[:-1], edges[1:], closed="right", name="bin")[non_empty],
+    )
     return binned_df
 
+def _bin_predictions_equal_width(y_prob: np.ndarray, nbins: int) -> tuple[np.ndarray, np.ndarray]:
+    y_prob_min, y_prob_max = y_prob.min(axis=1, keepdims=True), y_prob.max(axis=1, keepdims=True)
+    bin_width = (y_prob_max - y_prob_min) / nbins
+    edges = y_prob_min + bin_width * np.arange(nbins + 1)
+    edges[:, -1:] = y_prob_max
+    edges[:, :1] -= (y_prob_max - y_prob_min) * 0.001
 
-def bin_predictions_equal_width(
-    y_true: np.ndarray, y_prob: np.ndarray, nbins: int = 10
-) -> pd.DataFrame:
-    df = pd.DataFrame({"y_true": y_true, "y_prob": y_prob})
-    df.loc[:, "bin"] = pd.cut(df["y_prob"], bins=nbins, include_lowest=True)
-    df.loc[:, "count"] = 1
-    df.loc[:, "error"] = df["y_prob"] - df["y_true"]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        bins = np.ceil((y_prob - y_prob_min) / bin_width) - 1
+    bins = np.clip(np.nan_to_num(bins, nan=0.0), 0, nbins - 1).astype(np.int64)
+    # fix the rounding of the division so that the bins match the edges exactly
+    bins -= (bins > 0) & (y_prob <= np.take_along_axis(edges, bins, axis=1))
+    bins += (bins < nbins - 1) & (y_prob > np.take_along_axis(edges, bins + 1, axis=1))
+    return bins, edges
 
-    binned_df = df.groupby("bin", observed=True)[
-        [
-            "y_prob",
-            "y_true",
-            "count",
-            "error",
-        ]
-    ].agg(
-        {
-            "y_prob": "mean",
-            "y_true": "mean",
-            "count": "sum",
-            "error": "sem",
-        }
+def _bin_predictions_equal_size(y_prob: np.ndarray, nbins: int) -> tuple[np.ndarray, np.ndarray]:
+    # np.percentile partitions the values instead of sorting them, with the same quantiles as `pd.qcut`
+    edges = np.percentile(y_prob, np.linspace(0, 1, nbins + 1) * 100, axis=1).T
+    bins = np.empty(y_prob.shape, dtype=np.int64)
+    for i, (y_prob_row, edges_row) in enumerate(zip(y_prob, edges)):
+        bins[i] = np.searchsorted(edges_row, y_prob_row, side="left")
+        # the lowest values go to the first non-empty bin, as duplicated edges are dropped
+        bins[i, y_prob_row == edges_row[0]] = np.searchsorted(edges_row, edges_row[0], side="right")
+    bins = np.clip(bins - 1, 0, nbins - 1)
+    return bins, edges
+
+def compute_bootstrap_confidence_intervals(
+    statistic: callable,
+    nb_samples: int,
+    nb_resamples: int = 1000,
+    confidence_level: float = 0.95,
+    random_state: int = 42,
+    max_chunk_size: int = 10_000_000,
+    n_jobs: int = 1,
+) -> dict:
+    """
+    Percentile bootstrap of `statistic`, which maps an (n_resamples, nb_samples) matrix of resampled
+    indices to one row of statistics per resample. The index matrix is drawn and evaluated in chunks
+    of at most `max_chunk_size` indices, possibly in parallel, each chunk having its own seed so that
+    the results do not depend on `n_jobs`.
+    """
+    chunk_nb_resamples = max(1, min(nb_resamples, max_chunk_size // max(nb_samples, 1)))
+    chunk_sizes = [
+        min(chunk_nb_resamples, nb_resamples - start)
+        for start in range(0, nb_resamples, chunk_nb_resamples)
+    ]
+    seeds = np.random.SeedSequence(random_state).spawn(len(chunk_sizes))
+    statistic_chunks = Parallel(n_jobs=n_jobs)(
+        delayed(_compute_statistic_on_resamples)(statistic, nb_samples, chunk_size, seed)
+        for chunk_size, seed in zip(chunk_sizes, seeds)
     )
+    statistic_samples = np.concatenate(statistic_chunks, axis=0)
 
-    return binned_df
+    alpha = (1 - confidence_level) / 2
+    return {
+        "low": np.nanquantile(statistic_samples, alpha, axis=0),
+        "high": np.nanquantile(statistic_samples, 1 - alpha, axis=0),
+        "std": np.nanstd(statistic_samples, axis=0),
+    }
 
-def compute_ece_from_binned_df(binned_df: pd.DataFrame) -> float:
-    ece = np.sum(
-        np.abs(
-            (binned_df["y_prob"] - binned_df["y_true"]) * binned_df["count"] / np.sum(binned_df["count"])
-        )
-    )
-    return ece
+def _compute_statistic_on_resamples(
+    statistic: callable, nb_samples: int, nb_resamples: int, seed: np.random.SeedSequence
+) -> np.ndarray:
+    indices = np.random.default_rng(seed).integers(0, nb_samples, size=(nb_resamples, nb_samples))
+    return statistic(indices)
@@ -1,5 +1,5 @@
 import logging
-from os.path import join
+from os.path import join, exists
 import pandas as pd
 import types
 import yaml
@@ -23,11 +23,15 @@ MAIN_REGIONS = ["Korea", "China", "Europe", "North America","Asia-Pacific", "Vie
 ALL_REGIONS = MAIN_REGIONS + ["Other"]
 ROLES = ["Top", "Jungle", "Mid", "Bot", "Support"]
 
+CATEGORICAL_COLUMNS = ["region", "role", "league_name", "series_name", "tournament_name", "team_name"]
+CATEGORY_DICTIONARY_PATH = join(ARTIFACTS_DIR, "data", "preprocessing", "category_dictionary.yaml")
+
 def load_data(
     load_features: bool = False,
     performance_score_path: str = None,
     skill_rating_path: str = None,
-    drop_na: bool = False
+    drop_na: bool = False,
+    categorical: bool = True
 ) -> pd.DataFrame:
     raw_data_folder = join(ARTIFACTS_DIR, "data", "raw")
     game_metadata_df = pd.read_csv(join(raw_data_folder, "game_metadata.csv"), index_col=0)
@@ -50,5 +54,35 @@ def load_data(
     
     if drop_na:
         data = data.dropna()
+
+    if categorical:
+        data = set_categorical_dtypes(data, load_category_dictionary())
     
     return data
+
+def set_categorical_dtypes(data: pd.DataFrame, category_dictionary: dict) -> pd.DataFrame:
+    """
+    Converts the `CATEGORICAL_COLUMNS` of `data` to categoricals with the categories of `category_dictionary`,
+    so that the codes are the same whatever the subset of data loaded. Unknown values are appended as new categories.
+    The other columns are shared with `data`, not copied.
+    """
+    data = data.copy(deep=False)
+    for column in CATEGORICAL_COLUMNS:
+        if column in data.columns:
+            categories = category_dictionary.get(column, [])
+            new_categories = sorted(set(data[column].dropna().unique()).difference(categories))
+            data[column] = pd.Categorical(data[column], categories=[*categories, *new_categories])
+    return data
+
+def create_category_dictionary(data: pd.DataFrame) -> dict:
+    return {
+        column: sorted(data[column].dropna().unique().tolist())
+        for column in CATEGORICAL_COLUMNS
+        if column in data.columns
+    }
+
+def load_category_dictionary(path: str = CATEGORY_DICTIONARY_PATH) -> dict:
+    if not exists(path):
+        return {}
+    with open(path, "r") as file:
+        return yaml.safe_load(file)
@@ -1,4 +1,4 @@
-from pandaskill.experiments.general.metrics import compute_ece_from_binned_df, bin_predictions_equal_size
+from pandaskill.experiments.general.metrics import compute_calibration, get_calibration_binned_df
 from pandaskill.experiments.general.utils import ALL_REGIONS
 import matplotlib.pyplot as plt
 import numpy as np
@@ -15,8 +15,9 @@ def plot_model_calibration(
     saving_folder: str, 
     file_name: str
 ) -> None:
-    binned_df = bin_predictions_equal_size(y_true, y_prob, nbins)
-    ece = compute_ece_from_binned_df(binned_df)
+    calibration = compute_calibration(y_true, y_prob, nbins, binning_method="equal-size")
+    binned_df = get_calibration_binned_df(calibration)
+    ece = calibration["ece"]
 
     fig_title = f"{title}\nECE:{100*ece:0.2f}% - {nbins} bins of size {binned_df.mean()['count']:0.1f}"
     _, ax = plt.subplots(figsize=(12, 8))
@@ -61,6 +62,7 @@ def plot_violin_distributions(
     color_palette = sns.color_palette()
 
     df = df.copy()
+    df[x_column] = df[x_column].astype(object) # plotting order is set below, not by the categories
     
     if x_column == "region":
         region_order_dict = {
@@ -0,0 +1,88 @@
+"""
+Benchmark the training time of the `libsvm` and `liblinear` solvers of PlayerankModel, 
+and check that their feature weights agree within `WEIGHTS_TOLERANCE`.
+"""
+
+from pandaskill.experiments.general.utils import ARTIFACTS_DIR, ROLES, load_data, save_yaml
+from pandaskill.experiments.performance_score.training_testing_cv import _get_role_cv_training_data
+from pandaskill.libs.performance_score.playerank_model import PlayerankModel
+import logging
+import numpy as np
+import os
+from os.path import join
+import time
+
+logging.basicConfig(level=logging.INFO)
+
+WEIGHTS_TOLERANCE = 1e-2
+
+def benchmark_playerank_solvers(
+    X: np.ndarray, 
+    y: np.ndarray, 
+    model_parameters: dict, 
+    solvers: tuple[str, ...] = ("libsvm", "liblinear")
+) -> dict:
+    results = {}
+    for solver in solvers:
+        model = PlayerankModel(solver=solver, **model_parameters)
+        start_time = time.perf_counter()
+        model.fit(X, y)
+        training_time = time.perf_counter() - start_time
+        weights = model.compute_features_importance()
+        results[solver] = {
+            "training_time": float(training_time),
+            "weights": weights,
+        }
+
+    reference_weights = results[solvers[0]]["weights"]
+    for solver in solvers:
+        max_weight_difference = np.max(np.abs(results[solver]["weights"] - reference_weights))
+        results[solver]["max_weight_difference"] = float(max_weight_difference)
+        results[solver]["weights_agree"] = bool(max_weight_difference <= WEIGHTS_TOLERANCE)
+        results[solver]["weights"] = results[solver]["weights"].tolist()
+
+    return results
+
+if __name__ == "__main__":
+    config = {
+        "experiment_name": "playerank_benchmark",
+        "features": [
+            "gold_per_minute",
+            "cs_per_minute",
+            "xp_per_minute",    
+            "damage_dealt_per_total_kills",
+            "damage_dealt_per_total_kills_per_gold",
+            "damage_taken_per_total_kills",
+            "damage_taken_per_total_kills_per_gold",
+            "kla",
+            "largest_multi_kill",
+            "largest_killing_spree_per_total_kills",
+            "wards_placed_per_minute",
+            'objective_contest_loserate',
+            'objective_contest_winrate',
+            "free_kill_ratio",
+            "worthless_death_ratio",
+        ],
+        "parameters": {
+            "C": 0.1, 
+            "kernel": "linear",
+            "max_iter": 50000,
+        },
+    }
+
+    experiment_dir = join(ARTIFACTS_DIR, "experiments", config["experiment_name"])
+    os.makedirs(experiment_dir, exist_ok=True)
+
+    data = load_data(load_features=True, drop_na=True)
+    game_ids = data.index.get_level_values("game_id").unique()
+
+    results = {}
+    for role in ROLES:
+        logging.info(f"Benchmarking PlayeRank solvers for role `{role}`")
+        X, y, _ = _get_role_cv_training_data(data, config["features"], game_ids, role)
+        results[role] = benchmark_playerank_solvers(X, y, config["parameters"])
+        logging.info(
+            ", ".join(f"{solver}: {result['training_time']:.1f}s" for solver, result in results[role].items())
+        )
+
+    save_yaml(results, experiment_dir, "playerank_solvers_benchmark.yaml")
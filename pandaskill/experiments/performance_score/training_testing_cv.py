@@ -4,12 +4,14 @@ from pandaskill.experiments.general.metrics import compute_ece
 from pandaskill.experiments.general.visualization import *
 from pandaskill.libs.performance_score.base_model import BaseModel
 import logging
+from joblib import Parallel, delayed
 import numpy as np
 import os
 from os.path import join
 import pandas as pd
 from sklearn.metrics import accuracy_score, roc_auc_score, f1_score
 from sklearn.model_selection import KFold
+import time
 from typing import Tuple, Optional
 import yaml
 
@@ -24,34 +26,61 @@ def compute_performance_scores_cv_loop(
 ) -> Tuple[pd.DataFrame, dict]:
     train_game_ids, test_game_ids = _compute_game_id_cross_validation(data, training_config["n_splits"], training_config["random_state"])
     metrics_list, performance_scores_list, models_list, features_importance_list, calibration_data = [], [], [], [], []
+    best_iterations_list, timings_list = [], []
     for fold_index, (train_game_ids_fold, test_game_ids_fold) in enumerate(zip(train_game_ids, test_game_ids)):
         roles = ROLES if training_config["one_model_per_role"] else [None]
         metrics_fold, models_fold, feature_importances_fold, calibration_data_fold = {}, {}, {}, {}
+        best_iterations_fold, timings_fold = {}, {}
         for role in roles:
             logging.info(f"Training and evaluating model for role `{role}` and fold `{fold_index}`")
+            timings_fold[role] = {}
             X_train, y_train, _ = _get_role_cv_training_data(data, features, train_game_ids_fold, role)
+            start_time = time.perf_counter()
             model_fold = _train_model(X_train, y_train, Model, model_parameters)
+            timings_fold[role]["training"] = time.perf_counter() - start_time
             models_fold[role] = model_fold
+            if getattr(model_fold, "best_iteration", None) is not None:
+                best_iterations_fold[role] = model_fold.best_iteration
 
             X_test, y_test, index_test = _get_role_cv_training_data(data, features, test_game_ids_fold, role)
+            start_time = time.perf_counter()
             y_prob = model_fold.predict_proba(X_test)[:,1]
             metrics_fold[role] = _evaluate_game_perf_model(y_prob, y_test)
             calibration_data_fold[role] = [y_prob, y_test]
+            timings_fold[role]["evaluation"] = time.perf_counter() - start_time
 
+            start_time = time.perf_counter()
             feature_importances_fold[role] = model_fold.compute_features_importance()            
+            timings_fold[role]["features_importance"] = time.perf_counter() - start_time
 
+            start_time = time.perf_counter()
             performance_scores = model_fold.compute_performance_scores(X_test)
+            timings_fold[role]["performance_scores"] = time.perf_counter() - start_time
             performance_scores_fold_df = pd.DataFrame(data=performance_scores, index=index_test, columns=["performance_score"])
             performance_scores_list.append(performance_scores_fold_df)
 
+            logging.info(
+                "Time spent per step: " 
+                + ", ".join(f"{step} {duration:.2f}s" for step, duration in timings_fold[role].items())
+            )
+
         metrics_list.append(metrics_fold)
         models_list.append(models_fold)
         features_importance_list.append(feature_importances_fold)
         calibration_data.append(calibration_data_fold)
+        best_iterations_list.append(best_iterations_fold)
+        timings_list.append(timings_fold)
 
     if evaluation_config["visualize_shap_values"]:
         _visualize_shap_values(
-            data, features, test_game_ids, evaluation_config["specific_games_analysis"], models_list, roles, experiment_dir
+            data, 
+            features, 
+            test_game_ids, 
+            evaluation_config["specific_games_analysis"], 
+            models_list, 
+            roles, 
+            experiment_dir,
+            evaluation_config.get("shap", {})
         )
 
     plot_all_models_calibration(calibration_data, experiment_dir)
@@ -59,7 +88,8 @@ def compute_performance_scores_cv_loop(
     performance_scores_df = pd.concat(performance_scores_list, axis=0)
     performance_scores_df = performance_scores_df.sort_index()
 
-    evaluation_metrics = _format_evaluation_metrics(metrics_list, features_importance_list, features)
+    evaluation_metrics = _format_evaluation_metrics(metrics_list, features_importance_list, features, best_iterations_list)
+    evaluation_metrics["timings"] = _format_timings(timings_list)
 
     return performance_scores_df, evaluation_metrics
 
@@ -70,73 +100,112 @@ def _visualize_shap_values(
     specific_game_ids: list,
     models_cv: dict, 
     roles: list,
-    experiment_dir: str
+    experiment_dir: str,
+    shap_config: dict
 ) -> None:    
     saving_folder = join(experiment_dir, "shap_values")
+
+    if shap_config.get("use_cache", False) and has_cached_shap_values(roles, saving_folder):
+        logging.info(f"Plotting the SHAP values cached in `{saving_folder}`")
+        visualize_cached_shap_values(experiment_dir, features, roles, specific_game_ids)
+        return
+
+    max_samples_per_role = shap_config.get("max_samples_per_role")
+    max_samples_per_fold = (
+        None if max_samples_per_role is None 
+        else int(np.ceil(max_samples_per_role / len(game_ids_cv)))
+    )
+
+    tasks = [
+        (fold_index, role)
+        for fold_index in range(len(game_ids_cv))
+        for role in roles
+    ]
+    shap_results = Parallel(n_jobs=shap_config.get("n_jobs", 1))(
+        delayed(_compute_shap_values_for_fold_and_role)(
+            _get_role_shap_data(data, game_ids_cv[fold_index], role, specific_game_ids, max_samples_per_fold, shap_config),
+            features, 
+            models_cv[fold_index][role], 
+            shap_config
+        )
+        for fold_index, role in tasks
+    )
+
     shap_values_dict = {}
-    feature_values_dict = {}
-    explainers_dict = {}
-    
     for role in roles:
-        shap_values, feature_values, all_game_ids, explainers = [], [], [], []
-        for game_ids, model_role_dict in zip(game_ids_cv, models_cv):
-            game_data = data[data.index.get_level_values("game_id").isin(game_ids)]
-            if role is not None:
-                game_data = game_data[game_data["role"] == role]
-            X = game_data.loc[:, features]
-            explainer_fold, shap_values_fold = model_role_dict[role].compute_shap_values(X.values)
-            explainers.append(explainer_fold)
-            shap_values.append(shap_values_fold)
-            feature_values.append(X)
-            all_game_ids.extend(game_ids)
-        feature_values_df = pd.concat(feature_values, axis=0)
-        shap_values_array = np.concatenate(shap_values, axis=0)
-        shap_values_dict[role] = shap_values_array
-        feature_values_dict[role] = feature_values_df
-        explainers_dict[role] = explainers
-    
-    file_name = "combined_shap_features_impact.png"
-    plot_multiple_shap_features_impact(
-        shap_values_dict=shap_values_dict,
-        feature_values_dict=feature_values_dict,
-        roles=roles,
-        file_name=file_name,
-        saving_folder=saving_folder,
-        max_display=len(features)
+        shap_values_dict[role] = pd.concat(
+            [shap_result for (_, task_role), shap_result in zip(tasks, shap_results) if task_role == role], 
+            axis=0
+        )
+
+    save_shap_values(shap_values_dict, saving_folder)
+    plot_shap_values(shap_values_dict, features, roles, specific_game_ids, saving_folder)
+
+def _get_role_shap_data(
+    data: pd.DataFrame,
+    game_ids: np.ndarray,
+    role: Optional[str],
+    specific_game_ids: list,
+    max_samples: Optional[int],
+    shap_config: dict
+) -> pd.DataFrame:
+    """Select the rows to explain, at most `max_samples` of them, always including the games of `specific_game_ids`."""
+    game_data = data[data.index.get_level_values("game_id").isin(game_ids)]
+    if role is not None:
+        game_data = game_data[game_data["role"] == role]
+
+    if max_samples is not None and len(game_data) > max_samples:
+        specific_games_mask = game_data.index.get_level_values("game_id").isin(specific_game_ids)
+        nb_other_samples = max(max_samples - int(specific_games_mask.sum()), 0)
+        other_samples = game_data[~specific_games_mask].sample(
+            n=nb_other_samples, random_state=shap_config.get("random_state", 42)
+        )
+        game_data = pd.concat([game_data[specific_games_mask], other_samples], axis=0)
+
+    return game_data
+
+def _compute_shap_values_for_fold_and_role(
+    game_data: pd.DataFrame,
+    features: list,
+    model: BaseModel,
+    shap_config: dict
+) -> pd.DataFrame:
+    """
+    Return a DataFrame indexed by (game_id, player_id) with the feature values, the SHAP values 
+    (columns prefixed by `shap_`), the base value of the explainer and the player name.
+    """
+    X = game_data.loc[:, features]
+    explainer, shap_values = model.compute_shap_values(
+        X.values, 
+        algorithm=shap_config.get("algorithm", "auto"), 
+        max_background_samples=shap_config.get("max_background_samples"),
+        random_state=shap_config.get("random_state", 42)
     )
 
+    shap_values_df = pd.DataFrame(
+        shap_values, index=X.index, columns=[f"shap_{feature}" for feature in features]
+    )
+    shap_result = pd.concat([X, shap_values_df], axis=1)
+    shap_result["base_value"] = float(explainer.expected_value)
+    shap_result["player_name"] = game_data["player_name"]
+    return shap_result
+
+def train_performance_score_models(
+    data: pd.DataFrame, 
+    features: list, 
+    Model: BaseModel,
+    model_parameters: dict, 
+    one_model_per_role: bool
+) -> dict:
+    """Models fitted on all the games, outside of the cross-validation, to score new games."""
+    roles = ROLES if one_model_per_role else [None]
+    game_ids = data.index.get_level_values("game_id").unique()
+    models = {}
     for role in roles:
-        shap_values_role = shap_values_dict[role]
-        shap_values = pd.DataFrame(shap_values_role, index=[game_id for game_id in all_game_ids for _ in range(2)], columns=features)
-        for game_id in specific_game_ids:
-            game_id_fold_index = next(
-                (fold_index for fold_index, game_ids in enumerate(game_ids_cv) if game_id in game_ids),
-                None
-            )
-                        
-            explainer_game = explainers_dict[role][game_id_fold_index]
-            
-            shap_values_game = shap_values.loc[game_id]
-            feature_values_game = feature_values_dict[role].loc[game_id]
-            
-            game_saving_folder = join(saving_folder, f"game_{game_id}")
-            os.makedirs(game_saving_folder, exist_ok=True)
-            
-            for player_index in range(len(shap_values_game)):
-                player_id = feature_values_game.iloc[player_index].name
-                player_name = data.loc[(game_id, player_id), "player_name"]
-                
-                file_name = f"{role}_shap_features_impact_{game_id}_{player_name}.png"
-                
-                plot_shap_game_features_impact(
-                    explainer=explainer_game,
-                    shap_values=shap_values_game.iloc[player_index].values, 
-                    feature_values_df=feature_values_game.iloc[player_index], 
-                    title=f"SHAP values for player {player_name} in game {game_id} with role {role}",
-                    file_name=file_name, 
-                    saving_folder=game_saving_folder
-                )
-            
+        X, y, _ = _get_role_cv_training_data(data, features, game_ids, role)
+        models[role] = _train_model(X, y, Model, model_parameters)
+    return models
+
 def _compute_game_id_cross_validation(
     data: pd.DataFrame,
     n_splits: int,
@@ -196,7 +265,8 @@ def _evaluate_game_perf_model(
 def _format_evaluation_metrics(
     metrics: dict, 
     features_importance_dict: dict, 
-    features: list
+    features: list,
+    best_iterations: Optional[list] = None
 ) -> dict:
     roles = list(metrics[0].keys())
     metrics = {
@@ -234,4 +304,34 @@ def _format_evaluation_metrics(
         "features_importance": features_importance_dict
     }
 
+    if best_iterations and all(best_iterations):
+        evaluation_metrics["best_iteration"] = {
+            "fold_" + str(fold_index): {
+                str(role): int(best_iteration)
+                for role, best_iteration in best_iterations_fold.items()
+            }
+            for fold_index, best_iterations_fold in enumerate(best_iterations)
+        }
+
     return evaluation_metrics
+
+
+def _format_timings(timings: list) -> dict:
+    roles = list(timings[0].keys())
+    steps = list(timings[0][roles[0]].keys())
+    timings = {
+        step: {
+            str(role): {
+                "cv": (value_list := [float(timings_fold[role][step]) for timings_fold in timings]),
+                "mean": float(np.mean(value_list)),
+                "total": float(np.sum(value_list))
+            }
+            for role in roles
+        }
+        for step in steps
+    }
+    for step in steps:
+        timings[step]["overall"] = {
+            "total": float(sum(timings[step][str(role)]["total"] for role in roles))
+        }
+    return timings
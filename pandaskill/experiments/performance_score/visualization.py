@@ -1,5 +1,6 @@
 from pandaskill.experiments.performance_score.shap_beeswarm import beeswarm
 from pandaskill.experiments.general.visualization import plot_violin_distributions
+import logging
 import os
 from os.path import join
 import matplotlib
@@ -9,6 +10,7 @@ import numpy as np
 import pandas as pd
 import shap
 from sklearn.calibration import calibration_curve
+from typing import Optional
 
 def visualize_performance_scores(
     data: pd.DataFrame,
@@ -114,7 +116,7 @@ feature_str_dict = {
 }
 
 def plot_shap_game_features_impact(
-    explainer: shap.Explainer,
+    base_value: float,
     shap_values: np.ndarray,
     feature_values_df: pd.DataFrame,
     title: str,
@@ -125,7 +127,7 @@ def plot_shap_game_features_impact(
     feature_values_df = feature_values_df.rename(index=feature_str_dict)
     explanation = shap.Explanation(
         values=shap_values,
-        base_values=explainer.expected_value,
+        base_values=base_value,
         data=feature_values_df.round(2),
         feature_names=feature_values_df.index
     )
@@ -206,3 +208,90 @@ def plot_multiple_shap_features_impact(
     plt.savefig(os.path.join(saving_folder, file_name), bbox_inches='tight')
     plt.savefig(os.path.join(saving_folder, file_name[:-4] + ".pdf"), bbox_inches='tight')
     plt.close()
+
+def plot_shap_values(
+    shap_values_dict: dict[Optional[str], pd.DataFrame],
+    features: list,
+    roles: list,
+    specific_game_ids: list,
+    saving_folder: str
+) -> None:
+    """
+    Plot the SHAP values of all roles in a single beeswarm figure, and a waterfall plot for each 
+    player of `specific_game_ids`. `shap_values_dict` maps each role to a DataFrame indexed by 
+    (game_id, player_id), with the feature values, the SHAP values (columns prefixed by `shap_`), 
+    the base value and the player name.
+    """
+    shap_columns = [f"shap_{feature}" for feature in features]
+
+    plot_multiple_shap_features_impact(
+        shap_values_dict={role: shap_values_dict[role].loc[:, shap_columns].values for role in roles},
+        feature_values_dict={role: shap_values_dict[role].loc[:, features] for role in roles},
+        roles=roles,
+        file_name="combined_shap_features_impact.png",
+        saving_folder=saving_folder,
+        max_display=len(features)
+    )
+
+    for role in roles:
+        role_shap_values_df = shap_values_dict[role]
+        explained_game_ids = role_shap_values_df.index.get_level_values("game_id")
+        for game_id in specific_game_ids:
+            if game_id not in explained_game_ids:
+                logging.warning(f"No SHAP values for game `{game_id}` and role `{role}`")
+                continue
+            
+            game_saving_folder = join(saving_folder, f"game_{game_id}")
+            os.makedirs(game_saving_folder, exist_ok=True)
+
+            for _, player_row in role_shap_values_df.loc[game_id].iterrows():
+                player_name = player_row["player_name"]
+                plot_shap_game_features_impact(
+                    base_value=float(player_row["base_value"]),
+                    shap_values=player_row[shap_columns].values.astype(float), 
+                    feature_values_df=player_row[features].astype(float), 
+                    title=f"SHAP values for player {player_name} in game {game_id} with role {role}",
+                    file_name=f"{role}_shap_features_impact_{game_id}_{player_name}.png", 
+                    saving_folder=game_saving_folder
+                )
+
+def save_shap_values(
+    shap_values_dict: dict[Optional[str], pd.DataFrame],
+    saving_folder: str
+) -> None:
+    cache_folder = join(saving_folder, "cache")
+    os.makedirs(cache_folder, exist_ok=True)
+    for role, shap_values_df in shap_values_dict.items():
+        role_str = role if role else "All"
+        shap_values_df.to_parquet(join(cache_folder, f"{role_str}_shap_values.parquet"))
+
+def has_cached_shap_values(
+    roles: list,
+    saving_folder: str
+) -> bool:
+    cache_folder = join(saving_folder, "cache")
+    return all(
+        os.path.exists(join(cache_folder, f"{role if role else 'All'}_shap_values.parquet")) for role in roles
+    )
+
+def load_shap_values(
+    roles: list,
+    saving_folder: str
+) -> dict[Optional[str], pd.DataFrame]:
+    cache_folder = join(saving_folder, "cache")
+    shap_values_dict = {}
+    for role in roles:
+        role_str = role if role else "All"
+        shap_values_dict[role] = pd.read_parquet(join(cache_folder, f"{role_str}_shap_values.parquet"))
+    return shap_values_dict
+
+def visualize_cached_shap_values(
+    experiment_dir: str,
+    features: list,
+    roles: list,
+    specific_game_ids: list
+) -> None:
+    """Regenerate the SHAP plots of an experiment from the SHAP values saved on disk, without recomputing them."""
+    saving_folder = join(experiment_dir, "shap_values")
+    shap_values_dict = load_shap_values(roles, saving_folder)
+    plot_shap_values(shap_values_dict, features, roles, specific_game_ids, saving_folder)
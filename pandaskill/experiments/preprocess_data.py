@@ -30,6 +30,8 @@ def preprocess_raw_data() -> None:
     stat_df = compute_features(stat_df, event_df)
     feature_columns = stat_df.columns.difference(initial_columns)
     stat_df.loc[:, feature_columns].to_csv(join(data_dir, "preprocessing", "game_features.csv"))
+    category_dictionary = create_category_dictionary(stat_df)
+    save_yaml(category_dictionary, join(data_dir, "preprocessing"), "category_dictionary.yaml")
 
 if __name__ == "__main__":
     preprocess_raw_data()
@@ -1,9 +1,10 @@
 from pandaskill.experiments.performance_score.visualization import visualize_performance_scores
-from pandaskill.experiments.performance_score.training_testing_cv import compute_performance_scores_cv_loop
+from pandaskill.experiments.performance_score.training_testing_cv import compute_performance_scores_cv_loop, train_performance_score_models
 from pandaskill.experiments.general.utils import ARTIFACTS_DIR, load_data
 from pandaskill.libs.performance_score.playerank_model import PlayerankModel
 from pandaskill.libs.performance_score.pscore_model import PScoreModel
 from pandaskill.libs.performance_score.perf_index_model import PerformanceIndexModel
+import joblib
 import logging
 import os
 from os.path import join
@@ -28,12 +29,32 @@ playerank_model_config = {
         "max_iter": 50000,
     }
 }
+playerank_liblinear_model_config = {
+    "name": "playerank",
+    "parameters": {
+        **playerank_model_config["parameters"],
+        "solver": "liblinear",
+        "calibrate": True,
+    }
+}
 performance_index_model_config = {
     "name": "perf_index",
     "parameters": {
         "n_estimators": 500,
     }
 }
+performance_index_fast_model_config = {
+    "name": "perf_index",
+    "parameters": {
+        **performance_index_model_config["parameters"],
+        "n_jobs": -1,
+        "importance_method": "permutation",
+        "permutation_max_samples": 10000,
+        "permutation_holdout_fraction": 0.2,
+        "permutation_n_jobs": -1,
+        "permutation_random_state": 42,
+    }
+}
 pscore_model_config = {
     "name": "pscore",
     "parameters": {
@@ -42,6 +63,17 @@ pscore_model_config = {
         "monotone_constraints": [1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, -1, 1, 1, -1],
     }
 }
+pscore_early_stopping_model_config = {
+    "name": "pscore",
+    "parameters": {
+        **pscore_model_config["parameters"],
+        "tree_method": "hist",
+        "max_bin": 256,
+        "n_jobs": -1,
+        "validation_fraction": 0.1,
+        "early_stopping_rounds": 100,
+    }
+}
 
 
 if __name__ == "__main__":
@@ -69,9 +101,18 @@ if __name__ == "__main__":
             "n_splits": 5,
             "random_state": 42,
             "one_model_per_role": True,
+            "save_models": False, # refit on all the games and save the models, e.g. for live ingestion
         },
         "visualization": {
             "visualize_shap_values": False, # activating this will significantly slow down the computation
+            "shap": {
+                "algorithm": "auto", # shap picks the explainer, i.e. TreeSHAP for the pscore and perf_index models
+                "use_cache": False, # plot the SHAP values saved by a previous run of the experiment instead of recomputing them
+                "max_background_samples": 100,
+                "max_samples_per_role": None, # row budget per role, None to explain all test rows
+                "n_jobs": 1, # parallelism across (fold, role)
+                "random_state": 42,
+            },
             "specific_games_analysis": [
                 36348, # close game - LCK 2024
             ]
@@ -106,3 +147,14 @@ if __name__ == "__main__":
     performance_scores_df.to_csv(join(experiment_dir, "performance_scores.csv"))
     with open(join(experiment_dir, f"performance_scores_metrics.yaml"), "w") as file:
         yaml.dump(metrics, file, default_flow_style=False)
+
+    if config["training"].get("save_models", False):
+        logging.info(f"Training and saving models on all games to `{experiment_dir}`")
+        models = train_performance_score_models(
+            data,
+            config["features"], 
+            _get_model_class_from_name(config["model"]["name"]),
+            config["model"]["parameters"], 
+            config["training"]["one_model_per_role"]
+        )
+        joblib.dump({"features": config["features"], "models": models}, join(experiment_dir, "models.joblib"))
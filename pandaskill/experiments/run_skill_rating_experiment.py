@@ -74,6 +74,22 @@ ewma_config = {
     }
 }
 
+def run_skill_rating_experiment(data: pd.DataFrame, config: dict, experiment_dir: str) -> None:
+    logging.info(f"Computing skill ratings using method `{config['method']['name']}`")
+    method = get_method_from_method_name(config["method"]["name"])
+    skill_ratings = compute_skill_ratings(data, method, config["method"]["parameters"])
+    save_ratings(skill_ratings, experiment_dir)
+
+    logging.info(f"Evaluating skill ratings")
+    data_with_ratings = data.join(skill_ratings)
+    evaluate_skill_ratings(data_with_ratings, experiment_dir, config["evaluation"])
+    if config.get("visualization") is not None:
+        visualize_ratings(data_with_ratings, experiment_dir, config["visualization"])
+    
+    logging.info(f"Creating and evaluating player rankings")
+    ranking = create_rankings(data_with_ratings, experiment_dir, config["ranking"])
+    evaluate_ranking(ranking, experiment_dir, config["evaluation"].get("bootstrap"))
+
 if __name__ == "__main__":    
     config = {
         "experiment": "meta_ffa_openskill",
@@ -82,7 +98,15 @@ if __name__ == "__main__":
         "evaluation": {
             "start_warmup_date": "2019-09-15",
             "end_warmup_date": "2020-09-15",
-            "C": 1.0
+            "C": 1.0,
+            "warm_start": True, # warm-start each monthly window from the previous one
+            "n_jobs": 1, # fit the windows independently in parallel if != 1
+            "bootstrap": { # confidence intervals of the forecast and survey metrics, None to skip
+                "nb_resamples": 1000,
+                "confidence_level": 0.95,
+                "random_state": 42,
+                "n_jobs": 1,
+            },
         },
         "visualization": {
             "min_nb_games": 20,
@@ -110,18 +134,6 @@ if __name__ == "__main__":
         drop_na=True
     )
 
-    logging.info(f"Computing skill ratings using method `{config["method"]["name"]}`")
-    method = get_method_from_method_name(config["method"]["name"])
-    skill_ratings = compute_skill_ratings(data, method, config["method"]["parameters"])
-    save_ratings(skill_ratings, experiment_dir)
-
-    logging.info(f"Evaluating skill ratings")
-    data_with_ratings = data.join(skill_ratings)
-    evaluate_skill_ratings(data_with_ratings, experiment_dir, config["evaluation"])
-    visualize_ratings(data_with_ratings, experiment_dir, config["visualization"])
-    
-    logging.info(f"Creating and evaluating player rankings")
-    ranking = create_rankings(data_with_ratings, experiment_dir, config["ranking"])
-    evaluate_ranking(ranking, experiment_dir)
+    run_skill_rating_experiment(data, config, experiment_dir)
 
     logging.info(f"skill rating experiment `{config['experiment']}` finished")
\ No newline at end of file
@@ -0,0 +1,126 @@
+from pandaskill.experiments.general.utils import ARTIFACTS_DIR, load_data, save_yaml
+from pandaskill.experiments.run_skill_rating_experiment import (
+    run_skill_rating_experiment, openskill_config, ffa_openskill_config, meta_openskill_config,
+    meta_ffa_openskill_config, meta_ffa_trueskill_config, ewma_config
+)
+import logging
+import multiprocessing as mp
+import os
+from os.path import join
+import pandas as pd
+import yaml
+
+RANKING_KINDS = ["global", "europe", "north_america", "china", "korea"]
+
+# set in the parent process before the pool is forked, workers only read it
+_sweep_data = None
+
+def create_sweep_configs(method_configs: dict, ewma_alphas: list[float]) -> dict:
+    sweep_configs = dict(method_configs)
+    for alpha in ewma_alphas:
+        sweep_configs[f"ewma_alpha_{alpha}"] = {
+            **ewma_config,
+            "parameters": {**ewma_config["parameters"], "alpha": alpha},
+        }
+    return sweep_configs
+
+def run_skill_rating_sweep(data: pd.DataFrame, sweep_configs: dict, sweep_config: dict, sweep_dir: str) -> pd.DataFrame:
+    global _sweep_data
+    _sweep_data = data
+    tasks = [
+        (name, method_config, sweep_config, join(sweep_dir, name))
+        for name, method_config in sweep_configs.items()
+    ]
+    n_workers = min(sweep_config.get("n_workers") or mp.cpu_count(), len(tasks))
+    try:
+        if n_workers == 1:
+            rows = [_run_sweep_task(task) for task in tasks]
+        else:
+            with mp.get_context("fork").Pool(n_workers) as pool:
+                rows = pool.map(_run_sweep_task, tasks, chunksize=1)
+    finally:
+        _sweep_data = None
+
+    comparison_df = pd.DataFrame(rows).set_index("experiment").sort_values(by="accuracy", ascending=False)
+    comparison_df.to_csv(join(sweep_dir, "sweep_comparison.csv"))
+    return comparison_df
+
+def _run_sweep_task(task: tuple[str, dict, dict, str]) -> dict:
+    name, method_config, sweep_config, experiment_dir = task
+    config = {
+        "experiment": name,
+        "method": method_config,
+        "evaluation": {**sweep_config["evaluation"], "n_jobs": 1},
+        "visualization": sweep_config.get("visualization"),
+        "ranking": sweep_config["ranking"],
+    }
+    os.makedirs(experiment_dir, exist_ok=True)
+    save_yaml(config, experiment_dir, "config.yaml")
+    run_skill_rating_experiment(_sweep_data, config, experiment_dir)
+    return _collect_sweep_metrics(name, method_config, experiment_dir)
+
+def _collect_sweep_metrics(name: str, method_config: dict, experiment_dir: str) -> dict:
+    with open(join(experiment_dir, "skill_ratings_metrics.yaml")) as file:
+        skill_ratings_metrics = yaml.safe_load(file)
+    with open(join(experiment_dir, "ranking_experts_evaluation.yaml")) as file:
+        ranking_metrics = yaml.safe_load(file)
+
+    row = {
+        "experiment": name,
+        "method": method_config["name"],
+        **{f"param_{key}": value for key, value in method_config["parameters"].items()},
+        "accuracy": skill_ratings_metrics["accuracy"],
+        "ece": skill_ratings_metrics["ece"],
+    }
+    for ranking_kind in RANKING_KINDS:
+        row[f"{ranking_kind}_majority_concordance"] = ranking_metrics[ranking_kind]["majority_concordance"]
+    return row
+
+
+if __name__ == "__main__":
+    config = {
+        "sweep": "sweep",
+        "performance_score_experiment": "pscore",
+        "methods": {
+            "openskill": openskill_config,
+            "ffa_openskill": ffa_openskill_config,
+            "meta_openskill": meta_openskill_config,
+            "meta_ffa_openskill": meta_ffa_openskill_config,
+            "meta_ffa_trueskill": meta_ffa_trueskill_config,
+        },
+        "ewma_alphas": [0.01, 0.02, 0.05, 0.1, 0.2],
+        "n_workers": None, # one process per config up to the number of cpus
+        "evaluation": {
+            "start_warmup_date": "2019-09-15",
+            "end_warmup_date": "2020-09-15",
+            "C": 1.0,
+            "warm_start": True,
+        },
+        "visualization": None, # per-config plots are skipped in a sweep
+        "ranking":{
+            "min_nb_games": 10,
+            "since": "2024-03-15",
+            "date": "2024-09-15"
+        }
+    }
+    logging.info(f"Starting skill rating sweep `{config['sweep']}`")
+
+    sweep_dir = join(
+        ARTIFACTS_DIR, "experiments", config["performance_score_experiment"],
+        "skill_rating", config["sweep"]
+    )
+    os.makedirs(sweep_dir, exist_ok=True)
+    save_yaml(config, sweep_dir, "config.yaml")
+
+    logging.info(f"Loading data once for all the configurations")
+    data = load_data(
+        load_features=True,
+        performance_score_path=join(ARTIFACTS_DIR, "experiments", config["performance_score_experiment"], "performance_score", "performance_scores.csv"),
+        drop_na=True
+    )
+
+    sweep_configs = create_sweep_configs(config["methods"], config["ewma_alphas"])
+    comparison_df = run_skill_rating_sweep(data, sweep_configs, config, sweep_dir)
+    logging.info(f"Sweep comparison:\n{comparison_df.to_string()}")
+
+    logging.info(f"skill rating sweep `{config['sweep']}` finished")
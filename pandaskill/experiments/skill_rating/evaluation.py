@@ -1,16 +1,17 @@
 from dateutil.relativedelta import relativedelta
 from datetime import datetime
+from functools import partial
 import logging
 from pandaskill.experiments.general.metrics import *
 from pandaskill.experiments.general.utils import *
 from pandaskill.experiments.general.visualization import plot_model_calibration
 import itertools
+from joblib import Parallel, delayed
 import numpy as np
 import pandas as pd
 from progressbar.progressbar import ProgressBar
 from scipy import stats
 from sklearn.linear_model import LogisticRegression
-from sklearn.preprocessing import StandardScaler
 
 def evaluate_skill_ratings(
     data_with_ratings: pd.DataFrame, 
@@ -67,6 +68,8 @@ def evaluate_skill_ratings(
         "region_change_metrics": region_change_metrics,
         "role_ratings_distributions_metrics": role_ratings_distribution_metric
     }    
+    if evaluation_config.get("bootstrap") is not None:
+        metrics["bootstrap"] = _compute_bootstrap_metrics(y_test_list, y_prob_list, evaluation_config["bootstrap"])
 
     plot_model_calibration(
         y_test_list, 
@@ -82,80 +85,147 @@ def evaluate_skill_ratings(
 def _rolling_forecast_game_outcome(
     data_with_ratings: pd.DataFrame, evaluation_config: dict
 ) -> tuple[list[int], list[int], list[float], list[float], list[datetime]]:
+    """
+    Forecast game outcomes month by month, with a logistic regression trained on the games of the 
+    previous year. Window bounds are found by binary search on the sorted game dates, and the 
+    standardization statistics of each window come from prefix sums over the games. 
+    
+    By default, windows are fitted sequentially, each one warm-started from the coefficients of 
+    the previous one (`warm_start`). Setting `n_jobs` fits the windows independently in parallel.
+    """
     game_eval_df = _format_data_for_rolling_game_forecast(data_with_ratings, evaluation_config)
 
+    game_ids = game_eval_df.index.values
+    game_dates = game_eval_df['date'].values
+    X = game_eval_df.drop('date', axis=1).values
+    # mirror team sides and outcomes (assuming blue/red side balance)
+    X_mirrored = np.concatenate([X[:, 5:], X[:, :5]], axis=1)
+    game_sides_statistics = _compute_game_sides_prefix_sums(X, X_mirrored)
+
     last_date = game_eval_df['date'].max()
     start_testing_date = datetime.strptime(evaluation_config["end_warmup_date"], "%Y-%m-%d") + relativedelta(years=1)
     window_size = relativedelta(months=1)
     rolling_window_date_range = pd.date_range(start=start_testing_date, end=last_date, freq='MS')
 
-    game_id_test_list = []
-    y_test_list = []
-    y_prob_list = []
-    coefs_list = []
-    start_test_date_list = []    
-
-    for start_test_date in ProgressBar()(rolling_window_date_range):
+    windows = []
+    for start_test_date in rolling_window_date_range:
         end_test_date = start_test_date + window_size
         start_training_date = start_test_date - relativedelta(years=1)
+        train_slice = _get_date_slice(game_dates, start_training_date, start_test_date)
+        test_slice = _get_date_slice(game_dates, start_test_date, end_test_date)
         
-        train_data = game_eval_df[(game_eval_df['date'] >= start_training_date) & (game_eval_df['date'] < start_test_date)]
-        test_data = game_eval_df[(game_eval_df['date'] >= start_test_date) & (game_eval_df['date'] < end_test_date)]
-        
-        if len(train_data) == 0 or len(test_data) == 0:
+        if train_slice.start == train_slice.stop or test_slice.start == test_slice.stop:
             logging.warning(f"Skipping {start_test_date} due to lack of data")
             continue
-        
-        X_train = train_data.drop('date', axis=1).values
-        X_test = test_data.drop('date', axis=1).values
-        
-        # mirror team sides and outcomes (assuming blue/red side balance)
-        y_train = [0] * len(X_train) + [1] * len(X_train)
-        y_test = [0] * len(X_test) + [1] * len(X_test)    
-        X_train = np.concatenate([X_train, np.concatenate([X_train[:,5:], X_train[:, :5]], axis=1)], axis=0)
-        X_test = np.concatenate([X_test, np.concatenate([X_test[:,5:], X_test[:, :5]], axis=1)], axis=0)
-        game_id_test = np.concatenate([test_data.index.values, test_data.index.values], axis=0)
-        
-        scaler = StandardScaler()
-        X_train_scaled = scaler.fit_transform(X_train)
-        X_test_scaled = scaler.transform(X_test)
-        
-        model = LogisticRegression(C=evaluation_config["C"]).fit(X_train_scaled, y_train)
-        y_prob = model.predict_proba(X_test_scaled)[:, 1]
+        windows.append((start_test_date, train_slice, test_slice))
+
+    n_jobs = evaluation_config.get("n_jobs", 1)
+    if n_jobs == 1:
+        window_results = []
+        model = LogisticRegression(C=evaluation_config["C"], warm_start=evaluation_config.get("warm_start", True))
+        for _, train_slice, test_slice in ProgressBar(maxval=len(windows))(windows):
+            window_results.append(_fit_and_forecast_window(
+                model, X, X_mirrored, game_sides_statistics, train_slice, test_slice
+            ))
+    else:
+        window_results = Parallel(n_jobs=n_jobs)(
+            delayed(_fit_and_forecast_window)(
+                LogisticRegression(C=evaluation_config["C"]), X, X_mirrored, game_sides_statistics, train_slice, test_slice
+            )
+            for _, train_slice, test_slice in windows
+        )
 
-        game_id_test_list.extend(game_id_test)
-        y_test_list.extend(y_test)
+    game_id_test_list = []
+    y_test_list = []
+    y_prob_list = []
+    coefs_list = []
+    start_test_date_list = []    
+
+    for (start_test_date, _, test_slice), (y_prob, coefs) in zip(windows, window_results):
+        nb_test_games = test_slice.stop - test_slice.start
+        game_id_test_list.extend(np.concatenate([game_ids[test_slice], game_ids[test_slice]], axis=0))
+        y_test_list.extend([0] * nb_test_games + [1] * nb_test_games)
         y_prob_list.extend(y_prob)
-        coefs_list.append(model.coef_[0])
+        coefs_list.append(coefs)
         start_test_date_list.append(start_test_date)
 
     return game_id_test_list, y_test_list, y_prob_list, coefs_list, start_test_date_list
-    
+
+def _get_date_slice(sorted_dates: np.ndarray, start_date: datetime, end_date: datetime) -> slice:
+    """Slice of the rows with `start_date <= date < end_date`."""
+    start_index, end_index = np.searchsorted(
+        sorted_dates, np.array([start_date, end_date], dtype=sorted_dates.dtype), side="left"
+    )
+    return slice(int(start_index), int(end_index))
+
+def _compute_game_sides_prefix_sums(X: np.ndarray, X_mirrored: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """Prefix sums over the games of the features and squared features of both game sides."""
+    zeros = np.zeros((1, X.shape[1]))
+    prefix_sums = np.concatenate([zeros, np.cumsum(X + X_mirrored, axis=0)], axis=0)
+    prefix_sums_of_squares = np.concatenate([zeros, np.cumsum(X ** 2 + X_mirrored ** 2, axis=0)], axis=0)
+    return prefix_sums, prefix_sums_of_squares
+
+def _fit_and_forecast_window(
+    model: LogisticRegression,
+    X: np.ndarray,
+    X_mirrored: np.ndarray,
+    game_sides_statistics: tuple[np.ndarray, np.ndarray],
+    train_slice: slice,
+    test_slice: slice
+) -> tuple[np.ndarray, np.ndarray]:
+    prefix_sums, prefix_sums_of_squares = game_sides_statistics
+    nb_train_rows = 2 * (train_slice.stop - train_slice.start)
+    mean = (prefix_sums[train_slice.stop] - prefix_sums[train_slice.start]) / nb_train_rows
+    variance = (prefix_sums_of_squares[train_slice.stop] - prefix_sums_of_squares[train_slice.start]) / nb_train_rows - mean ** 2
+    scale = np.sqrt(np.maximum(variance, 0))
+    scale[scale < 10 * np.finfo(scale.dtype).eps] = 1.0 # same handling of constant features as StandardScaler
+
+    X_train_scaled = (np.concatenate([X[train_slice], X_mirrored[train_slice]], axis=0) - mean) / scale
+    X_test_scaled = (np.concatenate([X[test_slice], X_mirrored[test_slice]], axis=0) - mean) / scale
+    nb_train_games = train_slice.stop - train_slice.start
+    y_train = [0] * nb_train_games + [1] * nb_train_games
+
+    model.fit(X_train_scaled, y_train)
+    y_prob = model.predict_proba(X_test_scaled)[:, 1]
+
+    return y_prob, model.coef_[0].copy()
+
 def _format_data_for_rolling_game_forecast(
     data_with_ratings: pd.DataFrame, evaluation_config: dict
 ) -> pd.DataFrame:
+    """
+    Return one row per game, indexed by game_id and sorted by date, with the date and the skill 
+    ratings before the game of the 10 players, losing team first, ordered by role within each team.
+    """
     role_per_team_columns = [f"{role}_{team}" for team in [0, 1] for role in ROLES]
-
-    def compute_data_for_game(game):
-        game = game.sort_values(["win", "role_order"])
-        return pd.DataFrame(data=[[
-            game.date.values[0],
-            *game.skill_rating_before.values,
-        ]], columns=["date", *role_per_team_columns])
+    nb_players_per_game = len(role_per_team_columns)
 
     end_warmup_date = evaluation_config["end_warmup_date"]
+    eval_df = data_with_ratings[data_with_ratings.date > end_warmup_date]
 
-    eval_df = data_with_ratings.copy()
-    eval_df = eval_df[eval_df.date > end_warmup_date]
-
-    eval_df.loc[:, "role_order"] = eval_df.role.map({
+    game_ids = eval_df.index.get_level_values("game_id").values
+    role_order = eval_df.role.map({
         role: i
         for i, role in enumerate(ROLES)
-    })
+    }).values
+    sorting_index = np.lexsort((role_order, eval_df.win.values, game_ids)) # stable, game_id is the primary key
+
+    sorted_game_ids = game_ids[sorting_index]
+    if len(sorted_game_ids) % nb_players_per_game != 0:
+        raise ValueError(f"Every game should have exactly {nb_players_per_game} players")
+    sorted_game_ids = sorted_game_ids.reshape(-1, nb_players_per_game)
+    if not (sorted_game_ids == sorted_game_ids[:, [0]]).all():
+        raise ValueError(f"Every game should have exactly {nb_players_per_game} players")
 
-    game_eval_df = eval_df.groupby("game_id").apply(compute_data_for_game)
-    game_eval_df = game_eval_df.reset_index(level=1, drop=True)
-    game_eval_df['date'] = pd.to_datetime(game_eval_df['date'])
+    skill_ratings_before = eval_df.skill_rating_before.values[sorting_index].reshape(-1, nb_players_per_game)
+    game_dates = eval_df.date.values[sorting_index][::nb_players_per_game]
+
+    game_eval_df = pd.DataFrame(
+        data=skill_ratings_before, 
+        index=pd.Index(sorted_game_ids[:, 0], name="game_id"), 
+        columns=role_per_team_columns
+    )
+    game_eval_df.insert(0, "date", pd.to_datetime(game_dates))
     game_eval_df = game_eval_df.sort_values('date')
 
     return game_eval_df
@@ -178,7 +248,7 @@ def _compute_intra_inter_region_metrics(
     region_agg_games_df = data_with_ratings.groupby("game_id").agg({"region": region_agg_rule})
     region_agg_game_ids = region_agg_games_df[region_agg_games_df.values].index.values
     region_agg_game_ids_test_list_index = np.where(np.isin(game_id_test_list, region_agg_game_ids))[0]
-    nb_region_agg_games_per_series = data_with_ratings.loc[region_agg_games_df[region_agg_games_df.values].index].series_name.value_counts() // 10
+    nb_region_agg_games_per_series = data_with_ratings.loc[region_agg_games_df[region_agg_games_df.values].index].series_name.astype(object).value_counts() // 10
     
     y_test_list_region_agg = np.array(y_test_list)[region_agg_game_ids_test_list_index]
     y_prob_list_region_agg = np.array(y_prob_list)[region_agg_game_ids_test_list_index]
@@ -235,6 +305,23 @@ def _compute_metrics(y_test_list: list[int], y_prob_list: list[float]) -> dict:
 
     return metrics 
 
+def _compute_bootstrap_metrics(y_test_list: list[int], y_prob_list: list[float], bootstrap_config: dict) -> dict:
+    confidence_intervals = compute_bootstrap_confidence_intervals(
+        partial(_compute_metrics_for_resamples, y_test=np.array(y_test_list), y_prob=np.array(y_prob_list)),
+        len(y_test_list),
+        **bootstrap_config
+    )
+    return {
+        metric_name: {bound: float(values[i]) for bound, values in confidence_intervals.items()}
+        for i, metric_name in enumerate(["accuracy", "ece"])
+    }
+
+def _compute_metrics_for_resamples(indices: np.ndarray, y_test: np.ndarray, y_prob: np.ndarray) -> np.ndarray:
+    y_test, y_prob = y_test[indices], y_prob[indices]
+    accuracy = ((y_prob > 0.5) == y_test).mean(axis=1)
+    ece = compute_ece(y_test, y_prob, 25)
+    return np.stack([accuracy, ece], axis=1)
+
 def _compute_role_ratings_distribution_metrics(data_with_ratings: pd.DataFrame) -> dict:
     role_pairs = list(itertools.combinations(ROLES, 2))
     wasserstein_disance_list = []
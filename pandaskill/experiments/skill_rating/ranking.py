@@ -2,11 +2,13 @@ from pandaskill.experiments.general.metrics import *
 from pandaskill.experiments.general.utils import ROLES, ALL_REGIONS, ARTIFACTS_DIR, save_yaml
 from pandaskill.experiments.general.visualization import plot_model_calibration
 from pandaskill.libs.skill_rating.bayesian import lower_bound_rating
+from pandaskill.libs.skill_rating.matchup import compute_win_probabilities
+from pandaskill.libs.skill_rating.rating_history import RatingHistory
+from functools import partial
 import os
 from os.path import join
 import pandas as pd
 import numpy as np
-from scipy.stats import norm
 
 def create_rankings(
     data_with_ratings: pd.DataFrame, 
@@ -34,20 +36,16 @@ def create_rankings(
 
 def create_global_player_ranking(
     data_with_ratings: pd.DataFrame, 
-    parameters: dict
+    parameters: dict,
+    rating_history: RatingHistory = None
 ) -> pd.DataFrame:
-    data_with_ratings = data_with_ratings[
-        (data_with_ratings.date <= parameters["date"]) & (data_with_ratings.date > parameters["since"])
-    ]
+    """`rating_history` can be given to reuse the one built on `data_with_ratings` across rankings."""
+    if rating_history is None:
+        rating_history = RatingHistory(data_with_ratings)
 
-    most_played_recent_league_by_player = data_with_ratings.groupby("player_id")["league_name"].agg(
-        lambda x: x.mode()[0]
-    )
-
-    ranking = data_with_ratings.groupby("player_id").last()
-    nb_games_per_player = data_with_ratings.groupby("player_id").count()["date"]
-    ranking["nb_games"] = nb_games_per_player
-    ranking["league_name"] = most_played_recent_league_by_player
+    ranking = rating_history.get_ratings_as_of(parameters["date"], since=parameters["since"])
+    recent_games = rating_history.get_games_between(parameters["since"], parameters["date"])
+    ranking["league_name"] = _get_most_played_league(recent_games)
 
     if "meta_rating_after" in ranking.columns:
         ranking = _update_meta_ratings_with_latest_known_values(ranking)
@@ -81,9 +79,19 @@ def create_global_player_ranking(
 
     return ranking
 
+def _get_most_played_league(games: pd.DataFrame) -> pd.Series:
+    # first league in sorted order among the most played ones, as `mode()[0]`
+    nb_games_per_league = games.groupby(["player_id", "league_name"], observed=True).size()
+    most_played_league_index = nb_games_per_league.groupby(level="player_id").idxmax()
+    return pd.Series(
+        [league_name for _, league_name in most_played_league_index], 
+        index=most_played_league_index.index, 
+        dtype=games["league_name"].dtype
+    )
+
 def _update_meta_ratings_with_latest_known_values(ranking: pd.DataFrame) -> pd.DataFrame:
     ranking = ranking.copy()
-    last_meta_games = ranking.sort_values("date").groupby("region").last()
+    last_meta_games = ranking.sort_values("date").groupby("region", observed=True).last()
     last_meta_ratings_mu = last_meta_games["meta_rating_after_mu"].to_dict()
     last_meta_ratings_sigma = last_meta_games["meta_rating_after_sigma"].to_dict()
 
@@ -137,7 +145,7 @@ def _save_region_average_ranking(
     ranking: pd.DataFrame, 
     saving_dir: str
 ) -> None:
-    region_average_ranking = ranking.groupby("region")["skill_rating"].mean().reset_index()
+    region_average_ranking = ranking.groupby("region", observed=True)["skill_rating"].mean().reset_index()
     region_average_ranking = region_average_ranking.sort_values("skill_rating", ascending=False)
     region_average_ranking["rank"] = region_average_ranking.index + 1
     region_average_ranking = region_average_ranking.loc[:, ["rank", "region", "skill_rating"]]
@@ -148,8 +156,8 @@ def _save_region_top_ranking(
     top: int, 
     saving_dir: str
 ) -> None:
-    region_top10_ranking = ranking.groupby("region").head(top).reset_index()
-    region_top10_ranking = region_top10_ranking.groupby("region")["skill_rating"].mean().reset_index()
+    region_top10_ranking = ranking.groupby("region", observed=True).head(top).reset_index()
+    region_top10_ranking = region_top10_ranking.groupby("region", observed=True)["skill_rating"].mean().reset_index()
     region_top10_ranking = region_top10_ranking.sort_values("skill_rating", ascending=False)
     region_top10_ranking["rank"] = region_top10_ranking.index + 1
     region_top10_ranking = region_top10_ranking.loc[:, ["rank", "region", "skill_rating"]]
@@ -159,7 +167,7 @@ def _save_team_ranking(
     ranking: pd.DataFrame, 
     saving_dir: str
 ) -> None:
-    team_ranking = ranking.groupby("team_name").agg(
+    team_ranking = ranking.groupby("team_name", observed=True).agg(
         {
             "region": "first",
             "nb_games": "mean",
@@ -172,144 +180,218 @@ def _save_team_ranking(
     team_ranking = team_ranking.loc[:, ["rank", "team_name", "region", "nb_games", "last_game_date", "skill_rating"]]
     team_ranking.to_csv(join(saving_dir, "team_ranking.csv"), index=False)
 
-def evaluate_ranking(ranking: pd.DataFrame, experiment_dir: str) -> None:
-    data_dir = join(ARTIFACTS_DIR, "data", "survey")
-    
-    player_id_to_rating_mapping = ranking[["player_id", "skill_rating"]].set_index("player_id").to_dict()["skill_rating"]
-
-    metrics = {}
-    for ranking_kind in ["global", "europe", "north_america", "china", "korea"]:
-
+RANKING_KINDS = ["global", "europe", "north_america", "china", "korea"]
 
-        player_comparison_df = pd.read_csv(join(data_dir, "questions", f"{ranking_kind}_survey_questions.csv"))
+def evaluate_ranking(ranking: pd.DataFrame, experiment_dir: str, bootstrap_config: dict = None) -> None:
+    player_ratings = ranking.set_index("player_id")
 
-        player_comparison_df["player_0_rating"] = player_comparison_df.player_id_0.apply(lambda x: player_id_to_rating_mapping[x])
-        player_comparison_df["player_1_rating"] = player_comparison_df.player_id_1.apply(lambda x: player_id_to_rating_mapping[x])
-        player_comparison_df["model_player_0_is_better"] = player_comparison_df["player_0_rating"] > player_comparison_df["player_1_rating"]
+    metrics = evaluate_ratings_on_survey(player_ratings[["skill_rating"]], RANKING_KINDS, bootstrap_config)["skill_rating"]
 
-        survey_results_df = pd.read_csv(join(data_dir, "answers", f"{ranking_kind}_survey_answers.csv"))
-
-        expert_names = survey_results_df.columns.tolist()
-        survey_results_df = survey_results_df.apply(lambda col: col == player_comparison_df["player_name_0"])
-        nb_experts = len(survey_results_df.columns)
-        survey_results_df.columns = [f"expert_{i}_player_0_is_better" for i in range(0, nb_experts)]
-
-        player_comparison_df = pd.concat([player_comparison_df, survey_results_df], axis=1)
-
-        nb_unique_players = len(
-            set(
-                player_comparison_df["player_id_0"].unique().tolist() + 
-                player_comparison_df["player_id_1"].unique().tolist()
-            )
-        )
-
-        metrics[ranking_kind] = {
-            **_compute_concordance_metrics(player_comparison_df, expert_names),
-            "nb_unique_players": int(nb_unique_players),
-            "nb_experts": int(nb_experts),
-        }
-
-        if "skill_rating_mu" in ranking.columns:
-            openskill_metrics = _openskill_ranking_evaluation(ranking, player_comparison_df, expert_names, ranking_kind, experiment_dir)
+    if "skill_rating_mu" in ranking.columns:
+        for ranking_kind in RANKING_KINDS:
+            survey = load_survey(ranking_kind)
+            openskill_metrics = _openskill_ranking_evaluation(player_ratings, survey, ranking_kind, experiment_dir, bootstrap_config)
             metrics[ranking_kind]["openskill_metrics"] = openskill_metrics
     
     save_yaml(metrics, experiment_dir, "ranking_experts_evaluation.yaml")
 
+def evaluate_ratings_on_survey(
+    player_ratings: pd.DataFrame, ranking_kinds: list[str] = RANKING_KINDS, bootstrap_config: dict = None
+) -> dict:
+    """
+    Expert concordance of every column of `player_ratings` (indexed by player_id), e.g. several
+    ranking snapshots or rating configurations evaluated at once, as {column: {ranking_kind: metrics}}.
+    Bootstrap confidence intervals over the questions are added if `bootstrap_config` is given.
+    """
+    metrics = {column: {} for column in player_ratings.columns}
+    for ranking_kind in ranking_kinds:
+        survey = load_survey(ranking_kind)
+        ratings_0 = _map_player_ratings(survey["player_id_0"], player_ratings)
+        ratings_1 = _map_player_ratings(survey["player_id_1"], player_ratings)
+        concordance_metrics = _compute_concordance_metrics(ratings_0 > ratings_1, survey["experts_player_0_is_better"], survey["expert_names"])
+        for column, column_concordance_metrics in zip(player_ratings.columns, concordance_metrics):
+            metrics[column][ranking_kind] = {
+                **column_concordance_metrics,
+                "nb_unique_players": survey["nb_unique_players"],
+                "nb_experts": len(survey["expert_names"]),
+            }
+        if bootstrap_config is not None:
+            bootstrap_metrics = _compute_bootstrap_concordance_metrics(
+                ratings_0 > ratings_1, survey["experts_player_0_is_better"], bootstrap_config
+            )
+            for column, column_bootstrap_metrics in zip(player_ratings.columns, bootstrap_metrics):
+                metrics[column][ranking_kind]["bootstrap"] = column_bootstrap_metrics
+    return metrics
 
-def _compute_concordance_metrics(player_comparison_df: pd.DataFrame, expert_names: list[str]) -> dict:
-    nb_experts = len(expert_names)
-
-    def majority_voting(row):
-        expert_opinions = [row[f"expert_{i}_player_0_is_better"] for i in range(nb_experts)]
-        if sum(expert_opinions) == nb_experts / 2:
-            return None
-        else:
-            return sum(expert_opinions) > nb_experts / 2
-
-    player_comparison_df[f"expert_majority_player_0_is_better"] = player_comparison_df.apply(
-        majority_voting, axis=1
+def load_survey(ranking_kind: str) -> dict:
+    """Survey questions with the answers as an (n_questions, n_experts) boolean matrix, True when the expert picked player 0."""
+    data_dir = join(ARTIFACTS_DIR, "data", "survey")
+    player_comparison_df = pd.read_csv(join(data_dir, "questions", f"{ranking_kind}_survey_questions.csv"))
+    survey_results_df = pd.read_csv(join(data_dir, "answers", f"{ranking_kind}_survey_answers.csv"))
+    experts_player_0_is_better = survey_results_df.to_numpy() == player_comparison_df["player_name_0"].to_numpy()[:, None]
+    return _create_survey(
+        player_comparison_df["player_id_0"].to_numpy(), 
+        player_comparison_df["player_id_1"].to_numpy(), 
+        experts_player_0_is_better, 
+        survey_results_df.columns.tolist()
     )
 
-    def check_unanimous(row):
-        expert_opinions = [row[f"expert_{i}_player_0_is_better"] for i in range(nb_experts)]
-        return all(expert_opinions) or all(x == False for x in expert_opinions)
-    player_comparison_df["experts_are_unanimous"] = player_comparison_df.apply(check_unanimous, axis=1)
-
-    player_comparison_df["model_expert_concordance"] = player_comparison_df["model_player_0_is_better"] == (player_comparison_df["expert_majority_player_0_is_better"])
-    player_comparison_df = player_comparison_df[~player_comparison_df.loc[:, "expert_majority_player_0_is_better"].isna()]
-
-    unanimous_experts_ratio = player_comparison_df["experts_are_unanimous"].mean()
-
-    majority_concordance = player_comparison_df["model_expert_concordance"].mean()
-    unanimous_concordance = player_comparison_df[player_comparison_df["experts_are_unanimous"]]["model_expert_concordance"].mean()
-    partial_concordance = player_comparison_df[~player_comparison_df["experts_are_unanimous"]]["model_expert_concordance"].mean()
-    per_expert_concordance = {
-        expert_name: float((
-            player_comparison_df[f"expert_{i}_player_0_is_better"]
-            == player_comparison_df["model_player_0_is_better"]
-        ).mean())
-        for i, expert_name in enumerate(expert_names)
-    }
+def _create_survey(
+    player_id_0: np.ndarray, player_id_1: np.ndarray, experts_player_0_is_better: np.ndarray, expert_names: list[str]
+) -> dict:
+    majority_exists, majority_player_0_is_better, experts_are_unanimous = _compute_experts_majority(experts_player_0_is_better)
     return {
-        "majority_concordance": float(majority_concordance),
-        "unanimous_concordance": float(unanimous_concordance),
-        "partial_concordance": float(partial_concordance),
-        "per_expert_concordance": per_expert_concordance,
-        "unanimous_experts_ratio": float(unanimous_experts_ratio),
+        "player_id_0": player_id_0,
+        "player_id_1": player_id_1,
+        "experts_player_0_is_better": experts_player_0_is_better,
+        "expert_names": expert_names,
+        "expert_majority_exists": majority_exists,
+        "expert_majority_player_0_is_better": majority_player_0_is_better,
+        "experts_are_unanimous": experts_are_unanimous,
+        "nb_unique_players": len(np.union1d(player_id_0, player_id_1)),
     }
 
-def _openskill_ranking_evaluation(ranking: pd.DataFrame, player_comparison_df: pd.DataFrame, expert_names: list, ranking_kind: str, experiment_dir: str) -> None:
-    player_comparison_df = player_comparison_df.copy()
-    player_id_to_rating_mapping = ranking[["player_id", "skill_rating_mu"]].set_index("player_id").to_dict()["skill_rating_mu"]
-    player_id_to_rating_sigma_mapping = ranking[["player_id", "skill_rating_sigma"]].set_index("player_id").to_dict()["skill_rating_sigma"]
-
-    player_comparison_df["player_0_rating_mu"] = player_comparison_df.player_id_0.apply(lambda x: player_id_to_rating_mapping[x])
-    player_comparison_df["player_1_rating_mu"] = player_comparison_df.player_id_1.apply(lambda x: player_id_to_rating_mapping[x])
-    player_comparison_df["player_0_rating_sigma"] = player_comparison_df.player_id_0.apply(lambda x: player_id_to_rating_sigma_mapping[x])
-    player_comparison_df["player_1_rating_sigma"] = player_comparison_df.player_id_1.apply(lambda x: player_id_to_rating_sigma_mapping[x])
-
-    mu_diff = player_comparison_df['player_0_rating_mu'] - player_comparison_df['player_1_rating_mu']
-    sigma_combined = np.sqrt(player_comparison_df['player_0_rating_sigma']**2 + player_comparison_df['player_1_rating_sigma']**2)
-    z_score = mu_diff / sigma_combined
-    player_comparison_df['model_player_0_is_better'] = norm.cdf(z_score)
+def _compute_experts_majority(experts_player_0_is_better: np.ndarray) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    nb_experts = experts_player_0_is_better.shape[-1]
+    nb_votes_player_0 = experts_player_0_is_better.sum(axis=-1)
+    majority_exists = nb_votes_player_0 != nb_experts / 2
+    majority_player_0_is_better = nb_votes_player_0 > nb_experts / 2
+    experts_are_unanimous = (nb_votes_player_0 == 0) | (nb_votes_player_0 == nb_experts)
+    return majority_exists, majority_player_0_is_better, experts_are_unanimous
+
+def _map_player_ratings(player_ids: np.ndarray, player_ratings: pd.DataFrame) -> np.ndarray:
+    slots = player_ratings.index.get_indexer(player_ids)
+    if (slots < 0).any():
+        raise KeyError(f"Players missing from the ranking: {np.unique(player_ids[slots < 0]).tolist()}")
+    return player_ratings.to_numpy()[slots]
+
+def _compute_concordance_metrics(
+    model_player_0_is_better: np.ndarray, experts_player_0_is_better: np.ndarray, expert_names: list[str]
+) -> list[dict]:
+    """
+    Concordance of the model answers, of shape (n_questions, n_models), with the experts answers, of shape
+    (n_questions, n_experts). The questions without expert majority are left out.
+    """
+    majority_exists, majority_player_0_is_better, experts_are_unanimous = _compute_experts_majority(experts_player_0_is_better)
+    model_player_0_is_better = model_player_0_is_better[majority_exists]
+    experts_player_0_is_better = experts_player_0_is_better[majority_exists]
+    majority_player_0_is_better = majority_player_0_is_better[majority_exists]
+    experts_are_unanimous = experts_are_unanimous[majority_exists]
+
+    model_expert_concordance = model_player_0_is_better == majority_player_0_is_better[:, None]
+    majority_concordance = _mean(model_expert_concordance)
+    unanimous_concordance = _mean(model_expert_concordance[experts_are_unanimous])
+    partial_concordance = _mean(model_expert_concordance[~experts_are_unanimous])
+    per_expert_concordance = _mean(experts_player_0_is_better[:, :, None] == model_player_0_is_better[:, None, :])
+    unanimous_experts_ratio = _mean(experts_are_unanimous)
+
+    return [
+        {
+            "majority_concordance": float(majority_concordance[i]),
+            "unanimous_concordance": float(unanimous_concordance[i]),
+            "partial_concordance": float(partial_concordance[i]),
+            "per_expert_concordance": {
+                expert_name: float(per_expert_concordance[expert_index, i])
+                for expert_index, expert_name in enumerate(expert_names)
+            },
+            "unanimous_experts_ratio": float(unanimous_experts_ratio),
+        }
+        for i in range(model_player_0_is_better.shape[1])
+    ]
 
-    player_comparison_df = player_comparison_df.dropna() # nan values come from strict equality in majority voting
+def _compute_bootstrap_concordance_metrics(
+    model_player_0_is_better: np.ndarray, experts_player_0_is_better: np.ndarray, bootstrap_config: dict
+) -> list[dict]:
+    majority_exists, majority_player_0_is_better, experts_are_unanimous = _compute_experts_majority(experts_player_0_is_better)
+    model_expert_concordance = model_player_0_is_better[majority_exists] == majority_player_0_is_better[majority_exists, None]
+    confidence_intervals = compute_bootstrap_confidence_intervals(
+        partial(
+            _compute_concordance_for_resamples, 
+            model_expert_concordance=model_expert_concordance, 
+            experts_are_unanimous=experts_are_unanimous[majority_exists]
+        ),
+        len(model_expert_concordance),
+        **bootstrap_config
+    )
+    return [
+        {
+            metric_name: {bound: float(values[metric_index, i]) for bound, values in confidence_intervals.items()}
+            for metric_index, metric_name in enumerate(["majority_concordance", "unanimous_concordance", "partial_concordance"])
+        }
+        for i in range(model_expert_concordance.shape[1])
+    ]
 
-    y_prob_list = player_comparison_df['model_player_0_is_better'].values.tolist()
-    y_true_list = player_comparison_df['expert_majority_player_0_is_better'].values.tolist()
-    nbins = int(np.sqrt(len(y_true_list)))
-    ece = compute_ece(y_true_list, y_prob_list, nbins)
+def _compute_concordance_for_resamples(
+    indices: np.ndarray, model_expert_concordance: np.ndarray, experts_are_unanimous: np.ndarray
+) -> np.ndarray:
+    """Majority, unanimous and partial concordances of every resample, of shape (n_resamples, 3, n_models)."""
+    model_expert_concordance = model_expert_concordance[indices]
+    experts_are_unanimous = experts_are_unanimous[indices][:, :, None]
+    with np.errstate(invalid="ignore"):
+        return np.stack([
+            model_expert_concordance.mean(axis=1),
+            (model_expert_concordance & experts_are_unanimous).sum(axis=1) / experts_are_unanimous.sum(axis=1),
+            (model_expert_concordance & ~experts_are_unanimous).sum(axis=1) / (~experts_are_unanimous).sum(axis=1),
+        ], axis=1)
+
+def _mean(values: np.ndarray) -> np.ndarray:
+    with np.errstate(invalid="ignore"):
+        return values.sum(axis=0) / len(values)
+
+def _openskill_ranking_evaluation(
+    player_ratings: pd.DataFrame, survey: dict, ranking_kind: str, experiment_dir: str, bootstrap_config: dict = None
+) -> dict:
+    ratings_0 = _map_player_ratings(survey["player_id_0"], player_ratings[["skill_rating_mu", "skill_rating_sigma"]])
+    ratings_1 = _map_player_ratings(survey["player_id_1"], player_ratings[["skill_rating_mu", "skill_rating_sigma"]])
+    model_player_0_is_better = compute_win_probabilities(ratings_0[:, 0], ratings_0[:, 1], ratings_1[:, 0], ratings_1[:, 1])
+
+    majority_exists = survey["expert_majority_exists"] # no majority comes from strict equality in majority voting
+    y_prob = model_player_0_is_better[majority_exists]
+    y_true = survey["expert_majority_player_0_is_better"][majority_exists]
+    nbins = int(np.sqrt(len(y_true)))
+    ece = compute_ece(y_true, y_prob, nbins)
 
     experiment_dir = join(experiment_dir, "rankings")
     plot_model_calibration(
-        y_true_list, 
-        y_prob_list, 
+        y_true, 
+        y_prob, 
         nbins, 
         f"Calibration plot for predicting which player is better from skill rating - {ranking_kind}", 
         experiment_dir, 
         f"better_player_prediction_calibration_from_rating_{ranking_kind}.png"
     )
 
-    expert_unanimous_mask = player_comparison_df[player_comparison_df["experts_are_unanimous"]].index.tolist()
-    y_prob_list = player_comparison_df.loc[expert_unanimous_mask, 'model_player_0_is_better'].values.tolist()
-    y_true_list = player_comparison_df.loc[expert_unanimous_mask, 'expert_majority_player_0_is_better'].values.tolist()
-    ece_unanimous = compute_ece(y_true_list, y_prob_list, nbins)
+    experts_are_unanimous = survey["experts_are_unanimous"][majority_exists]
+    ece_unanimous = compute_ece(y_true[experts_are_unanimous], y_prob[experts_are_unanimous], nbins)
     plot_model_calibration(
-        y_true_list, 
-        y_prob_list, 
+        y_true[experts_are_unanimous], 
+        y_prob[experts_are_unanimous], 
         nbins, 
         f"Calibration plot for predicting which player is better from skill rating - {ranking_kind} - Experts unanimous", 
         experiment_dir, 
         f"better_player_prediction_calibration_from_rating_experts_unanimous_{ranking_kind}.png"
     )
 
-    player_comparison_df['model_player_0_is_better'] = player_comparison_df['model_player_0_is_better'] > 0.5
-    concordance_metrics = _compute_concordance_metrics(player_comparison_df, expert_names)
+    concordance_metrics = _compute_concordance_metrics(
+        model_player_0_is_better[:, None] > 0.5, survey["experts_player_0_is_better"], survey["expert_names"]
+    )[0]
 
     metrics = {
         "ece": float(ece),
         "ece_unanimous": float(ece_unanimous),
         **concordance_metrics
     }
+    if bootstrap_config is not None:
+        confidence_intervals = compute_bootstrap_confidence_intervals(
+            partial(_compute_ece_for_resamples, y_true=y_true, y_prob=y_prob, nbins=nbins),
+            len(y_true),
+            **bootstrap_config
+        )
+        metrics["bootstrap"] = {
+            "ece": {bound: float(values) for bound, values in confidence_intervals.items()}
+        }
 
     return metrics
+
+def _compute_ece_for_resamples(indices: np.ndarray, y_true: np.ndarray, y_prob: np.ndarray, nbins: int) -> np.ndarray:
+    return compute_ece(y_true[indices], y_prob[indices], nbins)
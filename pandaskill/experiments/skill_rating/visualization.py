@@ -3,6 +3,7 @@ from pandaskill.experiments.data.player_region import MAIN_LEAGUE_SERIES_TOURNAM
 from pandaskill.experiments.general.utils import ROLES, ALL_REGIONS
 from pandaskill.experiments.general.visualization import plot_violin_distributions
 from pandaskill.libs.skill_rating.bayesian import lower_bound_rating, combine_contextual_and_meta_ratings
+from pandaskill.libs.skill_rating.rating_history import RatingHistory
 import matplotlib.dates as mdates
 import matplotlib.pyplot as plt
 import numpy as np
@@ -105,7 +106,7 @@ def _visualize_meta_rating_evolution(
         by=['series_name', 'region', 'skill_rating_after'], 
         ascending=[True, True, False]
     )
-    top_10_players = sorted_df.groupby(['series_name', 'region'], observed=False).head(10).reset_index()
+    top_10_players = sorted_df.groupby(['series_name', 'region'], observed=True).head(10).reset_index()
     _create_and_save_meta_rating_evolution(
         top_10_players,
         nb_interregion_games_per_series,
@@ -117,84 +118,95 @@ def _visualize_meta_rating_evolution(
 def construct_skill_ratings_for_region_after_series(
     ratings_df: pd.DataFrame
 ) -> tuple[pd.DataFrame, pd.Series]:    
-    interregion_ratings = ratings_df[
-        ~(ratings_df.meta_rating_before == ratings_df.meta_rating_after)
-    ]
+    """
+    Return the skill ratings of the players of every region involved in the inter-region games of a series,
+    as of the end of the series, and the number of inter-region games per series.
+    A player belongs to a region at a given date if their last game in the region is at most 6 months old,
+    and their skill rating is recomputed with the latest meta rating of the region.
+    All the snapshots of a region are queried from a single rating history of its games.
+    """
+    is_interregion = (ratings_df.meta_rating_before != ratings_df.meta_rating_after).to_numpy()
 
-    if interregion_ratings.empty:
+    if not is_interregion.any():
         return pd.DataFrame([]), pd.Series([])
 
-    data = []
-    nb_interregion_games = []
-    series_names = interregion_ratings.series_name.unique()
-    for series_name in series_names:
-        series_interregion_data = interregion_ratings[interregion_ratings.series_name == series_name]
-        series_end_date = ratings_df[ratings_df.series_name == series_name]["date"].max()
-        for region in series_interregion_data.region.unique():
-            ratings_in_region_after_series = _get_skill_ratings_of_region_at_a_given_point_in_time(
-                ratings_df, region, series_end_date
-            )
-            ratings_after_series = ratings_in_region_after_series.loc[:, ["skill_rating_after"]]
-            ratings_after_series["region"] = region
-            ratings_after_series["series_name"] = series_name            
-            data.append(ratings_after_series)
-
-        nb_interregion_games_for_series = len(series_interregion_data.index.get_level_values(0).unique())
-        nb_interregion_games.append(nb_interregion_games_for_series)
-
-    region_skill_ratings_after_series_df = pd.concat(data)
+    interregion_ratings = ratings_df[is_interregion]
+    snapshots_df = pd.DataFrame({
+        "series_name": interregion_ratings["series_name"].to_numpy(dtype=object),
+        "region": interregion_ratings["region"].to_numpy(dtype=object),
+    }).drop_duplicates()
+    series_names = snapshots_df["series_name"].unique()
+    snapshots_df["series_order"] = pd.Index(series_names).get_indexer(snapshots_df["series_name"])
+    snapshots_df = snapshots_df.sort_values("series_order", kind="stable").reset_index(drop=True)
+
+    series_end_dates = ratings_df.groupby("series_name", observed=True)["date"].max()
+    snapshots_df["date"] = series_end_dates.loc[snapshots_df["series_name"]].to_numpy(dtype=str)
+    snapshots_df["since"] = [
+        str(datetime.strptime(date, "%Y-%m-%d %H:%M:%S.%f") - timedelta(days=6*30)) for date in snapshots_df["date"]
+    ]
 
+    snapshot_ratings = {}
+    regions = ratings_df["region"].to_numpy(dtype=object)
+    for region, region_snapshots_df in snapshots_df.groupby("region", sort=False):
+        snapshot_ratings.update(zip(
+            region_snapshots_df.index,
+            _get_skill_ratings_of_region_at_snapshots(ratings_df[regions == region], region_snapshots_df)
+        ))
+    region_skill_ratings_after_series_df = pd.concat([snapshot_ratings[i] for i in snapshots_df.index])
+
+    nb_interregion_games = interregion_ratings.reset_index("game_id").groupby(
+        interregion_ratings["series_name"].to_numpy(dtype=object)
+    )["game_id"].nunique()
     nb_interregion_games_df = pd.Series(
-        nb_interregion_games, index=series_names
+        nb_interregion_games.loc[series_names].to_numpy(), index=series_names
     )
 
     return region_skill_ratings_after_series_df, nb_interregion_games_df
 
-
-def _get_skill_ratings_of_region_at_a_given_point_in_time(
-    ratings_df: pd.DataFrame,
-    region: str,
-    date: str
-) -> pd.DataFrame:    
+def _get_skill_ratings_of_region_at_snapshots(
+    region_ratings_df: pd.DataFrame, snapshots_df: pd.DataFrame
+) -> list[pd.DataFrame]:
     """
-    Return a DataFrame containing all the players ratings belonging to a given region at given date. 
-    The ratings are adjusted based on the last meta rating before the date.
-    Players are filtered based on their last game date, which should be at most 6 months before the given date.
-    Players that have stopped playing before the 6-month date are still considered (edge case not handled).
+    Skill ratings of the region players at every snapshot (`date`, `since`, `series_name`), in the order of
+    `snapshots_df`: the last game at or before the date of the players having played since `since`, combined
+    with the meta rating of the region after its latest game at or before the date.
     """
-
-    def recompute_ratings_for_players_in_region(last_rating_for_players_in_last_regular_season, last_region_rating_mu, last_region_rating_sigma):
-        last_rating_for_players_in_last_regular_season["meta_rating_after_mu"] = last_region_rating_mu
-        last_rating_for_players_in_last_regular_season["meta_rating_after_sigma"] = last_region_rating_sigma
-        last_rating_for_players_in_last_regular_season["meta_rating_after"] = lower_bound_rating(last_region_rating_mu, last_region_rating_sigma)
-        
-        new_overall_ratings = last_rating_for_players_in_last_regular_season.apply(lambda row: combine_contextual_and_meta_ratings(
-            row["contextual_rating_after_mu"], row["contextual_rating_after_sigma"],
-            row["meta_rating_after_mu"], row["meta_rating_after_sigma"],    
-        ), axis=1).values
-        new_overall_ratings = np.array([[mu, sigma] for (mu, sigma) in new_overall_ratings])
-        last_rating_for_players_in_last_regular_season["skill_rating_after_mu"] = new_overall_ratings[:, 0]
-        last_rating_for_players_in_last_regular_season["skill_rating_after_sigma"] = new_overall_ratings[:, 1]
-        last_rating_for_players_in_last_regular_season["skill_rating_after"] = last_rating_for_players_in_last_regular_season.apply(
-            lambda row: lower_bound_rating(
-                row["skill_rating_after_mu"], row["skill_rating_after_sigma"]
-            ),
-            axis=1
+    rating_history = RatingHistory(region_ratings_df)
+    player_ids = rating_history.player_index.to_numpy()
+    history_dates = rating_history.data["date"].to_numpy(dtype=str)
+    contextual_mus = rating_history.data["contextual_rating_after_mu"].to_numpy()
+    contextual_sigmas = rating_history.data["contextual_rating_after_sigma"].to_numpy()
+
+    order = np.argsort(region_ratings_df["date"].to_numpy(dtype=str), kind="stable")
+    dates = region_ratings_df["date"].to_numpy(dtype=str)[order]
+    meta_mus = region_ratings_df["meta_rating_after_mu"].to_numpy()[order]
+    meta_sigmas = region_ratings_df["meta_rating_after_sigma"].to_numpy()[order]
+
+    snapshots = []
+    for snapshot in snapshots_df.itertuples():
+        positions = rating_history.get_positions_as_of(player_ids, snapshot.date)
+        # `since` is inclusive: the last game may be exactly 6 months old
+        is_active = positions >= 0
+        is_active[is_active] = history_dates[positions[is_active]] >= snapshot.since
+        rows = positions[is_active]
+
+        latest_row = np.searchsorted(dates, snapshot.date, side="right") - 1
+        # no region game yet, hence no active player either
+        meta_mu, meta_sigma = (meta_mus[latest_row], meta_sigmas[latest_row]) if latest_row >= 0 else (np.nan, np.nan)
+
+        skill_rating_mus, skill_rating_sigmas = combine_contextual_and_meta_ratings(
+            contextual_mus[rows], contextual_sigmas[rows], meta_mu, meta_sigma
         )
-        return last_rating_for_players_in_last_regular_season
-
-    six_months_before_date = datetime.strptime(date, "%Y-%m-%d %H:%M:%S.%f") - timedelta(days=6*30)
-    last_ratings_in_region = ratings_df[
-        (ratings_df.date <= date)
-        & (ratings_df.date >= str(six_months_before_date))
-        & (ratings_df.region == region)
-    ].reset_index().sort_values("date").groupby("player_id").last().copy()
-
-    last_region_rating_mu, last_region_rating_sigma = last_ratings_in_region.tail(1).loc[:, ["meta_rating_after_mu", "meta_rating_after_sigma"]].values[0]
-    last_ratings_in_region = recompute_ratings_for_players_in_region(last_ratings_in_region, last_region_rating_mu, last_region_rating_sigma)
-
-    return last_ratings_in_region
+        snapshots.append(pd.DataFrame(
+            {
+                "skill_rating_after": lower_bound_rating(skill_rating_mus, skill_rating_sigmas),
+                "region": snapshot.region,
+                "series_name": snapshot.series_name,
+            },
+            index=pd.Index(player_ids[is_active], name="player_id"),
+        ))
 
+    return snapshots
 
 def _create_and_save_meta_rating_evolution(
     ratings_in_region_after_series: pd.DataFrame, 
@@ -236,7 +248,7 @@ def _create_and_save_meta_rating_evolution(
         color = color_dict[region]
         marker = marker_dict[region]
 
-        mean_data = region_data.groupby("series_name", observed=False)["skill_rating_after"].mean().reset_index()
+        mean_data = region_data.groupby("series_name", observed=True)["skill_rating_after"].mean().reset_index()
 
         sns.lineplot(
             data=mean_data, 
@@ -65,7 +65,7 @@ def _count_win_and_lose_contested_events(participants_contestable_objectives: pd
     return nb_contested_event_win
 
 def compute_kill_death_value_features(
-    stat_df: pd.DataFrame, event_df: pd.DataFrame, window: int=30
+    stat_df: pd.DataFrame, event_df: pd.DataFrame, window: int=30, nb_processes: int=None
 ) -> Tuple[pd.Series, pd.Series, pd.Series, pd.Series]:
     event_df = event_df.copy()
 
@@ -73,7 +73,7 @@ def compute_kill_death_value_features(
 
     event_df = _prepare_event_df_for_death_worth_features(event_df, player_id_to_team_id_mapping)
 
-    event_df['death_is_worthless'] = _evaluate_deaths_worthlessness(event_df, window)
+    event_df['death_is_worthless'] = _evaluate_deaths_worthlessness(event_df, window, nb_processes)
 
     nb_worthless_deaths = _count_nb_worthless_deaths(event_df)
     nb_free_kills = _count_nb_free_kills(event_df, player_id_to_team_id_mapping)
@@ -97,15 +97,18 @@ def _prepare_event_df_for_death_worth_features(
     event_df = event_df[event_df["killer_team_id"] != event_df["killed_team_id"]] # remove team kills (very rare, and can't exist outside of Renata ult)
     return event_df
 
-def _evaluate_deaths_worthlessness(event_df: pd.DataFrame, window: int=30) -> pd.Series:
-    with mp.Pool(mp.cpu_count()) as pool:
-        groupby_game_id = event_df.groupby('game_id')
-        results = list(tqdm(
-            pool.imap(_evaluate_deaths_worthlessness_for_game, 
-                    ((group, window) for _, group in groupby_game_id)),
-            total=groupby_game_id.ngroups,
-            desc="Evaluating death events worthlessness for games"
-        ))    
+def _evaluate_deaths_worthlessness(event_df: pd.DataFrame, window: int=30, nb_processes: int=None) -> pd.Series:
+    groupby_game_id = event_df.groupby('game_id')
+    if nb_processes == 1: # no pool for a handful of games, e.g. when ingesting live games
+        results = [_evaluate_deaths_worthlessness_for_game((group, window)) for _, group in groupby_game_id]
+    else:
+        with mp.Pool(nb_processes or mp.cpu_count()) as pool:
+            results = list(tqdm(
+                pool.imap(_evaluate_deaths_worthlessness_for_game, 
+                        ((group, window) for _, group in groupby_game_id)),
+                total=groupby_game_id.ngroups,
+                desc="Evaluating death events worthlessness for games"
+            ))    
     worthless_deaths_series = pd.concat(results)
     return worthless_deaths_series
 
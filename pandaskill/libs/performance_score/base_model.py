@@ -3,7 +3,7 @@ import numpy as np
 import shap
 from sklearn.base import BaseEstimator, ClassifierMixin
 from sklearn.preprocessing import MinMaxScaler
-from typing import Any, Tuple
+from typing import Any, Optional, Tuple
 
 class BaseModel(BaseEstimator, ClassifierMixin, ABC):
     def __init__(self, model: Any, **kwargs: Any) -> None:
@@ -37,8 +37,32 @@ class BaseModel(BaseEstimator, ClassifierMixin, ABC):
         features_importance = features_importance / np.abs(features_importance).sum()
         return features_importance
     
-    def compute_shap_values(self, X: np.ndarray) -> Tuple[shap.Explainer, np.ndarray]:
+    def compute_shap_values(
+        self, 
+        X: np.ndarray, 
+        algorithm: str = "auto", 
+        max_background_samples: Optional[int] = None,
+        random_state: int = 42
+    ) -> Tuple[shap.Explainer, np.ndarray]:
+        """
+        Compute the SHAP values of the positive class for each row of X. The background data is X, 
+        subsampled to `max_background_samples` rows if set. `algorithm` can be `auto`, letting shap 
+        choose the explainer, or `tree` to use the TreeSHAP explainer of tree ensemble models.
+        """
         X_normalized = self.scaler.transform(X)
-        explainer = shap.Explainer(self.model, X_normalized)
+        background = X_normalized
+        if max_background_samples is not None and len(background) > max_background_samples:
+            background = shap.sample(background, max_background_samples, random_state=random_state)
+
+        if algorithm == "auto":
+            explainer = shap.Explainer(self.model, background)
+        elif algorithm == "tree":
+            explainer = shap.TreeExplainer(self.model, background)
+        else:
+            raise ValueError(f"SHAP algorithm `{algorithm}` is not supported")
+
         shap_values = explainer.shap_values(X_normalized)
+        if np.ndim(shap_values) == 3: # one set of SHAP values per class
+            shap_values = shap_values[:, :, 1]
+            explainer.expected_value = explainer.expected_value[1]
         return explainer, shap_values
@@ -1,14 +1,88 @@
 import numpy as np
-from scipy import stats
+from typing import Optional
 
 class PercentileMapper():
     def train(self, probabilities):
-        self.reference_probabilities = probabilities
+        self.reference_probabilities = np.sort(np.asarray(probabilities, dtype=float))
         return self
 
     def map(self, probabilities):
-        performance_scores = np.array([
-            stats.percentileofscore(self.reference_probabilities, probability) 
-            for probability in probabilities
-        ])
-        return performance_scores
\ No newline at end of file
+        performance_scores = compute_percentiles_of_scores(
+            self.reference_probabilities, np.asarray(probabilities, dtype=float)
+        )
+        return performance_scores
+
+DEFAULT_N_QUANTILES = 1001
+
+class MultiColumnPercentileMapper():
+    """
+    Map every column of a 2-D array to its percentile in the corresponding training column, in a 
+    single vectorized pass.
+
+    Only `n_quantiles` quantiles per column are kept, so that memory does not depend on the training 
+    size, and percentiles are linearly interpolated between them. If `n_quantiles` is None, the sorted 
+    training data is kept instead and percentiles are exact (same values as `PercentileMapper`).
+    """
+    def __init__(self, n_quantiles: Optional[int] = DEFAULT_N_QUANTILES):
+        self.n_quantiles = n_quantiles
+
+    def train(self, X: np.ndarray) -> 'MultiColumnPercentileMapper':
+        X = np.asarray(X, dtype=float)
+        if self.n_quantiles is None:
+            self.quantile_levels = None
+            self.reference_table = np.sort(X, axis=0)
+        else:
+            self.quantile_levels = np.linspace(0, 100, self.n_quantiles)
+            self.reference_table = np.percentile(X, self.quantile_levels, axis=0)
+        return self
+
+    def map(self, X: np.ndarray) -> np.ndarray:
+        X = np.asarray(X, dtype=float)
+        percentiles = np.empty(X.shape)
+        for column_index in range(X.shape[1]):
+            reference_column = self.reference_table[:, column_index]
+            if self.quantile_levels is None:
+                percentiles[:, column_index] = compute_percentiles_of_scores(reference_column, X[:, column_index])
+            else:
+                percentiles[:, column_index] = _interpolate_percentiles_of_scores(
+                    reference_column, self.quantile_levels, X[:, column_index]
+                )
+        return percentiles
+
+def compute_percentiles_of_scores(sorted_reference: np.ndarray, scores: np.ndarray) -> np.ndarray:
+    """Equivalent to `scipy.stats.percentileofscore(sorted_reference, scores, kind="rank")`."""
+    nb_reference = len(sorted_reference)
+    if nb_reference == 0:
+        return np.full(scores.shape, np.nan)
+    left = np.searchsorted(sorted_reference, scores, side="left")
+    right = np.searchsorted(sorted_reference, scores, side="right")
+    percentiles = (left + right + (left < right)) * (50.0 / nb_reference)
+    percentiles[np.isnan(scores)] = np.nan
+    return percentiles
+
+def _interpolate_percentiles_of_scores(
+    quantiles: np.ndarray, quantile_levels: np.ndarray, scores: np.ndarray
+) -> np.ndarray:
+    """Average of the interpolated strict and weak cumulative distributions, i.e. the mid-rank 
+    for values tied over several quantiles."""
+    strict_percentiles = _interpolate_cumulative_distribution(quantiles, quantile_levels, scores, "left")
+    weak_percentiles = _interpolate_cumulative_distribution(quantiles, quantile_levels, scores, "right")
+    percentiles = (strict_percentiles + weak_percentiles) / 2
+    percentiles[np.isnan(scores)] = np.nan
+    return percentiles
+
+def _interpolate_cumulative_distribution(
+    quantiles: np.ndarray, quantile_levels: np.ndarray, scores: np.ndarray, side: str
+) -> np.ndarray:
+    upper_index = np.clip(np.searchsorted(quantiles, scores, side=side), 1, len(quantiles) - 1)
+    lower_quantile, upper_quantile = quantiles[upper_index - 1], quantiles[upper_index]
+    lower_level, upper_level = quantile_levels[upper_index - 1], quantile_levels[upper_index]
+    quantile_gap = upper_quantile - lower_quantile
+    flat_segment = quantile_gap <= 0
+    with np.errstate(divide="ignore", invalid="ignore"):
+        position = np.clip((scores - lower_quantile) / np.where(flat_segment, 1, quantile_gap), 0, 1)
+    if side == "left":
+        position[flat_segment] = scores[flat_segment] > lower_quantile[flat_segment]
+    else:
+        position[flat_segment] = scores[flat_segment] >= lower_quantile[flat_segment]
+    return lower_level + position * (upper_level - lower_level)
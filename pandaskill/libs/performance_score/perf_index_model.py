@@ -1,31 +1,87 @@
 from pandaskill.libs.performance_score.base_model import BaseModel
-from pandaskill.libs.performance_score.percentile_mapper import PercentileMapper
+from pandaskill.libs.performance_score.percentile_mapper import DEFAULT_N_QUANTILES, MultiColumnPercentileMapper
 import numpy as np
 from sklearn.ensemble import RandomForestClassifier
 from sklearn.inspection import permutation_importance
+from sklearn.model_selection import train_test_split
+from typing import Optional
 
 class PerformanceIndexModel(BaseModel):
-    def __init__(self, **kwargs):
+    """
+    Performance Index model: features are mapped to their percentile in the training data, and 
+    weighted by their importance in a random forest predicting the game outcome.
+
+    The importance is computed with `importance_method`:
+    - `permutation`: permutation importance with `permutation_n_repeats` repeats, on the training 
+    set or, if `permutation_holdout_fraction` is set, on a held-out sample the forest is not trained 
+    on. In that case the forest is refit on all the rows once the importance is computed, which 
+    trains it twice. `permutation_max_samples` bounds the number of rows predicted per repeat, 
+    `permutation_n_jobs` parallelizes over features and `permutation_random_state` seeds the 
+    held-out split and the permutations.
+    - `impurity`: mean decrease in impurity of the forest, which comes for free with the training.
+
+    Only `n_quantiles` quantiles of each training feature are kept to compute the percentiles. If 
+    `n_quantiles` is None, the full training data is kept and percentiles are exact.
+    """
+    def __init__(
+        self, 
+        importance_method: str = "permutation",
+        permutation_n_repeats: int = 5,
+        permutation_max_samples: Optional[int] = None,
+        permutation_holdout_fraction: float = 0.0,
+        permutation_n_jobs: Optional[int] = None,
+        permutation_random_state: int = 42,
+        n_quantiles: Optional[int] = DEFAULT_N_QUANTILES,
+        **kwargs
+    ):
+        if importance_method not in ["permutation", "impurity"]:
+            raise ValueError(f"Importance method `{importance_method}` is not supported")
+        self.importance_method = importance_method
+        self.permutation_n_repeats = permutation_n_repeats
+        self.permutation_max_samples = permutation_max_samples
+        self.permutation_holdout_fraction = permutation_holdout_fraction
+        self.permutation_n_jobs = permutation_n_jobs
+        self.permutation_random_state = permutation_random_state
+        self.n_quantiles = n_quantiles
         super().__init__(model=RandomForestClassifier, **kwargs)
 
     def train_random_forest_classifier(self, X: np.ndarray, y: np.ndarray) -> None:
         X_normalized = self.scaler.fit_transform(X)
 
-        self.model.fit(X_normalized, y)
+        has_holdout = self.importance_method == "permutation" and self.permutation_holdout_fraction > 0
+        if has_holdout:
+            X_train, X_importance, y_train, y_importance = train_test_split(
+                X_normalized, 
+                y, 
+                test_size=self.permutation_holdout_fraction, 
+                random_state=self.permutation_random_state, 
+                stratify=y
+            )
+        else:
+            X_train, X_importance, y_train, y_importance = X_normalized, X_normalized, y, y
+
+        self.model.fit(X_train, y_train)
 
-        result = permutation_importance(
-            self.model, X_normalized, y, n_repeats=5, random_state=42
-        )
-        self.weights = result.importances_mean
+        if self.importance_method == "permutation":
+            max_samples = min(self.permutation_max_samples or len(X_importance), len(X_importance))
+            result = permutation_importance(
+                self.model, 
+                X_importance, 
+                y_importance, 
+                n_repeats=self.permutation_n_repeats, 
+                max_samples=max_samples,
+                n_jobs=self.permutation_n_jobs,
+                random_state=self.permutation_random_state
+            )
+            self.weights = result.importances_mean
+            if has_holdout:
+                self.model.fit(X_normalized, y)
+        else:
+            self.weights = self.model.feature_importances_
         self.weights = self.weights / np.sum(self.weights)
 
     def learn_data_histograms(self, X: np.ndarray, y: np.ndarray) -> None:
-        nb_features = len(X[0])
-        self.percentile_mapper_list = []
-        for feature_index in range(nb_features):
-            self.percentile_mapper_list.append(
-                PercentileMapper().train(X[:, feature_index])
-            )
+        self.percentile_mapper = MultiColumnPercentileMapper(self.n_quantiles).train(X)
 
     def fit(self, X: np.ndarray, y: np.ndarray) -> 'BaseModel':
         self.train_random_forest_classifier(X, y)
@@ -36,10 +92,6 @@ class PerformanceIndexModel(BaseModel):
         return self.model.feature_importances_
     
     def compute_performance_scores(self, X: np.ndarray) -> np.ndarray:
-        num_samples = X.shape[0]
-        num_features = X.shape[1]
-        percentiles = np.zeros((num_samples, num_features))
-        for i in range(num_features):
-            percentiles[:, i] = self.percentile_mapper_list[i].map(X[:, i])
+        percentiles = self.percentile_mapper.map(X)
         scores = np.dot(percentiles, self.weights)
-        return scores
\ No newline at end of file
+        return scores
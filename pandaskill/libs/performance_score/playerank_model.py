@@ -1,11 +1,69 @@
 from pandaskill.libs.performance_score.base_model import BaseModel
 import numpy as np
+from scipy.special import expit
+from sklearn.base import clone
+from sklearn.calibration import CalibratedClassifierCV
 from sklearn.preprocessing import MinMaxScaler
-from sklearn.svm import SVC
+from sklearn.svm import SVC, LinearSVC
+
+LIBLINEAR_DEFAULT_PARAMETERS = {
+    # hinge loss solved in the dual matches libsvm's linear SVC objective; a larger intercept 
+    # scaling reduces the regularization liblinear applies to the intercept
+    "loss": "hinge",
+    "dual": True,
+    "intercept_scaling": 10.0,
+    # liblinear's default of 1000 iterations does not converge on min-max scaled features
+    "max_iter": 10000,
+}
 
 class PlayerankModel(BaseModel):
-    def __init__(self, **kwargs):
-        super().__init__(model=SVC, probability=True, **kwargs)
+    """
+    PlayeRank model, whose performance scores are the linear SVM feature weights applied to the 
+    scaled features.
+
+    Two solvers are available:
+    - `libsvm`: `SVC(kernel="linear")`, the original implementation, quadratic to cubic in the 
+    number of samples. With `calibrate`, probabilities come from libsvm's internal 5-fold Platt scaling.
+    - `liblinear`: `LinearSVC`, linear in the number of samples. With `calibrate`, a sigmoid 
+    calibration is fitted on 5-fold out-of-fold decision values, as libsvm does. The L1-normalized 
+    weights agree with the `libsvm` ones within 1e-2 per feature, see `experiments/performance_score/benchmark_playerank.py`.
+
+    Without `calibrate`, probabilities are the sigmoid of the SVM decision function.
+    """
+    calibrator = None
+
+    def __init__(self, solver: str = "libsvm", calibrate: bool = True, **kwargs):
+        self.solver = solver
+        self.calibrate = calibrate
+        if solver == "libsvm":
+            super().__init__(model=SVC, probability=calibrate, **kwargs)
+        elif solver == "liblinear":
+            kernel = kwargs.pop("kernel", "linear")
+            if kernel != "linear":
+                raise ValueError(f"Solver `liblinear` only supports the linear kernel, got `{kernel}`")
+            super().__init__(model=LinearSVC, **{**LIBLINEAR_DEFAULT_PARAMETERS, **kwargs})
+        else:
+            raise ValueError(f"Solver `{solver}` is not supported")
+
+    def fit(self, X: np.ndarray, y: np.ndarray) -> 'BaseModel':
+        if not (self.solver == "liblinear" and self.calibrate):
+            return super().fit(X, y)
+
+        X_normalized = self.scaler.fit_transform(X)
+        self.calibrator = CalibratedClassifierCV(clone(self.model), method="sigmoid", cv=5, ensemble=False)
+        self.calibrator.fit(X_normalized, y)
+        # without ensembling, the calibrator already fits the SVM on all the samples
+        self.model = self.calibrator.calibrated_classifiers_[0].estimator
+        return self
+
+    def predict_proba(self, X: np.ndarray) -> np.ndarray:
+        X_normalized = self.scaler.transform(X)
+        if self.calibrator is not None:
+            return self.calibrator.predict_proba(X_normalized)
+        if not self.calibrate:
+            y_prob = expit(self.model.decision_function(X_normalized))
+            return np.column_stack([1 - y_prob, y_prob])
+        return self.model.predict_proba(X_normalized)
 
     def compute_performance_scores(self, X: np.ndarray) -> np.ndarray:
         X_scaled = self.scaler.transform(X)
@@ -18,4 +76,4 @@ class PlayerankModel(BaseModel):
         performance_scores = minmax_scaler.fit_transform(performance_scores.reshape(-1, 1)).flatten()
         performance_scores *= 100
 
-        return performance_scores
\ No newline at end of file
+        return performance_scores
@@ -2,17 +2,28 @@ from pandaskill.libs.performance_score.base_model import BaseModel
 from pandaskill.libs.performance_score.percentile_mapper import PercentileMapper
 import numpy as np
 import pandas as pd
+from sklearn.model_selection import train_test_split
 from xgboost import XGBClassifier
 
 class PScoreModel(BaseModel):
     percentile_mapper = None
+    best_iteration = None
     
-    def __init__(self, **kwargs):
+    def __init__(
+        self, 
+        validation_fraction: float = 0.0, 
+        validation_random_state: int = 42, 
+        **kwargs
+    ):
         if "monotone_constraints" in kwargs and type(kwargs["monotone_constraints"]) == list:
             kwargs["monotone_constraints"] = {
                 f"feature_{i}": constraint
                 for i, constraint in enumerate(kwargs["monotone_constraints"])
             }
+        if kwargs.get("early_stopping_rounds") is not None and validation_fraction <= 0:
+            raise ValueError("`early_stopping_rounds` requires a strictly positive `validation_fraction`")
+        self.validation_fraction = validation_fraction
+        self.validation_random_state = validation_random_state
         super().__init__(model=XGBClassifier, **kwargs)
 
     def fit(self, X: np.ndarray, y: np.ndarray) -> 'BaseModel':
@@ -21,13 +32,31 @@ class PScoreModel(BaseModel):
             X_normalized,
             columns=[f"feature_{i}" for i in range(len(X[0]))]
         )
-        self.model.fit(X_normalized, y)
+
+        if self.validation_fraction > 0:
+            X_train, X_validation, y_train, y_validation = train_test_split(
+                X_normalized, 
+                y, 
+                test_size=self.validation_fraction, 
+                random_state=self.validation_random_state, 
+                stratify=y
+            )
+            self.model.fit(X_train, y_train, eval_set=[(X_validation, y_validation)], verbose=False)
+        else:
+            self.model.fit(X_normalized, y)
+        self.best_iteration = self._get_best_iteration()
 
         win_prob = self.model.predict_proba(X_normalized)[:, 1]
         percentile_mapper = PercentileMapper().train(win_prob)
         self.percentile_mapper = percentile_mapper
 
         return self
+
+    def _get_best_iteration(self) -> int:
+        """Last boosting round used at prediction time, i.e. the early-stopping one if any."""
+        if self.model.get_params().get("early_stopping_rounds") is not None:
+            return int(self.model.best_iteration)
+        return int(self.model.get_booster().num_boosted_rounds() - 1)
     
     def compute_performance_scores(self, X: np.ndarray) -> np.ndarray:
         win_probabilities = self.predict_proba(X)[:, 1]
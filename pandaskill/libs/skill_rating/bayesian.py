@@ -5,6 +5,7 @@ from progressbar.progressbar import ProgressBar
 from openskill.models import PlackettLuce, PlackettLuceRating
 from pandaskill.libs.skill_rating.trueskill import TrueSkill, TrueSkillRating
 import copy 
+import joblib
 from typing import List, Dict, TypeAlias, TypeVar
 
 DEFAULT_MU = 25.0
@@ -55,6 +56,116 @@ def compute_bayesian_ratings(
             rating_updates_for_game, all_skill_ratings, all_region_ratings
         )
     
+    skill_rating_updates_df = _format_rating_updates(rating_updates_dict)
+
+    return skill_rating_updates_df
+
+class BayesianRater():
+    """
+    Online counterpart of `compute_bayesian_ratings`, rating finished games one at a time. It keeps
+    the contextual rating, last region and number of games of every player, and the meta rating of
+    every region, new players and regions starting from the default rating.
+    """
+    def __init__(
+        self, 
+        rater_model: str = "openskill", 
+        use_ffa_setting: bool = True, 
+        use_meta_ratings: bool = True
+    ) -> None:
+        self.rater_model = rater_model
+        self.use_ffa_setting = use_ffa_setting
+        self.use_meta_ratings = use_meta_ratings
+        self.model = _instantiate_rater_model(rater_model)
+        self.skill_ratings: RatingDictType = {}
+        self.region_ratings: RatingDictType = {}
+        self.player_regions: Dict[int, str] = {}
+        self.player_nb_games: Dict[int, int] = {}
+
+    def rate_game(self, game_df: pd.DataFrame) -> pd.DataFrame:
+        """
+        Rates one game, given its rows indexed by (game_id, player_id) with the winning team first,
+        and returns its rating updates in the same format as `compute_bayesian_ratings`.
+        """
+        game_id = game_df.index.get_level_values("game_id")[0]
+        return _format_rating_updates({game_id: self._rate_game(game_df)})
+
+    def rate_games(self, df: pd.DataFrame) -> pd.DataFrame:
+        """Rates several games, in the order of their first row, e.g. to replay the history."""
+        rating_updates_dict = {
+            game_id: self._rate_game(game_df)
+            for game_id, game_df in df.groupby(level="game_id", sort=False)
+        }
+        return _format_rating_updates(rating_updates_dict)
+
+    def get_player_ratings(self, player_ids: list[int] = None) -> pd.DataFrame:
+        player_ids = list(self.skill_ratings.keys()) if player_ids is None else player_ids
+        rows = []
+        for player_id in player_ids:
+            contextual_rating = self.skill_ratings.get(player_id, _create_default_rating())
+            region = self.player_regions.get(player_id)
+            meta_rating = self.region_ratings.get(region, _create_default_rating())
+            mu, sigma = combine_contextual_and_meta_ratings(
+                contextual_rating["mu"], contextual_rating["sigma"], meta_rating["mu"], meta_rating["sigma"]
+            )
+            rows.append([
+                player_id, region, self.player_nb_games.get(player_id, 0), 
+                contextual_rating["mu"], contextual_rating["sigma"], 
+                meta_rating["mu"], meta_rating["sigma"],
+                mu, sigma, lower_bound_rating(mu, sigma)
+            ])
+        player_ratings_df = pd.DataFrame(
+            data=rows,
+            columns=[
+                "player_id", "region", "nb_games",
+                "contextual_rating_mu", "contextual_rating_sigma",
+                "meta_rating_mu", "meta_rating_sigma",
+                "skill_rating_mu", "skill_rating_sigma", "skill_rating",
+            ]
+        )
+        return player_ratings_df.set_index("player_id")
+
+    def save(self, path: str) -> None:
+        state = {key: value for key, value in self.__dict__.items() if key != "model"}
+        joblib.dump(state, path)
+
+    @classmethod
+    def load(cls, path: str) -> "BayesianRater":
+        state = joblib.load(path)
+        rater = cls(state["rater_model"], state["use_ffa_setting"], state["use_meta_ratings"])
+        rater.__dict__.update(state)
+        return rater
+
+    def _rate_game(self, game_df: pd.DataFrame) -> list[list]:
+        player_ids = game_df.index.get_level_values("player_id").tolist()
+        regions = game_df["region"].tolist()
+        for player_id in player_ids:
+            self.skill_ratings.setdefault(player_id, _create_default_rating())
+        for region in regions:
+            self.region_ratings.setdefault(region, _create_default_rating())
+
+        data_for_game = {
+            "player_id": player_ids,
+            "region": regions,
+            "performance_score": game_df["performance_score"].tolist(),
+            "region_change": [
+                self.player_regions.get(player_id, region) != region
+                for player_id, region in zip(player_ids, regions)
+            ],
+        }
+        rating_updates_for_game = _compute_rating_updates_for_game(
+            data_for_game, self.skill_ratings, self.region_ratings, self.model, 
+            self.use_ffa_setting, self.use_meta_ratings
+        )
+
+        for player_id, region, _, _, contextual_rating_after, meta_rating_after in rating_updates_for_game:
+            self.skill_ratings[player_id] = contextual_rating_after
+            self.region_ratings[region] = meta_rating_after
+            self.player_regions[player_id] = region
+            self.player_nb_games[player_id] = self.player_nb_games.get(player_id, 0) + 1
+
+        return rating_updates_for_game
+
+def _format_rating_updates(rating_updates_dict: dict[int, list[list]]) -> pd.DataFrame:
     rating_updates_dict = [
         [game_id, *rating_update]
         for game_id, rating_updates in rating_updates_dict.items()
@@ -85,26 +196,25 @@ def _initialize_ratings(
 ) -> tuple[RatingDictType, RatingDictType]:
     player_ids = list(df.index.get_level_values(1).unique())
     skill_ratings_dict = {
-        player_id: {
-            "mu": DEFAULT_MU, 
-            "sigma": DEFAULT_SIGMA,
-            "lower_bound": DEFAULT_LOWER_BOUND
-        }
+        player_id: _create_default_rating()
         for player_id in player_ids
     }
 
     regions = list(df["region"].unique())
     region_ratings_dict = {
-        region: {
-            "mu": DEFAULT_MU, 
-            "sigma": DEFAULT_SIGMA,
-            "lower_bound": DEFAULT_LOWER_BOUND
-        }
+        region: _create_default_rating()
         for region in regions
     }
 
     return skill_ratings_dict, region_ratings_dict
 
+def _create_default_rating() -> Dict[str, float]:
+    return {
+        "mu": DEFAULT_MU, 
+        "sigma": DEFAULT_SIGMA,
+        "lower_bound": DEFAULT_LOWER_BOUND
+    }
+
 def _compute_rating_updates_for_game(
     data_for_game: pd.Series, 
     all_skill_ratings: RatingListType,
@@ -359,11 +469,16 @@ def _combine_in_dataframe_contextual_and_meta_skill_ratings(
     return skill_rating_updates_df
 
 def combine_contextual_and_meta_ratings(
-    contextual_mu: float, contextual_sigma: float, meta_mu: float, meta_sigma: float
+    contextual_mu: float | np.ndarray, contextual_sigma: float | np.ndarray, 
+    meta_mu: float | np.ndarray, meta_sigma: float | np.ndarray
 ):
     overall_mu = contextual_mu + meta_mu
-    overall_sigma = float(np.sqrt(contextual_sigma**2 + meta_sigma**2))
+    overall_sigma = _to_float_if_scalar(np.sqrt(contextual_sigma**2 + meta_sigma**2))
     return overall_mu, overall_sigma
     
-def lower_bound_rating(mu: float, sigma: float) -> float:
-    return float(mu - 3 * sigma)
\ No newline at end of file
+def lower_bound_rating(mu: float | np.ndarray, sigma: float | np.ndarray) -> float | np.ndarray:
+    return _to_float_if_scalar(mu - 3 * sigma)
+
+def _to_float_if_scalar(value: float | np.ndarray) -> float | np.ndarray:
+    # ratings can be computed for whole arrays of players, e.g. with numpy arrays or pandas series
+    return float(value) if np.ndim(value) == 0 else value
\ No newline at end of file
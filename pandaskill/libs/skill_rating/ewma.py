@@ -1,23 +1,164 @@
+from numba import njit
+import numpy as np
 import pandas as pd
-from functools import partial
+
+class EwmaRater():
+    """
+    Online EWMA rater keeping the last rating and the number of games of every player in
+    arrays, with one column per alpha. Games must be fed in chronological order.
+    """
+    def __init__(self, alphas: float | list[float]) -> None:
+        self.alphas = np.atleast_1d(np.asarray(alphas, dtype=np.float64))
+        self.player_index = pd.Index([])
+        self.ratings = np.zeros((0, len(self.alphas)))
+        self.nb_games = np.zeros(0, dtype=np.int64)
+
+    def update(self, player_ids: np.ndarray, performance_scores: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        """Rates a batch of player games and returns the ratings before and after, of shape (n, n_alphas)."""
+        player_ids = np.asarray(player_ids)
+        performance_scores = np.asarray(performance_scores, dtype=np.float64)
+        slots = self._get_player_slots(player_ids, create=True)
+
+        order = np.argsort(slots, kind="stable")
+        sorted_slots = slots[order]
+        segment_ends = np.r_[np.flatnonzero(sorted_slots[1:] != sorted_slots[:-1]), len(sorted_slots) - 1]
+        segment_slots = sorted_slots[segment_ends]
+        sorted_ratings_before, sorted_ratings_after = _compute_segmented_ewma(
+            performance_scores[order], 
+            sorted_slots, 
+            self.alphas,
+            self.ratings[segment_slots],
+            self.nb_games[segment_slots] > 0
+        )
+        self.ratings[segment_slots] = sorted_ratings_after[segment_ends]
+        self.nb_games += np.bincount(slots, minlength=len(self.nb_games))
+
+        ratings_before = np.empty_like(sorted_ratings_before)
+        ratings_after = np.empty_like(sorted_ratings_after)
+        ratings_before[order] = sorted_ratings_before
+        ratings_after[order] = sorted_ratings_after
+        return ratings_before, ratings_after
+
+    def get_ratings(self, player_ids: np.ndarray) -> np.ndarray:
+        """Current ratings of shape (n, n_alphas), 0 for unknown players."""
+        slots = self._get_player_slots(np.asarray(player_ids), create=False)
+        ratings = np.zeros((len(slots), len(self.alphas)))
+        known = slots >= 0
+        ratings[known] = self.ratings[slots[known]]
+        return ratings
+
+    def save(self, path: str) -> None:
+        player_ids = self.player_index.to_numpy()
+        if player_ids.dtype == object: # e.g. string ids, stored as a fixed-width array to be loaded without pickle
+            player_ids = player_ids.astype(str)
+        np.savez(
+            path, 
+            alphas=self.alphas, 
+            player_ids=player_ids, 
+            ratings=self.ratings, 
+            nb_games=self.nb_games
+        )
+
+    @classmethod
+    def load(cls, path: str) -> "EwmaRater":
+        with np.load(path) as checkpoint:
+            rater = cls(checkpoint["alphas"])
+            rater.player_index = pd.Index(checkpoint["player_ids"])
+            rater.ratings = checkpoint["ratings"]
+            rater.nb_games = checkpoint["nb_games"]
+        return rater
+
+    def _get_player_slots(self, player_ids: np.ndarray, create: bool) -> np.ndarray:
+        slots = self.player_index.get_indexer(player_ids)
+        unknown = slots < 0
+        if create and unknown.any():
+            new_player_ids = pd.unique(player_ids[unknown])
+            self.player_index = pd.Index(np.concatenate([self.player_index.to_numpy(), new_player_ids])) \
+                if len(self.player_index) > 0 else pd.Index(new_player_ids)
+            self.ratings = np.concatenate([self.ratings, np.zeros((len(new_player_ids), len(self.alphas)))])
+            self.nb_games = np.concatenate([self.nb_games, np.zeros(len(new_player_ids), dtype=np.int64)])
+            slots[unknown] = self.player_index.get_indexer(player_ids[unknown])
+        return slots
 
 def compute_ewma_ratings(df: pd.DataFrame, alpha: float) -> pd.DataFrame:
-    df = df.sort_values(by=["player_id", "date"])
-    ratings_df = df.loc[:, ["performance_score"]].groupby("player_id", group_keys=False) \
-        .apply(partial(_compute_ewma_ratings_for_player, alpha=alpha))
+    ratings_df = compute_ewma_ratings_for_alphas(df, [alpha])[alpha]
+    ratings_df.columns = ratings_df.columns.to_list()
     return ratings_df
 
-def _compute_ewma_ratings_for_player(
-    player_game_performance_score: pd.DataFrame, alpha: float
-) -> pd.DataFrame:
-    ratings_after_game = player_game_performance_score.ewm(alpha=alpha, adjust=False).mean()
-    ratings_after_game = ratings_after_game["performance_score"]
-    ratings_after_game.name = "skill_rating_after"
-    ratings_before_game = [0.0, *ratings_after_game.values[:-1]]
-    ratings_before_game = pd.Series(
-        data=ratings_before_game, 
-        index=player_game_performance_score.index,
-        name="skill_rating_before"
+def compute_ewma_ratings_for_alphas(df: pd.DataFrame, alphas: list[float]) -> pd.DataFrame:
+    """Ratings for several alphas in one pass, columns are indexed by (alpha, rating)."""
+    df = df.sort_values(by=["player_id", "date"])
+    ratings_before, ratings_after = EwmaRater(alphas).update(
+        df.index.get_level_values("player_id").to_numpy(),
+        df["performance_score"].to_numpy(dtype=np.float64)
     )
-    skill_ratings = pd.concat([ratings_before_game, ratings_after_game], axis=1)
-    return skill_ratings
\ No newline at end of file
+    ratings = np.stack([ratings_before, ratings_after], axis=2).reshape(len(df), -1)
+    columns = pd.MultiIndex.from_product(
+        [list(alphas), ["skill_rating_before", "skill_rating_after"]], names=["alpha", None]
+    )
+    return pd.DataFrame(ratings, index=df.index, columns=columns)
+
+def _compute_segmented_ewma(
+    values: np.ndarray, 
+    segment_ids: np.ndarray, 
+    alphas: np.ndarray,
+    initial_ratings: np.ndarray = None,
+    has_history: np.ndarray = None,
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    EWMA over every contiguous run of `segment_ids`, for all `alphas` at once, starting
+    from `initial_ratings` for the segments with history and from their first value otherwise.
+    """
+    nb_segments = int(np.count_nonzero(np.r_[True, segment_ids[1:] != segment_ids[:-1]])) if len(values) > 0 else 0
+    if initial_ratings is None:
+        initial_ratings = np.zeros((nb_segments, len(alphas)))
+        has_history = np.zeros(nb_segments, dtype=bool)
+    new_weight, old_weight = _get_ewma_weights(alphas)
+    return _compute_segmented_ewma_kernel(
+        np.ascontiguousarray(values, dtype=np.float64),
+        np.ascontiguousarray(segment_ids),
+        new_weight,
+        old_weight,
+        np.ascontiguousarray(initial_ratings, dtype=np.float64),
+        np.ascontiguousarray(has_history, dtype=np.bool_),
+    )
+
+@njit(cache=True)
+def _compute_segmented_ewma_kernel(
+    values: np.ndarray, 
+    segment_ids: np.ndarray, 
+    new_weight: np.ndarray, 
+    old_weight: np.ndarray,
+    initial_ratings: np.ndarray, 
+    has_history: np.ndarray
+) -> tuple[np.ndarray, np.ndarray]:
+    # single pass over the rows, the ratings of the current segment being carried from row to row
+    nb_values, nb_alphas = len(values), len(new_weight)
+    ratings_before = np.zeros((nb_values, nb_alphas))
+    ratings_after = np.zeros((nb_values, nb_alphas))
+    ratings = np.zeros(nb_alphas)
+    segment = -1
+    is_started = False
+    for row in range(nb_values):
+        if row == 0 or segment_ids[row] != segment_ids[row - 1]:
+            segment += 1
+            ratings[:] = initial_ratings[segment]
+            is_started = has_history[segment]
+        for alpha_index in range(nb_alphas):
+            ratings_before[row, alpha_index] = ratings[alpha_index]
+            if is_started:
+                ratings[alpha_index] = (
+                    old_weight[alpha_index] * ratings[alpha_index] + new_weight[alpha_index] * values[row]
+                ) / (old_weight[alpha_index] + new_weight[alpha_index])
+            else:
+                ratings[alpha_index] = values[row]
+            ratings_after[row, alpha_index] = ratings[alpha_index]
+        is_started = True
+    return ratings_before, ratings_after
+
+def _get_ewma_weights(alphas: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    # same round trip through the center of mass as pandas, so the ratings match `ewm(adjust=False)` exactly
+    center_of_mass = (1 - alphas) / alphas
+    new_weight = 1. / (1. + center_of_mass)
+    old_weight = 1. - new_weight
+    return new_weight, old_weight
@@ -0,0 +1,66 @@
+import numpy as np
+import pandas as pd
+from scipy.special import ndtr
+
+def compute_win_probabilities(
+    mu_a: np.ndarray, sigma_a: np.ndarray, mu_b: np.ndarray, sigma_b: np.ndarray
+) -> np.ndarray:
+    """P(a > b) for gaussian ratings, i.e. norm.cdf(mu_diff / sigma_combined), broadcasting the inputs."""
+    mu_diff = np.asarray(mu_a) - np.asarray(mu_b)
+    sigma_combined = np.sqrt(np.square(sigma_a) + np.square(sigma_b))
+    return ndtr(mu_diff / sigma_combined)
+
+def compute_team_win_probabilities(
+    mus_a: np.ndarray, sigmas_a: np.ndarray, mus_b: np.ndarray, sigmas_b: np.ndarray
+) -> np.ndarray:
+    """P(team a beats team b) from player ratings of shape (n_matchups, team_size), the team rating being the sum of its players."""
+    return compute_win_probabilities(
+        np.sum(mus_a, axis=-1),
+        np.sqrt(np.sum(np.square(sigmas_a), axis=-1)),
+        np.sum(mus_b, axis=-1),
+        np.sqrt(np.sum(np.square(sigmas_b), axis=-1)),
+    )
+
+class MatchupEngine():
+    """
+    Win probabilities between players or teams from a rating state, indexed by player_id with
+    `skill_rating_mu`, `skill_rating_sigma` and `region` columns (e.g. `BayesianRater.get_player_ratings`).
+    The all-pairs matrices are cached per region until the ratings are updated.
+    """
+    def __init__(self, player_ratings: pd.DataFrame) -> None:
+        self.update_ratings(player_ratings)
+
+    def update_ratings(self, player_ratings: pd.DataFrame) -> None:
+        self.player_ratings = player_ratings
+        self.player_index = pd.Index(player_ratings.index)
+        self.mus = player_ratings["skill_rating_mu"].to_numpy(dtype=np.float64)
+        self.sigmas = player_ratings["skill_rating_sigma"].to_numpy(dtype=np.float64)
+        self.all_pairs_cache = {}
+
+    def compute_player_win_probabilities(self, player_ids_a: np.ndarray, player_ids_b: np.ndarray) -> np.ndarray:
+        """P(player a > player b) for each pair of the two arrays of player ids."""
+        slots_a, slots_b = self._get_slots(player_ids_a), self._get_slots(player_ids_b)
+        return compute_win_probabilities(self.mus[slots_a], self.sigmas[slots_a], self.mus[slots_b], self.sigmas[slots_b])
+
+    def compute_team_win_probabilities(self, rosters_a: np.ndarray, rosters_b: np.ndarray) -> np.ndarray:
+        """P(team a beats team b) for rosters of player ids of shape (n_matchups, team_size)."""
+        slots_a, slots_b = self._get_slots(rosters_a), self._get_slots(rosters_b)
+        return compute_team_win_probabilities(self.mus[slots_a], self.sigmas[slots_a], self.mus[slots_b], self.sigmas[slots_b])
+
+    def get_all_pairs_win_probabilities(self, region: str = None) -> pd.DataFrame:
+        """Matrix of P(row player > column player) for all the players of `region` (all players if None)."""
+        if region not in self.all_pairs_cache:
+            mask = np.ones(len(self.mus), dtype=bool) if region is None \
+                else (self.player_ratings["region"] == region).to_numpy()
+            mus, sigmas = self.mus[mask], self.sigmas[mask]
+            win_probabilities = compute_win_probabilities(mus[:, None], sigmas[:, None], mus[None, :], sigmas[None, :])
+            player_ids = self.player_index[mask]
+            self.all_pairs_cache[region] = pd.DataFrame(win_probabilities, index=player_ids, columns=player_ids)
+        return self.all_pairs_cache[region]
+
+    def _get_slots(self, player_ids: np.ndarray) -> np.ndarray:
+        player_ids = np.asarray(player_ids)
+        slots = self.player_index.get_indexer(player_ids.ravel()).reshape(player_ids.shape)
+        if (slots < 0).any():
+            raise KeyError(f"Unknown player ids: {np.unique(player_ids[slots < 0]).tolist()}")
+        return slots
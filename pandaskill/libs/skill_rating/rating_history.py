@@ -0,0 +1,80 @@
+import numpy as np
+import pandas as pd
+
+class RatingHistory():
+    """
+    Point-in-time view of the rating trajectories of `data`, indexed by (game_id, player_id) with a `date`
+    column (strings or datetimes). The rows are stored sorted by player and date, the rows of a player
+    keeping their order in `data` for equal dates, with the offsets of every player's rows. Each
+    (player, date) query is a binary search on a combined (player, date) key.
+    """
+    def __init__(self, data: pd.DataFrame) -> None:
+        player_ids = data.index.get_level_values("player_id").to_numpy()
+        self.has_datetime_dates = pd.api.types.is_datetime64_any_dtype(data["date"])
+        dates = self._to_comparable_dates(data["date"])
+        self.unique_dates = np.unique(dates)
+        date_codes = np.searchsorted(self.unique_dates, dates)
+
+        order = np.lexsort((date_codes, player_ids))
+        self.data = data.iloc[order]
+        unique_player_ids, nb_games = np.unique(player_ids[order], return_counts=True)
+        self.player_index = pd.Index(unique_player_ids)
+        self.offsets = np.r_[0, np.cumsum(nb_games)]
+        # the key of a row is in [1, nb_dates], the one of a query in [0, nb_dates], within the player stride
+        self.key_stride = len(self.unique_dates) + 1
+        self.keys = np.repeat(np.arange(len(unique_player_ids)), nb_games) * self.key_stride + date_codes[order] + 1
+
+    def get_positions_as_of(self, player_ids: np.ndarray, dates: np.ndarray | str) -> np.ndarray:
+        """Positions in `self.data` of the last game of every player at or before its date, -1 if none."""
+        slots = self.player_index.get_indexer(np.asarray(player_ids))
+        positions = self._get_last_positions(slots, dates)
+        is_found = (slots >= 0) & (positions >= self.offsets[slots])
+        return np.where(is_found, positions, -1)
+
+    def count_games(self, player_ids: np.ndarray, since: np.ndarray | str, dates: np.ndarray | str) -> np.ndarray:
+        """Number of games of every player after `since` and at or before its date."""
+        slots = self.player_index.get_indexer(np.asarray(player_ids))
+        nb_games = self._get_last_positions(slots, dates) - self._get_last_positions(slots, since)
+        return np.where(slots >= 0, nb_games, 0)
+
+    def get_ratings_as_of(
+        self, date: str, since: str = None, player_ids: np.ndarray = None, filters: dict = None
+    ) -> pd.DataFrame:
+        """
+        Last game row at or before `date` of the players (all by default) having played after `since`,
+        indexed by player_id with their `nb_games` in (since, date]. `filters` maps columns to the values
+        the last game rows must have, e.g. {"region": ["Korea"]} or {"team_name": ["T1", "Gen.G"]}.
+        """
+        player_ids = self.player_index.to_numpy() if player_ids is None else np.asarray(player_ids)
+        positions = self.get_positions_as_of(player_ids, date)
+        nb_games = self.count_games(player_ids, since, date) if since is not None \
+            else np.where(positions >= 0, positions - self.offsets[self.player_index.get_indexer(player_ids)] + 1, 0)
+
+        has_played = nb_games > 0
+        ratings = self.data.iloc[positions[has_played]].reset_index("game_id", drop=True)
+        ratings["nb_games"] = nb_games[has_played]
+        for column, values in (filters or {}).items():
+            ratings = ratings[ratings[column].isin(np.atleast_1d(values))]
+        return ratings
+
+    def get_games_between(self, since: str, date: str, player_ids: np.ndarray = None) -> pd.DataFrame:
+        """All the game rows of the players (all by default) after `since` and at or before `date`."""
+        slots = np.arange(len(self.player_index)) if player_ids is None \
+            else self.player_index.get_indexer(np.asarray(player_ids))
+        slots = slots[slots >= 0]
+        starts = self._get_last_positions(slots, since) + 1
+        ends = self._get_last_positions(slots, date) + 1
+        nb_games = np.maximum(ends - starts, 0)
+        positions = np.repeat(starts - np.cumsum(np.r_[0, nb_games[:-1]]), nb_games) + np.arange(nb_games.sum())
+        return self.data.iloc[positions]
+
+    def _get_last_positions(self, slots: np.ndarray, dates: np.ndarray | str) -> np.ndarray:
+        # number of distinct dates at or before every date, i.e. the query key within the player stride
+        date_codes = np.searchsorted(self.unique_dates, self._to_comparable_dates(dates), side="right")
+        return np.searchsorted(self.keys, slots * self.key_stride + date_codes, side="right") - 1
+
+    def _to_comparable_dates(self, dates: pd.Series | np.ndarray | str) -> np.ndarray:
+        # dates are compared as the stored ones, i.e. as strings for string dates
+        if self.has_datetime_dates:
+            return pd.to_datetime(np.atleast_1d(dates) if np.ndim(dates) == 0 else dates).to_numpy(dtype="datetime64[ns]")
+        return np.asarray(dates, dtype=str)
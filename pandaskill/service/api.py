@@ -0,0 +1,151 @@
+from pandaskill.experiments.general.utils import ARTIFACTS_DIR
+from pandaskill.experiments.run_skill_rating_experiment import meta_ffa_openskill_config
+from pandaskill.service.ingestion import GameIngestionService, create_ingestion_service
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+import json
+import logging
+import numpy as np
+from os.path import join
+import tornado.web
+
+class MicroBatcher():
+    """
+    Groups the rows of concurrent requests into one call of `predict`, flushed when `max_batch_size`
+    rows are pending or `max_wait_ms` after the first pending request. `predict` runs in a worker
+    thread of `executor` (a dedicated one by default) so that the event loop keeps accepting requests
+    meanwhile.
+    """
+    def __init__(
+        self, predict: callable, max_batch_size: int = 512, max_wait_ms: float = 2.0, executor: ThreadPoolExecutor = None
+    ) -> None:
+        self.predict = predict
+        self.max_batch_size = max_batch_size
+        self.max_wait_ms = max_wait_ms
+        self.pending_requests = []
+        self.nb_pending_rows = 0
+        self.flush_handle = None
+        self.nb_batches = 0
+        self.executor = ThreadPoolExecutor(max_workers=1) if executor is None else executor
+
+    async def submit(self, X: np.ndarray) -> np.ndarray:
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self.pending_requests.append((X, future))
+        self.nb_pending_rows += len(X)
+        if self.nb_pending_rows >= self.max_batch_size:
+            self._flush()
+        elif self.flush_handle is None:
+            self.flush_handle = loop.call_later(self.max_wait_ms / 1000, self._flush)
+        return await future
+
+    def _flush(self) -> None:
+        if self.flush_handle is not None:
+            self.flush_handle.cancel()
+            self.flush_handle = None
+        batch, self.pending_requests, self.nb_pending_rows = self.pending_requests, [], 0
+        if batch:
+            asyncio.ensure_future(self._run_batch(batch))
+
+    async def _run_batch(self, batch: list[tuple[np.ndarray, asyncio.Future]]) -> None:
+        self.nb_batches += 1
+        X = np.vstack([X for X, _ in batch])
+        try:
+            y = await asyncio.get_running_loop().run_in_executor(self.executor, self.predict, X)
+        except Exception as exception:
+            for _, future in batch:
+                future.set_exception(exception)
+            return
+        split_indices = np.cumsum([len(X) for X, _ in batch])[:-1]
+        for (_, future), y_request in zip(batch, np.split(y, split_indices)):
+            future.set_result(y_request)
+
+class BaseHandler(tornado.web.RequestHandler):
+    def initialize(self, service: GameIngestionService, batchers: dict, executor: ThreadPoolExecutor) -> None:
+        self.service = service
+        self.batchers = batchers
+        self.executor = executor
+
+    def write_json(self, data: dict | str) -> None:
+        self.set_header("Content-Type", "application/json")
+        self.write(data if isinstance(data, str) else json.dumps(data))
+
+class PerformanceScoresHandler(BaseHandler):
+    async def post(self) -> None:
+        """Body: {"role": <role, omitted for a single model>, "rows": [{<feature>: <value>, ...}, ...]}."""
+        try:
+            body = json.loads(self.request.body)
+            batcher = self.batchers[body.get("role")]
+            X = np.array([[row[feature] for feature in self.service.features] for row in body["rows"]], dtype=np.float64)
+        except (ValueError, KeyError, TypeError) as error:
+            raise tornado.web.HTTPError(400, reason=f"Invalid request: {error!r}")
+        performance_scores = await batcher.submit(X.reshape(-1, len(self.service.features)))
+        self.write_json({"performance_scores": performance_scores.tolist()})
+
+class PlayerRatingHandler(BaseHandler):
+    def get(self, player_id: str) -> None:
+        player_ratings = self.service.rater.get_player_ratings([int(player_id)])
+        if player_ratings["nb_games"].iloc[0] == 0:
+            raise tornado.web.HTTPError(404, reason=f"Unknown player {player_id}")
+        self.write_json(player_ratings.reset_index().iloc[0].to_json())
+
+class LeaderboardHandler(BaseHandler):
+    async def get(self) -> None:
+        region = self.get_argument("region", "global")
+        try:
+            limit = int(self.get_argument("limit", "100"))
+        except ValueError as error:
+            raise tornado.web.HTTPError(400, reason=f"Invalid limit: {error!r}")
+        if limit < 1:
+            raise tornado.web.HTTPError(400, reason=f"Invalid limit: {limit}, must be at least 1")
+        # an invalidated snapshot is rebuilt off the event loop, not to delay the batched scoring requests
+        leaderboard = await asyncio.get_running_loop().run_in_executor(
+            self.executor, self.service.leaderboard_cache.get, region
+        )
+        self.write_json(leaderboard.head(limit).to_json(orient="records"))
+
+class HealthHandler(BaseHandler):
+    def get(self) -> None:
+        self.write_json({
+            "status": "ok",
+            "features": self.service.features,
+            "roles": [role for role in self.batchers],
+            "nb_players": len(self.service.rater.skill_ratings),
+            "nb_batches": {str(role): batcher.nb_batches for role, batcher in self.batchers.items()},
+        })
+
+def create_application(service: GameIngestionService, max_batch_size: int = 512, max_wait_ms: float = 2.0) -> tornado.web.Application:
+    # one worker per model plus one for the leaderboard rebuilds
+    executor = ThreadPoolExecutor(max_workers=len(service.models) + 1)
+    batchers = {
+        role: MicroBatcher(model.compute_performance_scores, max_batch_size, max_wait_ms, executor)
+        for role, model in service.models.items()
+    }
+    handler_arguments = {"service": service, "batchers": batchers, "executor": executor}
+    return tornado.web.Application([
+        (r"/performance_scores", PerformanceScoresHandler, handler_arguments),
+        (r"/players/(\d+)/rating", PlayerRatingHandler, handler_arguments),
+        (r"/leaderboard", LeaderboardHandler, handler_arguments),
+        (r"/health", HealthHandler, handler_arguments),
+    ])
+
+async def serve(config: dict) -> None:
+    service = create_ingestion_service(config)
+    application = create_application(service, config["max_batch_size"], config["max_wait_ms"])
+    application.listen(config["port"])
+    logging.info(f"Serving on port {config['port']}")
+    await asyncio.Event().wait()
+
+
+if __name__ == "__main__":
+    config = {
+        "performance_score_experiment": "pscore",
+        "method": meta_ffa_openskill_config,
+        "state_dir": join(ARTIFACTS_DIR, "live", "state"),
+        "checkpoint_every": 100,
+        "leaderboard_min_nb_games": 10,
+        "port": 8888,
+        "max_batch_size": 512, # rows per model call
+        "max_wait_ms": 2.0, # max time a request waits for others to join its batch
+    }
+    asyncio.run(serve(config))
@@ -0,0 +1,236 @@
+from pandaskill.experiments.data.preprocess_data import (
+    clean_up_largest_killing_spree, clean_up_largest_multi_kill, compute_features,
+    drop_neutral_objective_events_with_none_killer_id
+)
+from pandaskill.experiments.general.utils import ARTIFACTS_DIR, load_data
+from pandaskill.experiments.run_skill_rating_experiment import meta_ffa_openskill_config
+from pandaskill.libs.skill_rating.bayesian import BayesianRater
+import ast
+import glob
+import joblib
+import logging
+import numpy as np
+import os
+from os.path import join, basename, exists
+import pandas as pd
+import queue
+import shutil
+import time
+
+PLAYER_INFO_COLUMNS = ["player_name", "team_name", "role", "date"]
+
+def load_performance_score_models(path: str) -> tuple[list[str], dict]:
+    """Loads the `models.joblib` saved by the performance score experiment, i.e. features and models per role."""
+    models_dict = joblib.load(path)
+    return models_dict["features"], models_dict["models"]
+
+class LeaderboardCache():
+    """
+    Leaderboard snapshots built from the rater state, per region and for all players ("global").
+    A snapshot is only rebuilt when requested after having been invalidated by a new game.
+    """
+    def __init__(self, rater: BayesianRater, player_info: pd.DataFrame = None, min_nb_games: int = 0) -> None:
+        self.rater = rater
+        self.player_info = {} if player_info is None else player_info.to_dict(orient="index")
+        self.min_nb_games = min_nb_games
+        self.snapshots = {}
+
+    def get(self, region: str = "global") -> pd.DataFrame:
+        if region not in self.snapshots:
+            self.snapshots[region] = self._build_leaderboard(region)
+        return self.snapshots[region]
+
+    def update(self, game_df: pd.DataFrame) -> None:
+        game_player_info = game_df.reset_index("game_id").loc[:, PLAYER_INFO_COLUMNS]
+        self.player_info.update(game_player_info.to_dict(orient="index"))
+        self.invalidate(game_df["region"].unique().tolist())
+
+    def invalidate(self, regions: list[str]) -> None:
+        for region in [*regions, "global"]:
+            self.snapshots.pop(region, None)
+
+    def _build_leaderboard(self, region: str) -> pd.DataFrame:
+        leaderboard = self.rater.get_player_ratings()
+        leaderboard = leaderboard[leaderboard["nb_games"] >= self.min_nb_games]
+        if region != "global":
+            leaderboard = leaderboard[leaderboard["region"] == region]
+        player_info = pd.DataFrame.from_dict(self.player_info, orient="index", columns=PLAYER_INFO_COLUMNS)
+        leaderboard = leaderboard.join(player_info.rename(columns={"date": "last_game_date"}))
+        leaderboard = leaderboard.sort_values("skill_rating", ascending=False).reset_index()
+        leaderboard.insert(0, "rank", leaderboard.index + 1)
+        return leaderboard
+
+class GameIngestionService():
+    """
+    Ingests finished games one at a time: features, performance scores and rating updates are
+    computed for the new game only, the rating updates are appended to `rating_updates.csv` and
+    the leaderboards of the game regions are invalidated. Per-game latency is recorded.
+    """
+    def __init__(
+        self,
+        features: list[str],
+        models: dict,
+        rater: BayesianRater,
+        leaderboard_cache: LeaderboardCache,
+        state_dir: str,
+        checkpoint_every: int = 100,
+    ) -> None:
+        self.features = features
+        self.models = models
+        self.rater = rater
+        self.leaderboard_cache = leaderboard_cache
+        self.state_dir = state_dir
+        self.checkpoint_every = checkpoint_every
+        self.latencies = []
+        os.makedirs(state_dir, exist_ok=True)
+
+    def ingest_game(self, stat_df: pd.DataFrame, event_df: pd.DataFrame) -> pd.DataFrame:
+        """
+        `stat_df` has the 10 rows of the game indexed by (game_id, player_id) with the raw stats and
+        metadata columns, and `event_df` its events, as in the raw data. Players without a `region`
+        keep their last known one.
+        """
+        start_time = time.perf_counter()
+
+        game_df = self._compute_game_features(stat_df, event_df)
+        game_df = self._compute_performance_scores(game_df)
+        game_df = game_df.sort_values("win", ascending=False, kind="stable")
+        rating_updates = self.rater.rate_game(game_df)
+        rating_updates = rating_updates.join(game_df["performance_score"])
+        self._save_rating_updates(rating_updates)
+        self.leaderboard_cache.update(game_df)
+
+        self.latencies.append(time.perf_counter() - start_time)
+        if len(self.latencies) % self.checkpoint_every == 0:
+            self.save_state()
+        return rating_updates
+
+    def run_from_queue(self, game_queue: queue.Queue) -> None:
+        """Ingests (stat_df, event_df) items until a None item is received."""
+        while (item := game_queue.get()) is not None:
+            self._ingest_safely(*item)
+        self.save_state()
+
+    def run_from_directory(self, drop_dir: str, poll_interval: float = 1.0, max_idle_polls: int = None) -> None:
+        """
+        Ingests the `<game_id>_stats.csv` and `<game_id>_events.csv` files dropped in `drop_dir`, then
+        moves them to `processed/` (or `failed/`). Stops after `max_idle_polls` polls without new game.
+        """
+        nb_idle_polls = 0
+        while max_idle_polls is None or nb_idle_polls < max_idle_polls:
+            game_files = _list_dropped_games(drop_dir)
+            nb_idle_polls = 0 if game_files else nb_idle_polls + 1
+            for stat_path, event_path in game_files:
+                stat_df, event_df = _read_dropped_game(stat_path, event_path)
+                success = self._ingest_safely(stat_df, event_df)
+                saving_dir = join(drop_dir, "processed" if success else "failed")
+                os.makedirs(saving_dir, exist_ok=True)
+                for path in [stat_path, event_path]:
+                    shutil.move(path, join(saving_dir, basename(path)))
+            if not game_files:
+                time.sleep(poll_interval)
+        self.save_state()
+
+    def get_latency_summary(self) -> dict:
+        latencies_ms = np.array(self.latencies) * 1000
+        if len(latencies_ms) == 0:
+            return {"nb_games": 0}
+        return {
+            "nb_games": len(latencies_ms),
+            "mean_ms": float(latencies_ms.mean()),
+            "p50_ms": float(np.percentile(latencies_ms, 50)),
+            "p99_ms": float(np.percentile(latencies_ms, 99)),
+        }
+
+    def save_state(self) -> None:
+        self.rater.save(join(self.state_dir, "bayesian_rater.joblib"))
+        joblib.dump(self.leaderboard_cache.player_info, join(self.state_dir, "player_info.joblib"))
+        logging.info(f"Ingestion latency: {self.get_latency_summary()}")
+
+    def _ingest_safely(self, stat_df: pd.DataFrame, event_df: pd.DataFrame) -> bool:
+        try:
+            self.ingest_game(stat_df, event_df)
+            return True
+        except Exception:
+            game_ids = stat_df.index.get_level_values("game_id").unique().tolist()
+            logging.exception(f"Failed to ingest game {game_ids}")
+            return False
+
+    def _compute_game_features(self, stat_df: pd.DataFrame, event_df: pd.DataFrame) -> pd.DataFrame:
+        stat_df = stat_df.copy()
+        if "region" not in stat_df.columns:
+            player_ids = stat_df.index.get_level_values("player_id")
+            stat_df["region"] = [self.rater.player_regions.get(player_id, "Other") for player_id in player_ids]
+        stat_df = clean_up_largest_killing_spree(stat_df)
+        stat_df = clean_up_largest_multi_kill(stat_df)
+        event_df, _ = drop_neutral_objective_events_with_none_killer_id(event_df)
+        return compute_features(stat_df, event_df.copy(), nb_processes=1)
+
+    def _compute_performance_scores(self, game_df: pd.DataFrame) -> pd.DataFrame:
+        game_df = game_df.copy()
+        for role, model in self.models.items():
+            role_mask = np.ones(len(game_df), dtype=bool) if role is None else (game_df["role"] == role).values
+            if role_mask.any():
+                X = game_df.loc[role_mask, self.features].values
+                game_df.loc[role_mask, "performance_score"] = model.compute_performance_scores(X)
+        return game_df
+
+    def _save_rating_updates(self, rating_updates: pd.DataFrame) -> None:
+        path = join(self.state_dir, "rating_updates.csv")
+        rating_updates.to_csv(path, mode="a", header=not exists(path))
+
+def create_ingestion_service(config: dict) -> GameIngestionService:
+    """Loads the models and the rater state, replaying the rating history if there is no checkpoint."""
+    performance_score_dir = join(ARTIFACTS_DIR, "experiments", config["performance_score_experiment"], "performance_score")
+    features, models = load_performance_score_models(join(performance_score_dir, "models.joblib"))
+
+    rater_path = join(config["state_dir"], "bayesian_rater.joblib")
+    player_info_path = join(config["state_dir"], "player_info.joblib")
+    if exists(rater_path):
+        logging.info(f"Loading rater state from `{config['state_dir']}`")
+        rater = BayesianRater.load(rater_path)
+        player_info = pd.DataFrame.from_dict(joblib.load(player_info_path), orient="index")
+    else:
+        logging.info(f"Replaying the rating history to initialize the rater state")
+        data = load_data(
+            load_features=True,
+            performance_score_path=join(performance_score_dir, "performance_scores.csv"),
+            drop_na=True
+        )
+        rater = BayesianRater(**config["method"]["parameters"])
+        rater.rate_games(data)
+        player_info = data.reset_index("game_id").groupby("player_id")[PLAYER_INFO_COLUMNS].last()
+
+    leaderboard_cache = LeaderboardCache(rater, player_info, config["leaderboard_min_nb_games"])
+    return GameIngestionService(features, models, rater, leaderboard_cache, config["state_dir"], config["checkpoint_every"])
+
+def _list_dropped_games(drop_dir: str) -> list[tuple[str, str]]:
+    game_files = []
+    for stat_path in sorted(glob.glob(join(drop_dir, "*_stats.csv"))):
+        event_path = stat_path[:-len("_stats.csv")] + "_events.csv"
+        if exists(event_path):
+            game_files.append((stat_path, event_path))
+    return game_files
+
+def _read_dropped_game(stat_path: str, event_path: str) -> tuple[pd.DataFrame, pd.DataFrame]:
+    stat_df = pd.read_csv(stat_path, index_col=(0,1))
+    event_df = pd.read_csv(event_path, index_col=0)
+    event_df['assisting_player_ids'] = event_df['assisting_player_ids'].apply(lambda x: ast.literal_eval(x) if isinstance(x, str) else x)
+    return stat_df, event_df
+
+
+if __name__ == "__main__":
+    config = {
+        "performance_score_experiment": "pscore",
+        "method": meta_ffa_openskill_config,
+        "drop_dir": join(ARTIFACTS_DIR, "live", "drop"),
+        "state_dir": join(ARTIFACTS_DIR, "live", "state"),
+        "poll_interval": 1.0,
+        "checkpoint_every": 100, # games between two checkpoints of the rater state
+        "leaderboard_min_nb_games": 10,
+    }
+    service = create_ingestion_service(config)
+
+    logging.info(f"Watching `{config['drop_dir']}` for new games")
+    os.makedirs(config["drop_dir"], exist_ok=True)
+    service.run_from_directory(config["drop_dir"], config["poll_interval"])
@@ -0,0 +1,60 @@
+import asyncio
+import json
+import logging
+import numpy as np
+import time
+from tornado.httpclient import AsyncHTTPClient, HTTPRequest
+
+logging.basicConfig(level=logging.INFO)
+
+async def run_load_test(config: dict) -> dict:
+    """Sends `nb_requests` scoring requests with `concurrency` clients and reports latency and throughput."""
+    client = AsyncHTTPClient(max_clients=config["concurrency"])
+    health = json.loads((await client.fetch(f"{config['url']}/health")).body)
+    rng = np.random.default_rng(config["random_state"])
+
+    requests = []
+    for _ in range(config["nb_requests"]):
+        rows = [
+            dict(zip(health["features"], rng.random(len(health["features"])).tolist()))
+            for _ in range(config["rows_per_request"])
+        ]
+        requests.append(json.dumps({"role": health["roles"][rng.integers(len(health["roles"]))], "rows": rows}))
+
+    latencies = []
+    request_iterator = iter(requests)
+
+    async def run_client() -> None:
+        for body in request_iterator:
+            start_time = time.perf_counter()
+            await client.fetch(HTTPRequest(f"{config['url']}/performance_scores", method="POST", body=body))
+            latencies.append(time.perf_counter() - start_time)
+
+    start_time = time.perf_counter()
+    await asyncio.gather(*[run_client() for _ in range(config["concurrency"])])
+    duration = time.perf_counter() - start_time
+
+    latencies_ms = np.array(latencies) * 1000
+    health_after = json.loads((await client.fetch(f"{config['url']}/health")).body)
+    return {
+        "nb_requests": len(latencies),
+        "concurrency": config["concurrency"],
+        "rows_per_request": config["rows_per_request"],
+        "p50_ms": float(np.percentile(latencies_ms, 50)),
+        "p99_ms": float(np.percentile(latencies_ms, 99)),
+        "requests_per_second": len(latencies) / duration,
+        "rows_per_second": len(latencies) * config["rows_per_request"] / duration,
+        "nb_model_calls": sum(health_after["nb_batches"].values()) - sum(health["nb_batches"].values()),
+    }
+
+
+if __name__ == "__main__":
+    config = {
+        "url": "http://localhost:8888",
+        "nb_requests": 2000,
+        "concurrency": 64,
+        "rows_per_request": 10, # one game
+        "random_state": 42,
+    }
+    results = asyncio.run(run_load_test(config))
+    logging.info(f"Load test results: {results}")
@@ -0,0 +1,143 @@
+import numpy as np
+import pandas as pd
+import pytest
+from pandaskill.app.data import EntityTrajectoryCache, TRAJECTORY_COLUMNS, create_game_catalog, get_game_rows
+from pandaskill.app.misc import compute_rating_lower_bound
+
+def _create_data():
+    # (game_id, league_name, series_name, tournament_name, match_id, [team_name, ...]), one player per team
+    games = [
+        (10, "LCK", "LCK Summer 2024", "Playoffs", 1, ["T1", "Hanwha Life Esports"]),
+        (11, "LCK", "LCK Summer 2024", "Playoffs", 1, ["T1", "Hanwha Life Esports"]),
+        (12, "LEC", "LEC Summer 2024", "Regular Season", 2, ["G2 Esports", "Fnatic"]),
+        (13, "LCK", "LCK Summer 2024", "Regular Season", 3, ["Gen.G", "T1"]),
+        (14, "LCK", "LCK Summer 2024", "Playoffs", 4, ["Gen.G", "Hanwha Life Esports"]),
+    ]
+    team_ids = {"T1": 1, "Hanwha Life Esports": 2, "G2 Esports": 3, "Fnatic": 4, "Gen.G": 5}
+    rows = [
+        (game_id, team_ids[team_name], league_name, series_name, tournament_name, match_id, team_name)
+        for game_id, league_name, series_name, tournament_name, match_id, team_names in games
+        for team_name in team_names
+    ]
+    columns = ["game_id", "player_id", "league_name", "series_name", "tournament_name", "match_id", "team_name"]
+    return pd.DataFrame(rows, columns=columns).set_index(["game_id", "player_id"]).sort_index()
+
+def test_create_game_catalog():
+    game_catalog = create_game_catalog(_create_data())
+
+    assert game_catalog["games"] == {
+        "LCK": {
+            "LCK Summer 2024": {
+                "Playoffs": {
+                    "10 - T1 vs Hanwha Life Esports - Game 1": 10,
+                    "11 - T1 vs Hanwha Life Esports - Game 2": 11,
+                    "14 - Hanwha Life Esports vs Gen.G - Game 1": 14,
+                },
+                "Regular Season": {"13 - T1 vs Gen.G - Game 1": 13},
+            },
+        },
+        "LEC": {"LEC Summer 2024": {"Regular Season": {"12 - G2 Esports vs Fnatic - Game 1": 12}}},
+    }
+    assert game_catalog["game_ids"].tolist() == [10, 11, 12, 13, 14]
+    assert game_catalog["offsets"].tolist() == [0, 2, 4, 6, 8, 10]
+
+def test_create_game_catalog_requires_sorted_data():
+    data = _create_data().iloc[::-1]
+
+    with pytest.raises(ValueError):
+        create_game_catalog(data)
+
+def test_get_game_rows():
+    data = _create_data()
+    game_catalog = create_game_catalog(data)
+
+    game_rows = get_game_rows(data, game_catalog, 13)
+
+    pd.testing.assert_frame_equal(game_rows, data.loc[13])
+    assert get_game_rows(data, game_catalog, 99).empty
+
+def test_get_game_rows_requires_the_catalog_data():
+    data = _create_data()
+    game_catalog = create_game_catalog(data)
+
+    with pytest.raises(ValueError):
+        get_game_rows(data.drop(index=11, level="game_id"), game_catalog, 13)
+
+def _create_rating_data():
+    rng = np.random.default_rng(0)
+    # (game_id, date, [(team_id, team_name), ...]), two players per team, game ids not in date order
+    games = [
+        (1, "2024-01-03", [(1, "T1"), (2, "Gen.G")]),
+        (2, "2024-01-01", [(1, "T1"), (3, "Hanwha Life Esports")]),
+        (3, "2024-01-02", [(2, "Gen.G"), (3, "Hanwha Life Esports")]),
+        (4, "2024-01-05", [(3, "Hanwha Life Esports"), (1, "T1")]),
+    ]
+    rows = [
+        (game_id, team_id * 10 + player_index, f"Player {team_id * 10 + player_index}", team_id, team_name, date)
+        for game_id, date, teams in games
+        for team_id, team_name in teams
+        for player_index in range(2)
+    ]
+    data = pd.DataFrame(rows, columns=["game_id", "player_id", "player_name", "team_id", "team_name", "date"])
+    data["date"] = pd.to_datetime(data["date"])
+    data["team_name"] = data["team_name"].astype("category")
+    data["series_name"] = "LCK Spring 2024"
+    data["tournament_name"] = "Regular Season"
+    data["performance_score"] = rng.random(len(data)) * 100
+    data["skill_rating_after_mu"] = rng.normal(25, 5, len(data))
+    data["skill_rating_after_sigma"] = rng.random(len(data)) + 1
+    data["skill_rating_after"] = data["skill_rating_after_mu"] - 3 * data["skill_rating_after_sigma"]
+    return data.set_index(["game_id", "player_id"]).sort_index()
+
+def _rename_rating_columns(data):
+    return data.reset_index().rename(columns={
+        "skill_rating_after_mu": "skill_rating_mu",
+        "skill_rating_after_sigma": "skill_rating_sigma",
+        "skill_rating_after": "skill_rating",
+        "performance_score": "pscore",
+    })
+
+def _sort_trajectories(ratings):
+    return ratings[TRAJECTORY_COLUMNS].sort_values(["entity_name", "date"]).reset_index(drop=True)
+
+def test_entity_trajectory_cache_player_trajectories():
+    data = _create_rating_data()
+    trajectory_cache = EntityTrajectoryCache(data)
+
+    ratings = trajectory_cache.get_many("player", [10, 31])
+
+    expected_ratings = _rename_rating_columns(data)
+    expected_ratings = expected_ratings[expected_ratings["player_id"].isin([10, 31])].copy()
+    expected_ratings["entity_name"] = expected_ratings["player_name"]
+    pd.testing.assert_frame_equal(_sort_trajectories(ratings), _sort_trajectories(expected_ratings))
+    assert ratings.groupby("entity_name")["date"].apply(lambda dates: dates.is_monotonic_increasing).all()
+
+def test_entity_trajectory_cache_team_trajectories():
+    data = _create_rating_data()
+    trajectory_cache = EntityTrajectoryCache(data)
+
+    ratings = trajectory_cache.get_many("team", [trajectory_cache.name_to_id["team"]["T1"], 3])
+
+    team_data = _rename_rating_columns(data)
+    team_data = team_data[team_data["team_id"].isin([1, 3])].copy()
+    team_data["entity_name"] = team_data["team_name"]
+    expected_ratings = team_data.groupby(["entity_name", "game_id", "date"], observed=True).agg(
+        series_name=("series_name", "first"),
+        tournament_name=("tournament_name", "first"),
+        pscore=("pscore", "mean"),
+        skill_rating_mu=("skill_rating_mu", "mean"),
+        skill_rating_sigma=("skill_rating_sigma", lambda x: np.sqrt(np.mean(np.square(x)))),
+    ).reset_index()
+    expected_ratings["skill_rating"] = compute_rating_lower_bound(expected_ratings["skill_rating_mu"], expected_ratings["skill_rating_sigma"])
+    pd.testing.assert_frame_equal(
+        _sort_trajectories(ratings), _sort_trajectories(expected_ratings), check_categorical=False
+    )
+
+def test_entity_trajectory_cache_unknown_entity():
+    trajectory_cache = EntityTrajectoryCache(_create_rating_data())
+
+    assert trajectory_cache.get("player", 99).empty
+    assert trajectory_cache.get("team", 99).columns.tolist() == TRAJECTORY_COLUMNS
+
+if __name__ == '__main__':
+    pytest.main([__file__])
@@ -0,0 +1,134 @@
+import pandas as pd
+import pytest
+from pandaskill.experiments.data.player_region import (
+    attribute_player_in_game_to_region, attribute_player_region_change, load_region_correction_rules,
+    manually_correct_team_region
+)
+
+def _create_games_df():
+    # (game_id, date, league_name, series_name, tournament_name, [(team_id, team_name), ...]), two players per team
+    games = [
+        (1, "2019-01-20", "LCK", "LCK Spring 2019", "Regular Season", [(1, "Gen.G"), (6, "T1")]),
+        (2, "2019-01-25", "LEC", "LEC Spring 2019", "Regular Season", [(2, "G2 Esports"), (7, "Fnatic")]),
+        (3, "2019-02-01", "Rift Rivals", "Rift Rivals 2019", "Group Stage", [(5, "Team Liquid"), (2, "G2 Esports")]),
+        (4, "2019-05-10", "MSI", "MSI 2019", "Group Stage", [(1, "Gen.G"), (2, "G2 Esports")]),
+        (5, "2019-06-01", "LCS", "LCS Summer 2019", "Regular Season", [(5, "Team Liquid"), (8, "Cloud9")]),
+        (6, "2019-06-10", "LCK", "LCK Summer 2019", "Regular Season", [(1, "Gen.G"), (6, "T1")]),
+        (7, "2019-07-01", "Prime League", "Prime League 1st Division Summer 2019", "Regular Season", [(4, "Random Team"), (9, "Other Team")]),
+        (8, "2019-12-01", "KeSPA", "KeSPA Cup 2019", "Group Stage", [(3, "Griffin"), (6, "T1")]),
+        (9, "2019-12-15", "Worlds", "World Championship 2019", "Playoffs", [(1, "Gen.G"), (7, "Fnatic")]),
+        (10, "2020-01-10", "LCK", "LCK Spring 2020", "Regular Season", [(1, "Gen.G"), (3, "Griffin")]),
+    ]
+    rows = [
+        [game_id, team_id * 10 + player_index, f"{date} 12:00:00.000", league_name, series_name, tournament_name, team_id, team_name]
+        for game_id, date, league_name, series_name, tournament_name, teams in games
+        for team_id, team_name in teams
+        for player_index in range(2)
+    ]
+    columns = ["game_id", "player_id", "date", "league_name", "series_name", "tournament_name", "team_id", "team_name"]
+    return pd.DataFrame(rows, columns=columns).set_index(["game_id", "player_id"])
+
+def test_attribute_player_in_game_to_region():
+    # regions given by the implementation resolving every row with a scan of the team lookup
+    expected_regions_per_game = {
+        1: {1: "Korea", 6: "Korea"},
+        2: {2: "Europe", 7: "Europe"},
+        3: {5: "North America", 2: "Europe"}, # Team Liquid played regular seasons before the data
+        4: {1: "Korea", 2: "Europe"},
+        5: {5: "North America", 8: "North America"},
+        6: {1: "Korea", 6: "Korea"},
+        7: {4: "Other", 9: "Other"}, # never played a main league regular season
+        8: {3: "Korea", 6: "Korea"}, # Griffin played regular seasons before the data
+        9: {1: "Korea", 7: "Europe"},
+        10: {1: "Other", 3: "Other"}, # the splits end at the last date of the data, excluded
+    }
+    df = _create_games_df()
+
+    df = attribute_player_in_game_to_region(df)
+
+    expected_regions = [
+        expected_regions_per_game[game_id][team_id]
+        for game_id, team_id in zip(df.index.get_level_values("game_id"), df["team_id"])
+    ]
+    assert df["region"].tolist() == expected_regions
+
+def _create_rules_df():
+    return pd.DataFrame([
+        ("KeSPA Cup 2019", "T1", "Korea"),
+        ("Season Kickoff EMEA 2023", None, "Europe"),
+        ("Season Kickoff EMEA 2023", "Fnatic", "Other"),
+    ], columns=["series_name", "team_name", "region"])
+
+def _create_region_df():
+    return pd.DataFrame([
+        ("KeSPA Cup 2019", "T1", "Other"),
+        ("KeSPA Cup 2019", "Griffin", "Other"),
+        ("Season Kickoff EMEA 2023", "G2 Esports", "Other"),
+        ("Season Kickoff EMEA 2023", "Fnatic", "Europe"),
+        ("LCK Spring 2019", "T1", "Korea"),
+    ], columns=["series_name", "team_name", "region"])
+
+def test_manually_correct_team_region():
+    df = manually_correct_team_region(_create_region_df(), _create_rules_df())
+
+    assert df["region"].tolist() == ["Korea", "Other", "Europe", "Other", "Korea"]
+
+def test_manually_correct_team_region_keeps_categorical_dtype():
+    df = _create_region_df().astype("category")
+    df["region"] = df["region"].cat.set_categories(["Korea", "Other"])
+
+    df = manually_correct_team_region(df, _create_rules_df())
+
+    assert isinstance(df["region"].dtype, pd.CategoricalDtype)
+    assert df["region"].cat.categories.tolist() == ["Korea", "Other", "Europe"]
+    assert df["region"].tolist() == ["Korea", "Other", "Europe", "Other", "Korea"]
+
+def test_load_region_correction_rules():
+    rules_df = load_region_correction_rules()
+
+    assert not rules_df.duplicated(["series_name", "team_name"]).any()
+    assert rules_df.loc[rules_df["series_name"] == "Season Kickoff Korea 2023", "team_name"].isna().all()
+
+def test_load_region_correction_rules_raises_on_duplicated_keys(tmp_path):
+    path = tmp_path / "rules.yaml"
+    path.write_text(
+        "- {series_name: KeSPA Cup 2019, team_name: T1, region: Korea}\n"
+        "- {series_name: KeSPA Cup 2019, team_name: T1, region: Other}\n"
+    )
+
+    with pytest.raises(ValueError):
+        load_region_correction_rules(str(path))
+
+def _create_region_change_df():
+    rows = [
+        (3, 1, "2020-01-03", "Korea"),
+        (1, 1, "2020-01-01", "Korea"),
+        (2, 2, "2020-01-02", "Europe"),
+        (2, 1, "2020-01-02", "China"),
+        (4, 2, "2020-01-04", "North America"),
+        (1, 2, "2020-01-01", "Europe"),
+    ]
+    return pd.DataFrame(rows, columns=["game_id", "player_id", "date", "region"]).set_index(["game_id", "player_id"])
+
+def test_attribute_player_region_change():
+    df = _create_region_change_df()
+
+    df = attribute_player_region_change(df)
+
+    assert df["date"].tolist() == sorted(df["date"])
+    assert df["region_change"].to_dict() == {
+        (1, 1): False, (1, 2): False, (2, 1): True, (2, 2): False, (3, 1): True, (4, 2): True
+    }
+
+def test_attribute_player_region_change_with_last_player_regions():
+    df = _create_region_change_df()
+    last_player_regions = pd.Series({1: "China"}).rename_axis("player_id")
+
+    df = attribute_player_region_change(df, last_player_regions)
+
+    assert df["region_change"].to_dict() == {
+        (1, 1): True, (1, 2): False, (2, 1): True, (2, 2): False, (3, 1): True, (4, 2): True
+    }
+
+if __name__ == '__main__':
+    pytest.main([__file__])
@@ -0,0 +1,85 @@
+import numpy as np
+import pandas as pd
+import pytest
+from pandaskill.experiments.skill_rating.visualization import (
+    _get_skill_ratings_of_region_at_snapshots, construct_skill_ratings_for_region_after_series
+)
+
+def _create_ratings_df():
+    # (game_id, player_id, date, series_name, region, meta mu before, meta mu after, contextual mu after)
+    rows = [
+        (1, 5, "2019-06-01 12:00:00.000", "LCK Summer 2019", "Korea", 9.0, 9.0, 30.0),
+        (2, 1, "2020-01-01 12:00:00.000", "LCK Spring 2020", "Korea", 10.0, 10.0, 20.0),
+        (2, 2, "2020-01-01 12:00:00.000", "LCK Spring 2020", "Korea", 10.0, 10.0, 15.0),
+        (3, 3, "2020-02-01 12:00:00.000", "LEC Spring 2020", "Europe", 5.0, 5.0, 18.0),
+        (3, 4, "2020-02-01 12:00:00.000", "LEC Spring 2020", "Europe", 5.0, 5.0, 12.0),
+        (4, 1, "2020-05-01 12:00:00.000", "MSI 2020", "Korea", 10.0, 11.0, 21.0),
+        (4, 3, "2020-05-01 12:00:00.000", "MSI 2020", "Europe", 5.0, 4.0, 17.0),
+        (5, 2, "2020-05-02 12:00:00.000", "MSI 2020", "Korea", 11.0, 12.0, 16.0),
+        (5, 4, "2020-05-02 12:00:00.000", "MSI 2020", "Europe", 4.0, 3.0, 11.0),
+    ]
+    df = pd.DataFrame(rows, columns=[
+        "game_id", "player_id", "date", "series_name", "region", "meta_rating_before_mu", "meta_rating_after_mu", 
+        "contextual_rating_after_mu"
+    ]).set_index(["game_id", "player_id"])
+    df["meta_rating_after_sigma"] = 4.0
+    df["contextual_rating_after_sigma"] = 3.0
+    df["meta_rating_before"] = df["meta_rating_before_mu"] - 3 * 4.0
+    df["meta_rating_after"] = df["meta_rating_after_mu"] - 3 * 4.0
+    return df
+
+def test_construct_skill_ratings_for_region_after_series():
+    ratings_df = _create_ratings_df()
+
+    region_ratings_df, nb_interregion_games = construct_skill_ratings_for_region_after_series(ratings_df)
+
+    # the meta rating of a region is the one after its latest game, e.g. game 5 for player 1, and player 5
+    # last played more than 6 months before the end of the series
+    combined_sigma = np.sqrt(3.0**2 + 4.0**2)
+    expected_region_ratings_df = pd.DataFrame(
+        {
+            "skill_rating_after": [
+                21.0 + 12.0 - 3 * combined_sigma, 16.0 + 12.0 - 3 * combined_sigma,
+                17.0 + 3.0 - 3 * combined_sigma, 11.0 + 3.0 - 3 * combined_sigma,
+            ],
+            "region": ["Korea", "Korea", "Europe", "Europe"],
+            "series_name": ["MSI 2020"] * 4,
+        },
+        index=pd.Index([1, 2, 3, 4], name="player_id"),
+    )
+    pd.testing.assert_frame_equal(region_ratings_df, expected_region_ratings_df)
+    assert nb_interregion_games.to_dict() == {"MSI 2020": 2}
+
+def test_get_skill_ratings_of_region_at_snapshots_before_the_first_game():
+    ratings_df = _create_ratings_df()
+    snapshots_df = pd.DataFrame({
+        "series_name": ["LEC Spring 2019", "MSI 2020"],
+        "region": ["Europe", "Europe"],
+        "date": ["2019-03-01 12:00:00.000", "2020-05-01 12:00:00.000"],
+        "since": ["2018-09-02 12:00:00", "2019-11-03 12:00:00"],
+    })
+
+    snapshots = _get_skill_ratings_of_region_at_snapshots(ratings_df[ratings_df["region"] == "Europe"], snapshots_df)
+
+    assert snapshots[0].empty
+    assert snapshots[1].index.tolist() == [3, 4]
+    assert snapshots[1]["skill_rating_after"].tolist() == pytest.approx([17.0 + 4.0 - 15.0, 12.0 + 4.0 - 15.0])
+
+def test_get_skill_ratings_of_region_at_snapshots_includes_the_since_boundary():
+    ratings_df = _create_ratings_df()
+    # player 3 last played exactly at `since`, player 4 just before
+    snapshots_df = pd.DataFrame({
+        "series_name": ["LEC Spring 2020"],
+        "region": ["Europe"],
+        "date": ["2020-03-01 12:00:00.000"],
+        "since": ["2020-02-01 12:00:00.000"],
+    })
+    europe_ratings_df = ratings_df[ratings_df["region"] == "Europe"].copy()
+    europe_ratings_df.loc[(3, 4), "date"] = "2020-02-01 11:59:59.999"
+
+    snapshots = _get_skill_ratings_of_region_at_snapshots(europe_ratings_df, snapshots_df)
+
+    assert snapshots[0].index.tolist() == [3]
+
+if __name__ == '__main__':
+    pytest.main([__file__])
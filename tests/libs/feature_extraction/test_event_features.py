@@ -145,6 +145,32 @@ def test__evaluate_deaths_worthlessness():
 
     mock_pool.imap.assert_called_once()
 
+def test__evaluate_deaths_worthlessness_without_pool():
+    event_df = pd.DataFrame(
+        [
+            [1, 1, "player_kill"],
+            [2, 1, "non_player_kill"],
+            [3, 2, "non_player_kill"],
+            [4, 2, "player_kill"],
+        ],
+        columns=["id", "game_id", "event_type"]
+    )
+    game_results = [
+        pd.Series([False], index=[1], name='death_is_worth'),
+        pd.Series([True], index=[4], name='death_is_worth')
+    ]
+
+    with patch('multiprocessing.Pool') as pool_mock:
+        with patch(
+            'pandaskill.libs.feature_extraction.event_features._evaluate_deaths_worthlessness_for_game', 
+            side_effect=game_results
+        ) as evaluate_mock:
+            death_is_worth = _evaluate_deaths_worthlessness(event_df, window=30, nb_processes=1)
+
+    pd.testing.assert_series_equal(death_is_worth, pd.concat(game_results))
+    assert evaluate_mock.call_count == 2
+    pool_mock.assert_not_called()
+
 def test__evaluate_deaths_worthlessness_for_game():
     event_df = pd.DataFrame(
         [
@@ -73,4 +73,17 @@ def test_compute_shap_values(sample_data, base_model):
     explainer, shap_values = base_model.compute_shap_values(X)
     
     assert explainer is not None
-    assert shap_values.shape == (X.shape[0], X.shape[1])
\ No newline at end of file
+    assert shap_values.shape == (X.shape[0], X.shape[1])
+
+def test_compute_shap_values_with_bounded_background(sample_data, base_model):
+    X, y = sample_data
+    base_model.fit(X, y)
+    explainer, shap_values = base_model.compute_shap_values(X, max_background_samples=10)
+
+    assert shap_values.shape == (X.shape[0], X.shape[1])
+
+def test_compute_shap_values_unsupported_algorithm(sample_data, base_model):
+    X, y = sample_data
+    base_model.fit(X, y)
+    with pytest.raises(ValueError):
+        base_model.compute_shap_values(X, algorithm="unknown")
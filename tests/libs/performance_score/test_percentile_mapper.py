@@ -1,7 +1,10 @@
 
-from pandaskill.libs.performance_score.percentile_mapper import PercentileMapper
+from pandaskill.libs.performance_score.percentile_mapper import (
+    DEFAULT_N_QUANTILES, PercentileMapper, MultiColumnPercentileMapper
+)
 import numpy as np
 import pytest
+from scipy import stats
 
 @pytest.fixture
 def probabilities():
@@ -30,3 +33,43 @@ def test_percentile_mapper_empty_input(percentile_mapper):
     mapped_scores = percentile_mapper.map(empty_scores)
     
     assert mapped_scores.size == 0
+
+def test_percentile_mapper_matches_scipy_with_ties(percentile_mapper):
+    reference = np.array([1, 2, 2, 2, 3, 5, 5, 8], dtype=float)
+    percentile_mapper.train(reference)
+    new_values = np.array([0, 1, 2, 4, 5, 8, 9], dtype=float)
+    expected_percentiles = [stats.percentileofscore(reference, value) for value in new_values]
+
+    assert np.allclose(percentile_mapper.map(new_values), expected_percentiles)
+
+def test_multi_column_percentile_mapper_exact():
+    rng = np.random.default_rng(42)
+    X = rng.normal(size=(500, 3))
+    X_new = rng.normal(size=(50, 3))
+    multi_column_mapper = MultiColumnPercentileMapper(n_quantiles=None).train(X)
+    percentiles = multi_column_mapper.map(X_new)
+
+    for column_index in range(X.shape[1]):
+        expected_percentiles = PercentileMapper().train(X[:, column_index]).map(X_new[:, column_index])
+        assert np.allclose(percentiles[:, column_index], expected_percentiles)
+
+def test_multi_column_percentile_mapper_quantile_grid(probabilities):
+    X = np.stack([probabilities, np.round(probabilities * 4)], axis=1)
+    multi_column_mapper = MultiColumnPercentileMapper(n_quantiles=101).train(X)
+    assert multi_column_mapper.reference_table.shape == (101, 2)
+
+    X_new = np.array([[0.15, 0.0], [0.25, 2.0], [-1.0, 5.0]])
+    percentiles = multi_column_mapper.map(X_new)
+    expected_percentiles = np.array([
+        [stats.percentileofscore(X[:, column_index], value) for column_index, value in enumerate(row)]
+        for row in X_new
+    ])
+
+    assert np.allclose(percentiles, expected_percentiles, atol=0.5)
+
+def test_multi_column_percentile_mapper_default_grid(probabilities):
+    X = np.stack([probabilities, probabilities ** 2], axis=1)
+    multi_column_mapper = MultiColumnPercentileMapper().train(X)
+
+    assert multi_column_mapper.reference_table.shape == (DEFAULT_N_QUANTILES, 2)
+    assert np.allclose(multi_column_mapper.map(np.array([[0.5, 0.25]])), [[50, 50]], atol=0.1)
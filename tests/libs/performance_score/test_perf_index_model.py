@@ -2,6 +2,7 @@ import pytest
 import numpy as np
 from sklearn.datasets import make_classification
 from pandaskill.libs.performance_score.perf_index_model import PerformanceIndexModel
+from pandaskill.libs.performance_score.percentile_mapper import DEFAULT_N_QUANTILES
 
 @pytest.fixture
 def sample_data():
@@ -16,7 +17,7 @@ def test_perf_index_fit(sample_data, perf_index_model_fixture):
     X, y = sample_data
     perf_index_model_fixture.fit(X, y)
     assert perf_index_model_fixture.model is not None
-    assert perf_index_model_fixture.percentile_mapper_list is not None
+    assert perf_index_model_fixture.percentile_mapper is not None
 
 def test_perf_index_compute_performance_scores(sample_data, perf_index_model_fixture):
     X, y = sample_data
@@ -38,7 +39,7 @@ def test_perf_index_compute_features_importance(sample_data, perf_index_model_fi
 def test_perf_index_learn_data_histograms(sample_data, perf_index_model_fixture):
     X, y = sample_data
     perf_index_model_fixture.fit(X, y)
-    assert len(perf_index_model_fixture.percentile_mapper_list) == X.shape[1]
+    assert perf_index_model_fixture.percentile_mapper.reference_table.shape == (DEFAULT_N_QUANTILES, X.shape[1])
 
 def test_perf_index_train_random_forest_classifier(sample_data, perf_index_model_fixture):
     X, y = sample_data
@@ -61,4 +62,54 @@ def test_perf_index_compute_performance_scores(sample_data, perf_index_model_fix
     performance_scores = perf_index_model_fixture.compute_performance_scores(X)
 
     assert performance_scores.shape[0] == X.shape[0]
-    assert np.all(performance_scores >= 0) and np.all(performance_scores <= 100)
\ No newline at end of file
+    assert np.all(performance_scores >= 0) and np.all(performance_scores <= 100)
+
+def test_perf_index_subsampled_permutation_importance(sample_data):
+    X, y = sample_data
+    model = PerformanceIndexModel(
+        n_estimators=20,
+        permutation_max_samples=30, 
+        permutation_holdout_fraction=0.3, 
+        permutation_n_jobs=2
+    )
+    model.train_random_forest_classifier(X, y)
+    assert model.weights.shape[0] == X.shape[1]
+    assert np.isclose(np.sum(model.weights), 1)
+
+def test_perf_index_holdout_forest_refit_on_all_rows(sample_data):
+    X, y = sample_data
+    model = PerformanceIndexModel(n_estimators=5, permutation_holdout_fraction=0.3, permutation_random_state=0)
+    model.train_random_forest_classifier(X, y)
+    # each tree is trained on a bootstrap sample of the size of its training set
+    assert all(tree.tree_.weighted_n_node_samples[0] == len(X) for tree in model.model.estimators_)
+
+def test_perf_index_impurity_importance(sample_data):
+    X, y = sample_data
+    model = PerformanceIndexModel(n_estimators=20, importance_method="impurity")
+    model.fit(X, y)
+    assert np.allclose(model.weights, model.model.feature_importances_ / np.sum(model.model.feature_importances_))
+    performance_scores = model.compute_performance_scores(X)
+    assert np.all(performance_scores >= 0) and np.all(performance_scores <= 100)
+
+def test_perf_index_unsupported_importance_method():
+    with pytest.raises(ValueError):
+        PerformanceIndexModel(importance_method="unknown")
+
+def test_perf_index_quantile_grid_scores(sample_data):
+    X, y = sample_data
+    exact_model = PerformanceIndexModel(n_estimators=20, random_state=42, n_quantiles=None).fit(X, y)
+    grid_model = PerformanceIndexModel(n_estimators=20, random_state=42, n_quantiles=51).fit(X, y)
+
+    assert grid_model.percentile_mapper.reference_table.shape == (51, X.shape[1])
+    assert np.allclose(exact_model.weights, grid_model.weights)
+    exact_percentiles = exact_model.percentile_mapper.map(X)
+    grid_percentiles = grid_model.percentile_mapper.map(X)
+    assert np.allclose(exact_percentiles, grid_percentiles, atol=2)
+
+def test_perf_index_compute_tree_shap_values(sample_data):
+    X, y = sample_data
+    model = PerformanceIndexModel(n_estimators=10).fit(X, y)
+    explainer, shap_values = model.compute_shap_values(X, algorithm="tree", max_background_samples=20)
+
+    assert shap_values.shape == (X.shape[0], X.shape[1])
+    assert np.ndim(explainer.expected_value) == 0
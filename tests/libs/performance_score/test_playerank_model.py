@@ -4,6 +4,7 @@ import numpy as np
 import pytest
 from sklearn.datasets import make_classification
 from sklearn.exceptions import NotFittedError
+from sklearn.svm import LinearSVC
 
 @pytest.fixture
 def sample_data():
@@ -36,4 +37,58 @@ def test_not_fitted_error_on_compute_performance_scores(sample_data, playerank_m
     X, _ = sample_data
     
     with pytest.raises(NotFittedError):
-        playerank_model.compute_performance_scores(X)
\ No newline at end of file
+        playerank_model.compute_performance_scores(X)
+
+def test_playerank_liblinear_weights_agree_with_libsvm(sample_data):
+    X, y = sample_data
+    parameters = {"C": 0.1, "kernel": "linear", "max_iter": 50000}
+    libsvm_model = PlayerankModel(solver="libsvm", **parameters).fit(X, y)
+    liblinear_model = PlayerankModel(solver="liblinear", **parameters).fit(X, y)
+
+    libsvm_weights = libsvm_model.compute_features_importance()
+    liblinear_weights = liblinear_model.compute_features_importance()
+
+    assert np.allclose(libsvm_weights, liblinear_weights, atol=1e-2)
+
+def test_playerank_liblinear_predict_proba(sample_data):
+    X, y = sample_data
+    model = PlayerankModel(solver="liblinear", C=0.1).fit(X, y)
+    proba = model.predict_proba(X)
+
+    assert proba.shape == (X.shape[0], 2)
+    assert np.allclose(proba.sum(axis=1), 1)
+
+def test_playerank_liblinear_calibration_fits_the_svm_once_on_all_samples(sample_data, mocker):
+    X, y = sample_data
+    fit_spy = mocker.spy(LinearSVC, "fit")
+    model = PlayerankModel(solver="liblinear", C=0.1).fit(X, y)
+
+    assert fit_spy.call_count == 6 # 5 folds and all the samples
+    assert model.model is model.calibrator.calibrated_classifiers_[0].estimator
+    assert model.compute_features_importance().shape == (X.shape[1],)
+
+def test_playerank_liblinear_without_calibration(sample_data):
+    X, y = sample_data
+    model = PlayerankModel(solver="liblinear", calibrate=False, C=0.1).fit(X, y)
+
+    assert model.calibrator is None
+    performance_scores = model.compute_performance_scores(X)
+    assert np.isclose(performance_scores.min(), 0) and np.isclose(performance_scores.max(), 100)
+
+@pytest.mark.parametrize("solver", ["libsvm", "liblinear"])
+def test_playerank_predict_proba_without_calibration(sample_data, solver):
+    X, y = sample_data
+    model = PlayerankModel(solver=solver, calibrate=False, C=0.1, kernel="linear").fit(X, y)
+    proba = model.predict_proba(X)
+
+    assert proba.shape == (X.shape[0], 2)
+    assert np.allclose(proba.sum(axis=1), 1)
+    assert np.array_equal(proba[:, 1] > 0.5, model.predict(X) == 1)
+
+def test_playerank_liblinear_non_linear_kernel():
+    with pytest.raises(ValueError):
+        PlayerankModel(solver="liblinear", kernel="rbf")
+
+def test_playerank_unsupported_solver():
+    with pytest.raises(ValueError):
+        PlayerankModel(solver="unknown")
@@ -34,3 +34,48 @@ def test_pscore_compute_features_importance(sample_data, pscore_model_fixture):
 
     assert isinstance(features_importance, np.ndarray), "Feature importances should be a numpy array"
     assert features_importance.shape[0] == X.shape[1], "Feature importances should match the number of features"
+
+def test_pscore_fit_with_early_stopping(sample_data):
+    X, y = sample_data
+    model = PScoreModel(
+        n_estimators=500, 
+        tree_method="hist", 
+        max_bin=64, 
+        n_jobs=1, 
+        validation_fraction=0.2, 
+        early_stopping_rounds=5
+    )
+    model.fit(X, y)
+
+    assert model.best_iteration is not None
+    assert model.best_iteration < 500
+    performance_scores = model.compute_performance_scores(X)
+    assert performance_scores.shape[0] == X.shape[0]
+
+def test_pscore_fit_without_early_stopping_records_last_iteration(sample_data, pscore_model_fixture):
+    X, y = sample_data
+    pscore_model_fixture.fit(X, y)
+    assert pscore_model_fixture.best_iteration == pscore_model_fixture.model.get_booster().num_boosted_rounds() - 1
+
+def test_pscore_early_stopping_requires_validation_fraction():
+    with pytest.raises(ValueError):
+        PScoreModel(early_stopping_rounds=5)
+
+def test_pscore_monotone_constraints_with_early_stopping(sample_data):
+    X, y = sample_data
+    monotone_constraints = [1] * X.shape[1]
+    model = PScoreModel(
+        monotone_constraints=monotone_constraints, validation_fraction=0.2, early_stopping_rounds=5
+    )
+    assert model.model.get_params()["monotone_constraints"] == {
+        f"feature_{i}": 1 for i in range(X.shape[1])
+    }
+    model.fit(X, y)
+    assert model.best_iteration is not None
+
+def test_pscore_compute_tree_shap_values(sample_data, pscore_model_fixture):
+    X, y = sample_data
+    pscore_model_fixture.fit(X, y)
+    explainer, shap_values = pscore_model_fixture.compute_shap_values(X, algorithm="tree", max_background_samples=20)
+
+    assert shap_values.shape == (X.shape[0], X.shape[1])
@@ -2,6 +2,7 @@ import pytest
 import numpy as np
 import pandas as pd
 from pandaskill.libs.skill_rating.bayesian import (
+    BayesianRater,
     compute_bayesian_ratings,
     combine_contextual_and_meta_ratings,
     _initialize_ratings,
@@ -401,5 +402,57 @@ def test_compute_bayesian_ratings(mocker):
 
     assert skill_rating_updates_df.equals(expected_df)
 
+def _create_games_df(nb_games: int, nb_players: int, seed: int = 0) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    rows = []
+    for game_id in range(nb_games):
+        game_player_ids = rng.choice(nb_players, 10, replace=False)
+        for i, player_id in enumerate(game_player_ids):
+            region = ["NA", "EU"][(player_id + (game_id > nb_games // 2) * (player_id % 3 == 0)) % 2]
+            rows.append([game_id, player_id, pd.Timestamp("2021-01-01") + pd.Timedelta(hours=game_id), region, int(i < 5), rng.random()])
+    df = pd.DataFrame(rows, columns=["game_id", "player_id", "date", "region", "win", "performance_score"])
+    df = df.sort_values(["player_id", "date"])
+    previous_region = df.groupby("player_id")["region"].shift(1).fillna(df["region"])
+    df["region_change"] = df["region"] != previous_region
+    df["team_id"] = df["win"]
+    df = df.set_index(["game_id", "player_id"]).sort_values(by=["date", "win"], ascending=[True, False])
+    return df
+
+@pytest.mark.parametrize("use_ffa_setting,use_meta_ratings", [(True, True), (False, False)])
+def test_bayesian_rater_matches_compute_bayesian_ratings(use_ffa_setting, use_meta_ratings):
+    df = _create_games_df(40, 25)
+
+    expected_df = compute_bayesian_ratings(df, use_ffa_setting, use_meta_ratings, "openskill")
+
+    rater = BayesianRater("openskill", use_ffa_setting, use_meta_ratings)
+    pd.testing.assert_frame_equal(rater.rate_games(df), expected_df)
+
+    rater = BayesianRater("openskill", use_ffa_setting, use_meta_ratings)
+    game_rating_updates = [rater.rate_game(game_df) for _, game_df in df.groupby(level="game_id", sort=False)]
+    pd.testing.assert_frame_equal(pd.concat(game_rating_updates), expected_df)
+
+def test_bayesian_rater_get_player_ratings():
+    df = _create_games_df(10, 15)
+    rater = BayesianRater()
+    rating_updates_df = rater.rate_games(df)
+
+    player_ratings = rater.get_player_ratings([1, 100])
+
+    assert player_ratings.loc[1, "nb_games"] == (df.index.get_level_values("player_id") == 1).sum()
+    assert player_ratings.loc[1, "contextual_rating_mu"] == rating_updates_df.xs(1, level="player_id")["contextual_rating_after_mu"].iloc[-1]
+    assert player_ratings.loc[100, "nb_games"] == 0
+    assert player_ratings.loc[100, "skill_rating_mu"] == 2 * DEFAULT_MU
+
+def test_bayesian_rater_save_load(tmp_path):
+    df = _create_games_df(20, 15)
+    rater = BayesianRater("openskill", True, True)
+    rater.rate_games(df.loc[:9])
+    path = str(tmp_path / "rater.joblib")
+
+    rater.save(path)
+    restored_rater = BayesianRater.load(path)
+
+    pd.testing.assert_frame_equal(restored_rater.rate_games(df.loc[10:]), rater.rate_games(df.loc[10:]))
+
 if __name__ == '__main__':
-    pytest.main([__file__])
\ No newline at end of file
+    pytest.main([__file__])
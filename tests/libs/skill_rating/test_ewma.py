@@ -1,6 +1,23 @@
 import pytest
+import numpy as np
 import pandas as pd
-from pandaskill.libs.skill_rating.ewma import compute_ewma_ratings, _compute_ewma_ratings_for_player
+from pandaskill.libs.skill_rating.ewma import EwmaRater, compute_ewma_ratings, compute_ewma_ratings_for_alphas
+
+# per-player pandas implementation, the reference of the vectorized one
+def _compute_ewma_ratings_for_player(
+    player_game_performance_score: pd.DataFrame, alpha: float
+) -> pd.DataFrame:
+    ratings_after_game = player_game_performance_score.ewm(alpha=alpha, adjust=False).mean()
+    ratings_after_game = ratings_after_game["performance_score"]
+    ratings_after_game.name = "skill_rating_after"
+    ratings_before_game = [0.0, *ratings_after_game.values[:-1]]
+    ratings_before_game = pd.Series(
+        data=ratings_before_game, 
+        index=player_game_performance_score.index,
+        name="skill_rating_before"
+    )
+    skill_ratings = pd.concat([ratings_before_game, ratings_after_game], axis=1)
+    return skill_ratings
 
 def test_compute_ewma_ratings():
     data = {
@@ -48,5 +65,92 @@ def test__compute_ewma_ratings_for_player():
     
     pd.testing.assert_frame_equal(skill_ratings, expected_df)
 
+def test_compute_ewma_ratings_matches_per_player_ewm():
+    rng = np.random.default_rng(0)
+    nb_rows = 500
+    df = pd.DataFrame({
+        'game_id': np.arange(nb_rows),
+        'player_id': rng.integers(0, 20, nb_rows),
+        'date': pd.Timestamp('2021-01-01') + pd.to_timedelta(rng.permutation(nb_rows), unit='h'),
+        'performance_score': rng.random(nb_rows) * 100,
+    }).set_index(['game_id', 'player_id'])
+    alpha = 0.07
+
+    ratings_df = compute_ewma_ratings(df, alpha)
+
+    expected_df = df.sort_values(by=['player_id', 'date']).loc[:, ['performance_score']] \
+        .groupby('player_id', group_keys=False) \
+        .apply(lambda x: _compute_ewma_ratings_for_player(x, alpha))
+    pd.testing.assert_frame_equal(ratings_df, expected_df, check_exact=True)
+
+def test_compute_ewma_ratings_for_alphas():
+    data = {
+        'player_id': [1, 1, 1, 2, 2, 2],
+        'game_id': [1, 2, 3, 2, 1, 3],
+        'date': [
+            '2021-01-01', '2021-01-02', '2021-01-03',
+            '2021-01-02', '2021-01-01',  '2021-01-03'
+        ],
+        'performance_score': [10, 20, 30, 50, 40, 60]
+    }
+    df = pd.DataFrame(data)
+    df['date'] = pd.to_datetime(df['date'])
+    df = df.set_index(['game_id', 'player_id'])
+    alphas = [0.5, 0.1]
+
+    ratings_df = compute_ewma_ratings_for_alphas(df, alphas)
+
+    assert ratings_df.shape == (6, 4)
+    for alpha in alphas:
+        pd.testing.assert_frame_equal(
+            ratings_df[alpha], compute_ewma_ratings(df, alpha), check_exact=True, check_names=False
+        )
+
+def test_ewma_rater_mini_batches_match_full_history():
+    rng = np.random.default_rng(0)
+    player_ids = rng.integers(0, 30, 400)
+    performance_scores = rng.random(400) * 100
+    alphas = [0.1, 0.5]
+
+    expected_before, expected_after = EwmaRater(alphas).update(player_ids, performance_scores)
+
+    rater = EwmaRater(alphas)
+    batches = [rater.update(player_ids[i:i + 17], performance_scores[i:i + 17]) for i in range(0, 400, 17)]
+    np.testing.assert_array_equal(np.vstack([before for before, _ in batches]), expected_before)
+    np.testing.assert_array_equal(np.vstack([after for _, after in batches]), expected_after)
+    assert rater.nb_games.sum() == 400
+
+def test_ewma_rater_single_games():
+    rater = EwmaRater(0.5)
+
+    np.testing.assert_array_equal(rater.update([1], [10.0]), ([[0.0]], [[10.0]]))
+    np.testing.assert_array_equal(rater.update([1, 2], [20.0, 40.0]), ([[10.0], [0.0]], [[15.0], [40.0]]))
+    np.testing.assert_array_equal(rater.get_ratings([2, 1, 3]), [[40.0], [15.0], [0.0]])
+
+def test_ewma_rater_checkpoint(tmp_path):
+    rater = EwmaRater([0.1, 0.2])
+    rater.update([1, 2, 1], [10.0, 20.0, 30.0])
+    checkpoint_path = str(tmp_path / "ewma_rater.npz")
+
+    rater.save(checkpoint_path)
+    restored_rater = EwmaRater.load(checkpoint_path)
+
+    np.testing.assert_array_equal(restored_rater.alphas, rater.alphas)
+    np.testing.assert_array_equal(restored_rater.get_ratings([1, 2]), rater.get_ratings([1, 2]))
+    np.testing.assert_array_equal(
+        restored_rater.update([2, 3], [5.0, 6.0])[1], rater.update([2, 3], [5.0, 6.0])[1]
+    )
+
+def test_ewma_rater_checkpoint_with_string_player_ids(tmp_path):
+    rater = EwmaRater(0.5)
+    rater.update(["faker", "chovy", "faker"], [10.0, 20.0, 30.0])
+    checkpoint_path = str(tmp_path / "ewma_rater.npz")
+
+    rater.save(checkpoint_path)
+    restored_rater = EwmaRater.load(checkpoint_path)
+
+    np.testing.assert_array_equal(restored_rater.get_ratings(["chovy", "faker", "zeus"]), [[20.0], [20.0], [0.0]])
+    np.testing.assert_array_equal(restored_rater.update(["zeus", "faker"], [8.0, 40.0]), ([[0.0], [20.0]], [[8.0], [30.0]]))
+
 if __name__ == '__main__':
     pytest.main([__file__])
@@ -0,0 +1,67 @@
+import pytest
+import numpy as np
+import pandas as pd
+from scipy.stats import norm
+from pandaskill.libs.skill_rating.matchup import (
+    MatchupEngine,
+    compute_win_probabilities,
+    compute_team_win_probabilities,
+)
+
+player_ratings = pd.DataFrame(
+    {
+        "skill_rating_mu": [30.0, 25.0, 20.0, 28.0],
+        "skill_rating_sigma": [2.0, 3.0, 4.0, 1.0],
+        "region": ["Korea", "Korea", "China", "China"],
+    },
+    index=pd.Index([10, 11, 12, 13], name="player_id")
+)
+
+def test_compute_win_probabilities():
+    win_probabilities = compute_win_probabilities(
+        np.array([30.0, 20.0]), np.array([2.0, 4.0]), np.array([25.0, 20.0]), np.array([3.0, 1.0])
+    )
+
+    expected_win_probabilities = [norm.cdf(5.0 / np.sqrt(13.0)), 0.5]
+    np.testing.assert_allclose(win_probabilities, expected_win_probabilities)
+
+def test_compute_team_win_probabilities():
+    mus_a, sigmas_a = np.array([[30.0, 25.0]]), np.array([[2.0, 3.0]])
+    mus_b, sigmas_b = np.array([[20.0, 28.0]]), np.array([[4.0, 1.0]])
+
+    win_probabilities = compute_team_win_probabilities(mus_a, sigmas_a, mus_b, sigmas_b)
+
+    expected_win_probabilities = [norm.cdf(7.0 / np.sqrt(4.0 + 9.0 + 16.0 + 1.0))]
+    np.testing.assert_allclose(win_probabilities, expected_win_probabilities)
+
+def test_matchup_engine_players_and_teams():
+    engine = MatchupEngine(player_ratings)
+
+    player_win_probabilities = engine.compute_player_win_probabilities([10, 12], [11, 10])
+    np.testing.assert_allclose(player_win_probabilities, [
+        compute_win_probabilities(30.0, 2.0, 25.0, 3.0),
+        compute_win_probabilities(20.0, 4.0, 30.0, 2.0),
+    ])
+
+    team_win_probabilities = engine.compute_team_win_probabilities([[10, 11], [12, 13]], [[12, 13], [10, 11]])
+    np.testing.assert_allclose(team_win_probabilities[0], 1 - team_win_probabilities[1])
+
+    with pytest.raises(KeyError):
+        engine.compute_player_win_probabilities([10], [99])
+
+def test_matchup_engine_all_pairs():
+    engine = MatchupEngine(player_ratings)
+
+    all_pairs = engine.get_all_pairs_win_probabilities("Korea")
+
+    assert all_pairs.index.tolist() == [10, 11]
+    assert all_pairs.loc[10, 11] == pytest.approx(engine.compute_player_win_probabilities([10], [11])[0])
+    np.testing.assert_allclose(all_pairs.values + all_pairs.values.T, 1.0)
+    assert engine.get_all_pairs_win_probabilities("Korea") is all_pairs
+    assert engine.get_all_pairs_win_probabilities().shape == (4, 4)
+
+    engine.update_ratings(player_ratings)
+    assert engine.get_all_pairs_win_probabilities("Korea") is not all_pairs
+
+if __name__ == '__main__':
+    pytest.main([__file__])
@@ -0,0 +1,73 @@
+import numpy as np
+import pandas as pd
+from pandaskill.libs.skill_rating.rating_history import RatingHistory
+
+data = pd.DataFrame(
+    {
+        "date": ["2024-01-01", "2024-01-01", "2024-01-05", "2024-01-05", "2024-01-10", "2024-01-03"],
+        "region": ["Korea", "China", "Korea", "China", "Europe", "China"],
+        "skill_rating_after": [1.0, 2.0, 3.0, 4.0, 5.0, 6.0],
+    },
+    index=pd.MultiIndex.from_tuples(
+        [(1, 10), (1, 20), (2, 10), (2, 20), (3, 10), (4, 30)], names=["game_id", "player_id"]
+    )
+)
+
+def _get_ratings_as_of_with_pandas(data, date, since):
+    window_data = data[(data.date <= date) & (data.date > since)]
+    ratings = window_data.groupby("player_id").last()
+    ratings["nb_games"] = window_data.groupby("player_id").count()["date"]
+    return ratings
+
+def test_get_positions_as_of():
+    rating_history = RatingHistory(data)
+
+    positions = rating_history.get_positions_as_of([10, 10, 10, 30, 99], ["2023-12-31", "2024-01-05", "2024-02-01", "2024-01-02", "2024-02-01"])
+
+    last_ratings = [
+        rating_history.data["skill_rating_after"].iloc[position] if position >= 0 else None for position in positions
+    ]
+    assert last_ratings == [None, 3.0, 5.0, None, None]
+
+def test_count_games():
+    rating_history = RatingHistory(data)
+
+    nb_games = rating_history.count_games([10, 20, 30, 99], "2024-01-01", "2024-01-05")
+
+    np.testing.assert_array_equal(nb_games, [1, 1, 1, 0])
+
+def test_get_ratings_as_of_same_as_pandas():
+    rating_history = RatingHistory(data)
+
+    for date, since in [("2024-01-05", "2023-01-01"), ("2024-01-10", "2024-01-01"), ("2024-01-04", "2024-01-02")]:
+        ratings = rating_history.get_ratings_as_of(date, since=since)
+
+        expected_ratings = _get_ratings_as_of_with_pandas(data, date, since)
+        pd.testing.assert_frame_equal(ratings, expected_ratings)
+
+def test_get_ratings_as_of_with_datetime_dates():
+    datetime_data = data.assign(date=pd.to_datetime(data["date"]))
+    rating_history = RatingHistory(datetime_data)
+
+    ratings = rating_history.get_ratings_as_of("2024-01-05", since="2024-01-01")
+
+    assert ratings.index.tolist() == [10, 20, 30]
+    assert ratings["skill_rating_after"].tolist() == [3.0, 4.0, 6.0]
+    assert ratings["nb_games"].tolist() == [1, 1, 1]
+
+def test_get_ratings_as_of_with_players_and_filters():
+    rating_history = RatingHistory(data)
+
+    ratings = rating_history.get_ratings_as_of("2024-01-10", player_ids=[30, 10, 99])
+    assert ratings.index.tolist() == [30, 10]
+    assert ratings["nb_games"].tolist() == [1, 3]
+
+    ratings = rating_history.get_ratings_as_of("2024-01-10", filters={"region": "China"})
+    assert ratings.index.tolist() == [20, 30]
+
+def test_get_games_between():
+    rating_history = RatingHistory(data)
+
+    games = rating_history.get_games_between("2024-01-01", "2024-01-10")
+
+    assert games.index.tolist() == [(2, 10), (3, 10), (2, 20), (4, 30)]
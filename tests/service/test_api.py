@@ -0,0 +1,185 @@
+import asyncio
+import json
+import numpy as np
+import pandas as pd
+import threading
+from types import SimpleNamespace
+from tornado.httpclient import AsyncHTTPClient, HTTPClientError, HTTPRequest
+from tornado.httpserver import HTTPServer
+from tornado.testing import bind_unused_port
+from pandaskill.libs.skill_rating.bayesian import BayesianRater
+from pandaskill.service.api import MicroBatcher, create_application
+from pandaskill.service.ingestion import LeaderboardCache
+
+FEATURES = ["kla", "gold_per_minute"]
+
+class RecordingModel():
+    def __init__(self, value=0.0):
+        self.value = value
+        self.batch_sizes = []
+
+    def compute_performance_scores(self, X):
+        self.batch_sizes.append(len(X))
+        return X[:, 0] + self.value
+
+def _failing_predict(X):
+    raise ValueError("model failure")
+
+def test_micro_batcher_groups_concurrent_requests():
+    model = RecordingModel()
+    batcher = MicroBatcher(model.compute_performance_scores, max_batch_size=100, max_wait_ms=50)
+    requests = [np.full((nb_rows, 2), request_index, dtype=np.float64) for request_index, nb_rows in enumerate([1, 3, 2])]
+
+    async def submit_all():
+        return await asyncio.gather(*[batcher.submit(X) for X in requests])
+
+    results = asyncio.run(submit_all())
+
+    assert model.batch_sizes == [6]
+    assert batcher.nb_batches == 1
+    for X, y in zip(requests, results):
+        np.testing.assert_array_equal(y, X[:, 0])
+
+def test_micro_batcher_flushes_full_batches_without_waiting():
+    model = RecordingModel()
+    batcher = MicroBatcher(model.compute_performance_scores, max_batch_size=4, max_wait_ms=60_000)
+
+    async def submit_all():
+        return await asyncio.wait_for(
+            asyncio.gather(batcher.submit(np.zeros((2, 2))), batcher.submit(np.ones((2, 2)))), timeout=5
+        )
+
+    results = asyncio.run(submit_all())
+
+    assert model.batch_sizes == [4]
+    np.testing.assert_array_equal(results[1], [1, 1])
+
+def test_micro_batcher_flushes_after_max_wait():
+    model = RecordingModel()
+    batcher = MicroBatcher(model.compute_performance_scores, max_batch_size=100, max_wait_ms=1)
+
+    async def submit_sequentially():
+        return [await batcher.submit(np.full((1, 2), value)) for value in [1.0, 2.0]]
+
+    results = asyncio.run(submit_sequentially())
+
+    assert model.batch_sizes == [1, 1]
+    np.testing.assert_array_equal(np.concatenate(results), [1.0, 2.0])
+
+def test_micro_batcher_propagates_errors_to_every_caller():
+    batcher = MicroBatcher(_failing_predict, max_batch_size=100, max_wait_ms=10)
+
+    async def submit_all():
+        return await asyncio.gather(
+            batcher.submit(np.zeros((1, 2))), batcher.submit(np.zeros((2, 2))), return_exceptions=True
+        )
+
+    results = asyncio.run(submit_all())
+
+    assert all(isinstance(result, ValueError) for result in results)
+
+def _create_service():
+    rater = BayesianRater()
+    rater.rate_games(_create_game_df(list(range(10))))
+    return SimpleNamespace(
+        features=FEATURES,
+        models={"top": RecordingModel(0.0), "mid": RecordingModel(100.0)},
+        rater=rater,
+        leaderboard_cache=LeaderboardCache(rater),
+    )
+
+def _create_game_df(player_ids):
+    return pd.DataFrame(
+        {
+            "game_id": 1,
+            "player_id": player_ids,
+            "region": "EU",
+            "performance_score": np.linspace(0, 1, len(player_ids)),
+        }
+    ).set_index(["game_id", "player_id"])
+
+def _fetch_all(service, requests):
+    """Serves the application on an unused port and returns the (status, body) of every request."""
+    async def fetch_all():
+        socket, port = bind_unused_port()
+        server = HTTPServer(create_application(service, max_batch_size=100, max_wait_ms=10))
+        server.add_sockets([socket])
+        client = AsyncHTTPClient()
+        try:
+            responses = await asyncio.gather(*[
+                client.fetch(HTTPRequest(f"http://127.0.0.1:{port}{path}", **kwargs), raise_error=False)
+                for path, kwargs in requests
+            ])
+        finally:
+            server.stop()
+        return [(response.code, response.body) for response in responses]
+
+    return asyncio.run(fetch_all())
+
+def test_performance_scores_handler_batches_and_splits_requests():
+    service = _create_service()
+    bodies = [
+        {"role": "top", "rows": [{"kla": 1.0, "gold_per_minute": 0.0}, {"kla": 2.0, "gold_per_minute": 0.0}]},
+        {"role": "top", "rows": [{"kla": 3.0, "gold_per_minute": 0.0}]},
+        {"role": "mid", "rows": [{"kla": 4.0, "gold_per_minute": 0.0}]},
+    ]
+
+    responses = _fetch_all(
+        service, [("/performance_scores", {"method": "POST", "body": json.dumps(body)}) for body in bodies]
+    )
+
+    assert [code for code, _ in responses] == [200, 200, 200]
+    assert [json.loads(body)["performance_scores"] for _, body in responses] == [[1.0, 2.0], [3.0], [104.0]]
+    assert service.models["top"].batch_sizes == [3]
+
+def test_performance_scores_handler_rejects_invalid_requests():
+    service = _create_service()
+    bodies = [
+        "not json",
+        json.dumps({"role": "unknown", "rows": [{"kla": 1.0, "gold_per_minute": 0.0}]}),
+        json.dumps({"role": "top", "rows": [{"kla": 1.0}]}),
+    ]
+
+    responses = _fetch_all(service, [("/performance_scores", {"method": "POST", "body": body}) for body in bodies])
+
+    assert [code for code, _ in responses] == [400, 400, 400]
+
+def test_rating_leaderboard_and_health_handlers():
+    service = _create_service()
+
+    responses = _fetch_all(service, [
+        ("/players/3/rating", {}),
+        ("/players/99/rating", {}),
+        ("/leaderboard?region=EU&limit=3", {}),
+        ("/health", {}),
+    ])
+
+    assert [code for code, _ in responses] == [200, 404, 200, 200]
+    assert json.loads(responses[0][1])["player_id"] == 3
+    leaderboard = json.loads(responses[2][1])
+    assert [row["rank"] for row in leaderboard] == [1, 2, 3]
+    health = json.loads(responses[3][1])
+    assert health["features"] == FEATURES and health["nb_players"] == 10
+
+def test_leaderboard_handler_rejects_invalid_limits():
+    service = _create_service()
+
+    responses = _fetch_all(service, [(f"/leaderboard?limit={limit}", {}) for limit in ["abc", "-5", "0", "1"]])
+
+    assert [code for code, _ in responses] == [400, 400, 400, 200]
+    assert len(json.loads(responses[3][1])) == 1
+
+def test_leaderboard_handler_rebuilds_snapshots_off_the_event_loop():
+    service = _create_service()
+    event_loop_thread = threading.get_ident()
+    build_leaderboard = service.leaderboard_cache._build_leaderboard
+    build_threads = []
+    def recording_build_leaderboard(region):
+        build_threads.append(threading.get_ident())
+        return build_leaderboard(region)
+    service.leaderboard_cache._build_leaderboard = recording_build_leaderboard
+
+    responses = _fetch_all(service, [("/leaderboard?region=EU", {})])
+
+    assert responses[0][0] == 200
+    assert len(build_threads) == 1 and build_threads[0] != event_loop_thread
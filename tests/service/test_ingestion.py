@@ -0,0 +1,128 @@
+import numpy as np
+import os
+import pandas as pd
+import pytest
+from pandaskill.libs.skill_rating.bayesian import BayesianRater
+from pandaskill.service.ingestion import GameIngestionService, LeaderboardCache
+
+FEATURES = ["kla", "gold_per_minute"]
+
+class FirstFeatureModel():
+    def compute_performance_scores(self, X):
+        return X[:, 0]
+
+class ConstantModel():
+    def __init__(self, value):
+        self.value = value
+
+    def compute_performance_scores(self, X):
+        return np.full(len(X), self.value)
+
+def _create_game_df(game_id, player_ids, regions, seed=0):
+    rng = np.random.default_rng(seed)
+    game_df = pd.DataFrame(
+        {
+            "game_id": game_id,
+            "player_id": player_ids,
+            "date": pd.Timestamp("2024-01-01") + pd.Timedelta(hours=game_id),
+            "region": regions,
+            "role": ["top", "mid"] * 5,
+            "win": [False] * 5 + [True] * 5,
+            "player_name": [f"player_{player_id}" for player_id in player_ids],
+            "team_name": ["Red"] * 5 + ["Blue"] * 5,
+            "kla": rng.random(10),
+            "gold_per_minute": rng.random(10),
+            "performance_score": rng.random(10),
+        }
+    )
+    return game_df.set_index(["game_id", "player_id"])
+
+@pytest.fixture
+def service(tmp_path, mocker):
+    # the features are computed by the preprocessing functions, tested on their own
+    mocker.patch.object(GameIngestionService, "_compute_game_features", side_effect=lambda stat_df, event_df: stat_df)
+    rater = BayesianRater()
+    return GameIngestionService(
+        FEATURES, {None: FirstFeatureModel()}, rater, LeaderboardCache(rater), str(tmp_path / "state"), checkpoint_every=2
+    )
+
+def test_ingest_game(service):
+    game_df = _create_game_df(1, list(range(10)), ["EU"] * 10)
+
+    rating_updates = service.ingest_game(game_df, None)
+
+    assert rating_updates.index.get_level_values("player_id").tolist() == list(range(5, 10)) + list(range(5))
+    np.testing.assert_array_equal(
+        rating_updates["performance_score"].values, game_df.loc[rating_updates.index, "kla"].values
+    )
+    assert all(service.rater.player_nb_games[player_id] == 1 for player_id in range(10))
+    assert service.leaderboard_cache.player_info[3]["player_name"] == "player_3"
+    assert len(service.latencies) == 1
+
+def test_ingest_game_appends_rating_updates_and_checkpoints(service):
+    state_dir = service.state_dir
+
+    service.ingest_game(_create_game_df(1, list(range(10)), ["EU"] * 10), None)
+    assert not os.path.exists(os.path.join(state_dir, "bayesian_rater.joblib"))
+    service.ingest_game(_create_game_df(2, list(range(5, 15)), ["EU"] * 10, seed=1), None)
+
+    rating_updates = pd.read_csv(os.path.join(state_dir, "rating_updates.csv"), index_col=(0, 1))
+    assert len(rating_updates) == 20
+    assert rating_updates.index.get_level_values("game_id").unique().tolist() == [1, 2]
+    restored_rater = BayesianRater.load(os.path.join(state_dir, "bayesian_rater.joblib"))
+    assert restored_rater.player_nb_games == service.rater.player_nb_games
+
+def test_ingest_game_scores_each_role_with_its_model(service):
+    service.models = {"top": ConstantModel(1.0), "mid": ConstantModel(2.0)}
+    game_df = _create_game_df(1, list(range(10)), ["EU"] * 10)
+
+    rating_updates = service.ingest_game(game_df, None)
+
+    roles = game_df.loc[rating_updates.index, "role"]
+    assert (rating_updates.loc[roles == "top", "performance_score"] == 1.0).all()
+    assert (rating_updates.loc[roles == "mid", "performance_score"] == 2.0).all()
+
+def test_leaderboard_cache_invalidation():
+    rater = BayesianRater()
+    leaderboard_cache = LeaderboardCache(rater)
+    rater.rate_game(_create_game_df(1, list(range(10)), ["EU"] * 5 + ["NA"] * 5).sort_values("win", ascending=False))
+    snapshots = {region: leaderboard_cache.get(region) for region in ["global", "EU", "NA"]}
+    assert leaderboard_cache.get("EU") is snapshots["EU"]
+
+    game_df = _create_game_df(2, list(range(10, 20)), ["EU"] * 10)
+    rater.rate_game(game_df.sort_values("win", ascending=False))
+    leaderboard_cache.update(game_df)
+
+    assert leaderboard_cache.get("NA") is snapshots["NA"]
+    assert len(leaderboard_cache.get("EU")) == 15
+    assert len(leaderboard_cache.get("global")) == 20
+
+def test_leaderboard_cache_ranking():
+    rater = BayesianRater()
+    rater.rate_game(_create_game_df(1, list(range(10)), ["EU"] * 10).sort_values("win", ascending=False))
+    rater.rate_game(_create_game_df(2, list(range(5, 15)), ["EU"] * 10).sort_values("win", ascending=False))
+    leaderboard_cache = LeaderboardCache(rater, min_nb_games=2)
+
+    leaderboard = leaderboard_cache.get()
+
+    assert sorted(leaderboard["player_id"].tolist()) == list(range(5, 10))
+    assert leaderboard["rank"].tolist() == list(range(1, 6))
+    assert leaderboard["skill_rating"].is_monotonic_decreasing
+
+def test_run_from_directory(service, tmp_path, mocker):
+    drop_dir = tmp_path / "drop"
+    drop_dir.mkdir()
+    event_df = pd.DataFrame({"event_id": [0], "assisting_player_ids": ["[1, 2]"]}).set_index("event_id")
+    for game_id in [1, 2, 3]:
+        _create_game_df(game_id, list(range(10)), ["EU"] * 10).to_csv(drop_dir / f"{game_id}_stats.csv")
+        if game_id != 3: # game 3 is not complete yet
+            event_df.to_csv(drop_dir / f"{game_id}_events.csv")
+    ingest_game_mock = mocker.patch.object(service, "ingest_game", side_effect=[None, ValueError("invalid game")])
+
+    service.run_from_directory(str(drop_dir), poll_interval=0, max_idle_polls=1)
+
+    assert ingest_game_mock.call_count == 2
+    assert ingest_game_mock.call_args_list[0].args[1]["assisting_player_ids"].iloc[0] == [1, 2]
+    assert sorted(os.listdir(drop_dir / "processed")) == ["1_events.csv", "1_stats.csv"]
+    assert sorted(os.listdir(drop_dir / "failed")) == ["2_events.csv", "2_stats.csv"]
+    assert sorted(path for path in os.listdir(drop_dir) if path.endswith(".csv")) == ["3_stats.csv"]